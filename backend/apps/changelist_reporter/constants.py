@@ -1 +1,2 @@
-
+GITLAB_BASE_URL = "https://gitlab.example.com"
+GITLAB_API_PAGINATION_PER_PAGE = 100
@@ -0,0 +1,61 @@
+from typing import Dict, Optional, Sequence
+
+import dateutil.parser
+from django.db import connection
+from django.db.models import Q
+
+from apps.changelist_reporter.models import GitlabMergeRequest
+from apps.dashboard.models import GitlabProject
+
+INDEX_MERGE_REQUESTS_BATCH_SIZE = 1000
+
+
+def _parse_time(value):
+    return dateutil.parser.parse(value) if isinstance(value, str) else value
+
+
+def index_merge_requests(gitlab_project: GitlabProject, merge_requests: Sequence[Dict]) -> None:
+    """
+    Inserts the merge requests (json of the Gitlab merge request API), or updates the existing ones with the same iid;
+     with a query per `INDEX_MERGE_REQUESTS_BATCH_SIZE` merge requests.
+    """
+    # The last one of the duplicates wins; since a row can't be updated twice by a single insert.
+    merge_requests = list({merge_request['iid']: merge_request for merge_request in merge_requests}.values())
+    for batch_start in range(0, len(merge_requests), INDEX_MERGE_REQUESTS_BATCH_SIZE):
+        batch = merge_requests[batch_start:batch_start + INDEX_MERGE_REQUESTS_BATCH_SIZE]
+        query = f"""
+            INSERT INTO {GitlabMergeRequest._meta.db_table}
+                (gitlab_project_id, iid, title, sha, merge_commit_sha, squash_commit_sha, merged_at, updated_at)
+            VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(batch))}
+            ON CONFLICT (gitlab_project_id, iid) DO UPDATE
+                SET title = EXCLUDED.title, sha = EXCLUDED.sha, merge_commit_sha = EXCLUDED.merge_commit_sha,
+                    squash_commit_sha = EXCLUDED.squash_commit_sha, merged_at = EXCLUDED.merged_at,
+                    updated_at = EXCLUDED.updated_at
+        """
+        parameters = []
+        for merge_request in batch:
+            parameters += [
+                gitlab_project.id,
+                merge_request['iid'],
+                merge_request.get('title') or '',
+                merge_request.get('sha'),
+                merge_request.get('merge_commit_sha'),
+                merge_request.get('squash_commit_sha'),
+                _parse_time(merge_request.get('merged_at')),
+                _parse_time(merge_request['updated_at']),
+            ]
+        with connection.cursor() as cursor:
+            cursor.execute(query, parameters)
+
+
+def find_indexed_merge_request_of_commit(gitlab_project: GitlabProject, commit_hash: str) -> Optional[GitlabMergeRequest]:
+    """Returns the indexed merge request with the commit hash as any of its three commit hashes, if any."""
+    return GitlabMergeRequest.objects \
+        .filter(gitlab_project=gitlab_project) \
+        .filter(Q(sha=commit_hash) | Q(merge_commit_sha=commit_hash) | Q(squash_commit_sha=commit_hash)) \
+        .order_by('-iid') \
+        .first()
+
+
+def is_merge_request_of_commit(merge_request: Dict, commit_hash: str) -> bool:
+    return commit_hash in (merge_request.get('sha'), merge_request.get('merge_commit_sha'), merge_request.get('squash_commit_sha'))
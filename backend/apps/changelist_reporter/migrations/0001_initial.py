@@ -0,0 +1,46 @@
+# Generated by Django 2.2.27 on 2026-10-18 20:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('dashboard', '0004_gitlab_project_merge_requests_sync_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitlabMergeRequest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('iid', models.IntegerField()),
+                ('title', models.CharField(blank=True, max_length=500)),
+                ('sha', models.CharField(max_length=40, null=True)),
+                ('merge_commit_sha', models.CharField(max_length=40, null=True)),
+                ('squash_commit_sha', models.CharField(max_length=40, null=True)),
+                ('merged_at', models.DateTimeField(null=True)),
+                ('updated_at', models.DateTimeField()),
+                ('gitlab_project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='merge_requests', to='dashboard.GitlabProject')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='gitlabmergerequest',
+            index=models.Index(fields=['gitlab_project', 'sha'], name='merge_request_sha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gitlabmergerequest',
+            index=models.Index(fields=['gitlab_project', 'merge_commit_sha'], name='merge_request_merge_sha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gitlabmergerequest',
+            index=models.Index(fields=['gitlab_project', 'squash_commit_sha'], name='merge_request_squash_sha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gitlabmergerequest',
+            constraint=models.UniqueConstraint(fields=('gitlab_project', 'iid'), name='unique_merge_request_iid_in_gitlab_project'),
+        ),
+    ]
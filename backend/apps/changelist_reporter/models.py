@@ -1,12 +1,18 @@
+from datetime import datetime
+
 import dateutil.parser
+from django.db import models
+
+from apps.dashboard.models import GitlabProject
+from apps.devops_metrics.models import ChangeList
 
 
 class ChangeListReport:
-    def __init__(self, id: str, title: str, commit_sha: str, merge_time: str):
+    def __init__(self, id: str, title: str, commit_sha: str, merge_time):
         self.id = id
         self.title = title
         self.commit_sha = commit_sha
-        self.merge_time = dateutil.parser.parse(merge_time)
+        self.merge_time = merge_time if isinstance(merge_time, datetime) else dateutil.parser.parse(merge_time)
         self.report = None
 
     def __str__(self):
@@ -41,3 +47,59 @@ class ChangeListReport:
             merge_request_commit_hash_in_default_branch,
             gitlab_merge_request.get('merged_at')
         )
+
+
+class GitlabMergeRequest(models.Model):
+    """
+    The merged merge requests of the default branch of a GitLab project, kept by the sync (see
+     `get_gitlab_changelists_and_report_to_devopsmetrics`); so the merge request of a commit is found locally.
+    """
+    gitlab_project = models.ForeignKey(
+        GitlabProject,
+        related_name='merge_requests',
+        on_delete=models.CASCADE,
+    )
+    iid = models.IntegerField()
+    title = models.CharField(
+        max_length=ChangeList.TITLE_MAX_LENGTH,
+        blank=True,
+    )
+    sha = models.CharField(
+        max_length=ChangeList.COMMIT_HASH_MAX_LENGTH,
+        null=True,
+    )
+    merge_commit_sha = models.CharField(
+        max_length=ChangeList.COMMIT_HASH_MAX_LENGTH,
+        null=True,
+    )
+    squash_commit_sha = models.CharField(
+        max_length=ChangeList.COMMIT_HASH_MAX_LENGTH,
+        null=True,
+    )
+    merged_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['gitlab_project', 'iid'], name='unique_merge_request_iid_in_gitlab_project'),
+        ]
+        indexes = [
+            models.Index(fields=['gitlab_project', 'sha'], name='merge_request_sha_idx'),
+            models.Index(fields=['gitlab_project', 'merge_commit_sha'], name='merge_request_merge_sha_idx'),
+            models.Index(fields=['gitlab_project', 'squash_commit_sha'], name='merge_request_squash_sha_idx'),
+        ]
+
+    def __str__(self):
+        return f'!{self.iid} {self.title}'
+
+    def to_gitlab_merge_request_json(self):
+        """Returns the merge request in the shape of the Gitlab merge request API (the fields kept only)."""
+        return {
+            'iid': self.iid,
+            'title': self.title,
+            'sha': self.sha,
+            'merge_commit_sha': self.merge_commit_sha,
+            'squash_commit_sha': self.squash_commit_sha,
+            'merged_at': self.merged_at,
+            'updated_at': self.updated_at,
+        }
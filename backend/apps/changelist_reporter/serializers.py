@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.conf import settings
 from apps.dashboard.models import Project
+from apps.dashboard.project_token_cache import project_token_cache, token_belongs_to_project
 from apps.devops_metrics.models import ChangeList
 from apps.dashboard.constants import DEFAULT_BRANCH_MAX_LENGTH
 
@@ -33,7 +34,7 @@ def validate_project_access_token(project, access_token):
     if access_token is None:
         raise serializers.ValidationError(f'"{settings.PROJECT_TOKEN_HEADER}" is not set in your headers')
 
-    if access_token != project.auth_token.key:
+    if not token_belongs_to_project(access_token, project.id):
         raise serializers.ValidationError(f"Inavlid token for project {project.id}")
 
 
@@ -44,7 +45,7 @@ class GitlabMergeRequestReportSerializer(serializers.Serializer):
         # Find nemo project that belong to this request
         project_access_token = self.context["headers"].get(settings.PROJECT_TOKEN_HEADER)
 
-        if not Project.objects.filter(auth_token__key=project_access_token).exists():
+        if project_token_cache.get_project_id(project_access_token) is None:
             raise serializers.ValidationError('Project with this access token not found.')
 
         return attrs
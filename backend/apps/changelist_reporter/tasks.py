@@ -1,16 +1,29 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 import dateutil
 from rest_framework import serializers
 from celery.utils.log import get_task_logger
-from requests.exceptions import HTTPError
+from django.conf import settings
+from django.db.models import Q
+from requests.exceptions import RequestException
 from backend.celery import app
-from apps.devops_metrics.serializers import ChangeListSerializer
+from apps.devops_metrics.bulk_operations import bulk_upsert_changelists, get_existing_changelists_keys
+from apps.devops_metrics.serializers import ChangeListBulkItemSerializer, ChangeListSerializer
 from apps.changelist_reporter.constants import GITLAB_API_PAGINATION_PER_PAGE, GITLAB_BASE_URL
+from apps.changelist_reporter.merge_request_index import (
+    find_indexed_merge_request_of_commit,
+    index_merge_requests,
+    is_merge_request_of_commit)
 from apps.changelist_reporter.models import ChangeListReport
+from apps.dashboard.models import GitlabProject, Project
+from apps.utils.http_client import HttpClient
+from apps.utils.validation_utils import InconsistentDataError
 
 
 logger = get_task_logger(__name__)
 
+gitlab_http_client = HttpClient('gitlab')
+
 
 @app.task(name="Get changelists from gitlab and Report them to devopsmetrics")
 def get_gitlab_changelists_and_report_to_devopsmetrics(nemo_project_id,
@@ -18,14 +31,30 @@ def get_gitlab_changelists_and_report_to_devopsmetrics(nemo_project_id,
                                                        gitlab_project_default_branch,
                                                        gitlab_project_token,
                                                        gitlab_project_merge_request_merged_after=None):
+    """
+    Reports the merge requests merged into the default branch since the last sync (see `GitlabProject.merge_requests_synced_until`);
+     i.e. only the merge requests updated after the sync cursor (minus `GITLAB_MERGE_REQUESTS_SYNC_OVERLAP_MINUTES`) are
+     fetched, and then the cursor is advanced to the last one; but not past a merge request failed to be reported
+     unexpectedly (see `get_synced_merge_requests`).
+    """
+    gitlab_project = GitlabProject.objects.get(nemo_project_id=nemo_project_id)
+    sync_cursor = get_merge_requests_sync_cursor(gitlab_project)
+    updated_after = None
+    if sync_cursor is not None:
+        # The offset pages of the mutable update order may miss a merge request (shifted back to an already fetched
+        #  page) while it's updated; the reported ones are skipped cheaply on the overlap.
+        updated_after = sync_cursor[0] - timedelta(minutes=settings.GITLAB_MERGE_REQUESTS_SYNC_OVERLAP_MINUTES)
     try:
         all_merge_requests = get_all_merge_requests_from_gitlab(gitlab_project_id,
                                                                 gitlab_project_default_branch,
-                                                                gitlab_project_token)
-    except HTTPError as http_error:
+                                                                gitlab_project_token,
+                                                                updated_after=updated_after)
+    except RequestException as http_error:
         logger.exception(f'An error occured when trying to get merge requests from Gitlab', http_error)
         return
 
+    index_merge_requests(gitlab_project, all_merge_requests)
+
     change_list_reports = []
     for merge_request in all_merge_requests:
         change_list_reports.append(
@@ -41,9 +70,57 @@ def get_gitlab_changelists_and_report_to_devopsmetrics(nemo_project_id,
     )
     logger.debug(f"Details of project {nemo_project_id} reported changelists : {status_of_reported_change_lists_to_devopsmetrics}")
 
+    # The merge requests filtered out by the merge time aren't synced.
+    if gitlab_project_merge_request_merged_after is None:
+        synced_merge_requests = get_synced_merge_requests(all_merge_requests, change_list_reports)
+        if synced_merge_requests:
+            advance_merge_requests_sync_cursor(gitlab_project,
+                                               max(map(get_merge_request_sync_position, synced_merge_requests)))
+
     return f"{len(status_of_reported_change_lists_to_devopsmetrics)} changelists was reported to project {nemo_project_id}"
 
 
+def get_synced_merge_requests(merge_requests, change_list_reports):
+    """
+    Returns the merge requests before the first one (in the sync order) failed to be reported unexpectedly (i.e. without
+     validation details); the ones rejected by the validation (e.g. an invalid commit hash, or reported already) would
+     be rejected again, so they don't hold the cursor back.
+
+    Args:
+        change_list_reports: Of the merge requests, in the same order
+    """
+    failed_positions = [get_merge_request_sync_position(merge_request)
+                        for merge_request, change_list_report in zip(merge_requests, change_list_reports)
+                        if change_list_report.report["status"] != "SUCCESSFUL" and change_list_report.report["details"] is None]
+    if not failed_positions:
+        return merge_requests
+    first_failed_position = min(failed_positions)
+    return [merge_request for merge_request in merge_requests
+            if get_merge_request_sync_position(merge_request) < first_failed_position]
+
+
+def get_merge_request_sync_position(merge_request):
+    return dateutil.parser.parse(merge_request['updated_at']), merge_request['iid']
+
+
+def get_merge_requests_sync_cursor(gitlab_project):
+    """Returns the `(updated_at, iid)` of the last synced merge request of the project, or None if none is synced."""
+    if gitlab_project.merge_requests_synced_until is None:
+        return None
+    return gitlab_project.merge_requests_synced_until, gitlab_project.merge_requests_synced_iid
+
+
+def advance_merge_requests_sync_cursor(gitlab_project, sync_position):
+    """Moves the sync cursor of the project forward to the position; unless a concurrent sync has moved it further."""
+    synced_until, synced_iid = sync_position
+    GitlabProject.objects \
+        .filter(pk=gitlab_project.pk) \
+        .filter(Q(merge_requests_synced_until__isnull=True)
+                | Q(merge_requests_synced_until__lt=synced_until)
+                | Q(merge_requests_synced_until=synced_until, merge_requests_synced_iid__lt=synced_iid)) \
+        .update(merge_requests_synced_until=synced_until, merge_requests_synced_iid=synced_iid)
+
+
 def filter_change_list_reports_merged_after_specific_time(change_list_reports_to_filter, specific_time):
     filtered_change_list_reports = []
     for change_list_report in change_list_reports_to_filter:
@@ -53,6 +130,64 @@ def filter_change_list_reports_merged_after_specific_time(change_list_reports_to
 
 
 def report_to_devopsmetrics(nemo_project_id, change_lists):
+    """
+    Saves the change lists which don't exist in the project (by their commit hash or change list id) with a bulk insert,
+     and sets the report (status and details) of each one as `ChangeListSerializer.validate_and_save` would.
+    """
+    project = Project.objects.get(pk=nemo_project_id)
+    existing_changelists = get_existing_changelists_keys(project,
+                                                         [change_list.commit_sha for change_list in change_lists],
+                                                         [change_list.id for change_list in change_lists])
+    existing_commit_hashes = {commit_hash for commit_hash, _ in existing_changelists}
+    existing_change_list_ids = {change_list_id for _, change_list_id in existing_changelists}
+
+    new_change_lists = []
+    new_rows = []
+    for change_list in change_lists:
+        data = {
+            'title': change_list.title,
+            'change_list_id': change_list.id,
+            'commit_hash': change_list.commit_sha,
+            "time": change_list.merge_time,
+        }
+        change_list.report = {
+            "status": "FAILED",
+            "details": None
+        }
+        serializer = ChangeListBulkItemSerializer(data=data)
+        if not serializer.is_valid():
+            change_list.report["details"] = serializers.ValidationError(serializer.errors).detail
+            continue
+        row = serializer.validated_data
+        if row['change_list_id'] in existing_change_list_ids:
+            change_list.report["details"] = serializers.ValidationError(
+                {"change_list_id": ['This id already exists in this project.']}).detail
+            continue
+        if row['commit_hash'] in existing_commit_hashes:
+            change_list.report["details"] = serializers.ValidationError(
+                {"commit_hash": ['This commit hash already exists in this project.']}).detail
+            continue
+        # The later duplicates of the change lists fail as the existing ones.
+        existing_change_list_ids.add(row['change_list_id'])
+        existing_commit_hashes.add(row['commit_hash'])
+        new_change_lists.append(change_list)
+        new_rows.append(row)
+
+    if not new_rows:
+        return change_lists
+    try:
+        bulk_upsert_changelists(project, new_rows)
+    except InconsistentDataError:
+        # Some of them are saved concurrently; so they are saved one by one.
+        _report_each_to_devopsmetrics(nemo_project_id, new_change_lists)
+    else:
+        for change_list in new_change_lists:
+            change_list.report["status"] = "SUCCESSFUL"
+
+    return change_lists
+
+
+def _report_each_to_devopsmetrics(nemo_project_id, change_lists):
     for change_list in change_lists:
         data = {
             'title': change_list.title,
@@ -83,8 +218,6 @@ def report_to_devopsmetrics(nemo_project_id, change_lists):
             "details": saving_details
         }
 
-    return change_lists
-
 
 @app.task(name="Handle gitlab merge request report")
 def add_gitlab_merge_request_report(nemo_project_id,
@@ -92,24 +225,34 @@ def add_gitlab_merge_request_report(nemo_project_id,
                                     gitlab_project_id,
                                     gitlab_project_default_branch,
                                     gitlab_merge_request_commit_hash):
-    try:
-        all_merge_requests = get_all_merge_requests_from_gitlab(gitlab_project_id,
-                                                                gitlab_project_default_branch,
-                                                                gitlab_project_token)
-    except HTTPError as http_error:
-        logger.exception(f'An error occured when trying to get merge requests from Gitlab, ', http_error)
-        return
+    """
+    Reports the merge request of the commit; which is looked up in the merge requests indexed by the sync, or else is
+     fetched from the merge requests of the commit in Gitlab (and is indexed).
+    """
+    gitlab_project = GitlabProject.objects.get(nemo_project_id=nemo_project_id)
+    indexed_merge_request = find_indexed_merge_request_of_commit(gitlab_project, gitlab_merge_request_commit_hash)
+    if indexed_merge_request is not None:
+        merge_request_of_specified_commit_hash = indexed_merge_request.to_gitlab_merge_request_json()
+    else:
+        try:
+            merge_requests = get_merge_requests_of_commit_from_gitlab(gitlab_project_id,
+                                                                      gitlab_project_token,
+                                                                      gitlab_merge_request_commit_hash)
+        except RequestException as http_error:
+            logger.exception(f'An error occured when trying to get merge requests from Gitlab, ', http_error)
+            return
 
-    for merge_request in all_merge_requests:
-        if merge_request.get('merge_commit_sha') == gitlab_merge_request_commit_hash or \
-           merge_request.get('squash_commit_sha') == gitlab_merge_request_commit_hash or \
-           merge_request.get('sha') == gitlab_merge_request_commit_hash:
+        for merge_request in merge_requests:
+            if merge_request.get('state') == 'merged' and \
+               merge_request.get('target_branch') == gitlab_project_default_branch and \
+               is_merge_request_of_commit(merge_request, gitlab_merge_request_commit_hash):
 
-            merge_request_of_specified_commit_hash = merge_request
-            break
-    else:
-        return f"Merge request related to {gitlab_merge_request_commit_hash}" \
-               f"for project {nemo_project_id} not found."
+                merge_request_of_specified_commit_hash = merge_request
+                break
+        else:
+            return f"Merge request related to {gitlab_merge_request_commit_hash}" \
+                   f"for project {nemo_project_id} not found."
+        index_merge_requests(gitlab_project, [merge_request_of_specified_commit_hash])
 
     change_list = ChangeListReport.from_gitlab_merge_request_json(merge_request_of_specified_commit_hash)
 
@@ -118,30 +261,76 @@ def add_gitlab_merge_request_report(nemo_project_id,
     return f"Changelist {change_list.id} of project {nemo_project_id} was reported to DevOpsMetrics"
 
 
+def get_merge_requests_of_commit_from_gitlab(gitlab_project_id,
+                                             gitlab_project_token,
+                                             commit_hash):
+    """
+    Returns:
+        List of Gitlab merge request(json) which the commit is a part of (or was created by)
+    Raises:
+        requests.exceptions.RequestException: if the HTTP request failed or returned an unsuccessful status code.
+    """
+    gitlab_api_commit_merge_requests_url = \
+        f"{GITLAB_BASE_URL}/api/v4/projects/{gitlab_project_id}/repository/commits/{commit_hash}/merge_requests"
+    response = gitlab_http_client.get(gitlab_api_commit_merge_requests_url,
+                                      headers={"PRIVATE-TOKEN": gitlab_project_token})
+    response.raise_for_status()
+    return response.json()
+
+
 def get_all_merge_requests_from_gitlab(gitlab_project_id,
                                        gitlab_project_default_branch,
-                                       gitlab_project_token):
+                                       gitlab_project_token,
+                                       updated_after=None):
     """
+    Args:
+        updated_after: If given, only the merge requests updated at or after it are returned.
+    The pages after the first one are fetched concurrently, by `GITLAB_PAGINATION_MAX_WORKERS` threads.
+
     Returns:
-        List of Gitlab merge request(json)
+        List of Gitlab merge request(json), in the order of update time
     Raises:
-        requests.exceptions.HTTPError: if the HTTP request returned an unsuccessful status code.
+        requests.exceptions.RequestException: if the HTTP request failed or returned an unsuccessful status code.
     """
-    merge_requests = []
-    next_page = 1
-    while next_page:
-        gitlab_api_merge_requests_url = f"{GITLAB_BASE_URL}/api/v4/projects/{gitlab_project_id}/merge_requests"
-        response = requests.get(gitlab_api_merge_requests_url,
-                                params={
-                                    "target_branch": gitlab_project_default_branch,
-                                    "state": "merged",
-                                    "scope": "all",
-                                    "per_page": GITLAB_API_PAGINATION_PER_PAGE,
-                                    "page": next_page
-                                },
-                                headers={"PRIVATE-TOKEN": gitlab_project_token})
+    params = {
+        "target_branch": gitlab_project_default_branch,
+        "state": "merged",
+        "scope": "all",
+        "order_by": "updated_at",
+        "sort": "asc",
+        "per_page": GITLAB_API_PAGINATION_PER_PAGE,
+    }
+    if updated_after is not None:
+        params["updated_after"] = updated_after.isoformat()
+    gitlab_api_merge_requests_url = f"{GITLAB_BASE_URL}/api/v4/projects/{gitlab_project_id}/merge_requests"
+
+    def get_page(page):
+        response = gitlab_http_client.get(gitlab_api_merge_requests_url,
+                                          params={**params, "page": page},
+                                          headers={"PRIVATE-TOKEN": gitlab_project_token})
         response.raise_for_status()
-        merge_requests += response.json()
-        next_page = response.headers.get('X-Next-Page')
+        return response
+
+    first_page_response = get_page(1)
+    merge_requests = first_page_response.json()
+    total_pages = first_page_response.headers.get('X-Total-Pages')
+    if total_pages:
+        with ThreadPoolExecutor(max_workers=settings.GITLAB_PAGINATION_MAX_WORKERS) as executor:
+            page_futures = [executor.submit(get_page, page) for page in range(2, int(total_pages) + 1)]
+            try:
+                # In the order of the pages
+                for page_future in page_futures:
+                    merge_requests += page_future.result().json()
+            except Exception:
+                for page_future in page_futures:
+                    page_future.cancel()
+                raise
+    else:
+        # GitLab omits the total pages of more than 10,000 merge requests.
+        next_page = first_page_response.headers.get('X-Next-Page')
+        while next_page:
+            response = get_page(next_page)
+            merge_requests += response.json()
+            next_page = response.headers.get('X-Next-Page')
 
     return merge_requests
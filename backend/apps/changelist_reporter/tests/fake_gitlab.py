@@ -0,0 +1,158 @@
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import dateutil.parser
+import mock
+import pytz
+from django.test import TestCase
+
+from apps.dashboard.tests.utils import setup_basic_environment
+from apps.devops_metrics.models import ChangeList
+
+GITLAB_PROJECT_ID = 42
+GITLAB_TOKEN = 'gitlab-token'
+
+_MERGE_REQUESTS_PATH_PATTERN = re.compile(r'^/api/v4/projects/(?P<project_id>\d+)/merge_requests$')
+_COMMIT_MERGE_REQUESTS_PATH_PATTERN = re.compile(
+    r'^/api/v4/projects/(?P<project_id>\d+)/repository/commits/(?P<commit_hash>\w+)/merge_requests$')
+
+
+class FakeGitlabServer:
+    """
+    A local HTTP server with the merge requests API of GitLab (the parts used by the changelist reporter), which keeps
+     the received requests.
+    """
+
+    def __init__(self, token: str) -> None:
+        self.token = token
+        # GitLab project ID -> merge requests
+        self.merge_requests: Dict[int, List[dict]] = {}
+        self.requests: List[dict] = []
+        # As GitLab does for more than 10,000 results
+        self.omits_total_pages = False
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._create_handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def add_merge_request(self, project_id: int, iid: int, updated_at: datetime, target_branch: str = 'master',
+                          state: str = 'merged', merged_at: Optional[datetime] = None) -> dict:
+        merge_request = {
+            'iid': iid,
+            'title': f'Merge request #{iid}',
+            'state': state,
+            'target_branch': target_branch,
+            'sha': f'{iid:040x}',
+            'merge_commit_sha': f'{iid + 1000:040x}',
+            'squash_commit_sha': None,
+            'merged_at': (merged_at or updated_at - timedelta(minutes=1)).isoformat(),
+            'updated_at': updated_at.isoformat(),
+        }
+        self.merge_requests.setdefault(project_id, []).append(merge_request)
+        return merge_request
+
+    def _list_merge_requests(self, project_id: int, params: Dict[str, str]) -> List[dict]:
+        merge_requests = self.merge_requests.get(project_id, [])
+        if 'target_branch' in params:
+            merge_requests = [mr for mr in merge_requests if mr['target_branch'] == params['target_branch']]
+        if 'state' in params:
+            merge_requests = [mr for mr in merge_requests if mr['state'] == params['state']]
+        if 'updated_after' in params:
+            updated_after = dateutil.parser.parse(params['updated_after'])
+            merge_requests = [mr for mr in merge_requests if dateutil.parser.parse(mr['updated_at']) >= updated_after]
+        order_by = params.get('order_by', 'created_at')
+        order_key = (lambda mr: dateutil.parser.parse(mr['updated_at'])) if order_by == 'updated_at' else (lambda mr: mr['iid'])
+        return sorted(merge_requests, key=order_key, reverse=params.get('sort', 'desc') == 'desc')
+
+    def _list_merge_requests_of_commit(self, project_id: int, commit_hash: str) -> List[dict]:
+        return [mr for mr in self.merge_requests.get(project_id, [])
+                if commit_hash in (mr['sha'], mr['merge_commit_sha'], mr['squash_commit_sha'])]
+
+    def _create_handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                server.requests.append({'path': url.path, 'params': params})
+                if self.headers.get('PRIVATE-TOKEN') != server.token:
+                    self._send_json(401, {'message': '401 Unauthorized'})
+                    return
+                match = _COMMIT_MERGE_REQUESTS_PATH_PATTERN.match(url.path)
+                if match is not None:
+                    self._send_json(200, server._list_merge_requests_of_commit(int(match['project_id']), match['commit_hash']))
+                    return
+                match = _MERGE_REQUESTS_PATH_PATTERN.match(url.path)
+                if match is None:
+                    self._send_json(404, {'message': '404 Not Found'})
+                    return
+                merge_requests = server._list_merge_requests(int(match['project_id']), params)
+                page = int(params.get('page', 1))
+                per_page = int(params.get('per_page', 20))
+                total_pages = max(1, -(-len(merge_requests) // per_page))
+                headers = {
+                    'X-Page': str(page),
+                    'X-Per-Page': str(per_page),
+                    'X-Next-Page': str(page + 1) if page < total_pages else '',
+                    'X-Total': str(len(merge_requests)),
+                }
+                if not server.omits_total_pages:
+                    headers['X-Total-Pages'] = str(total_pages)
+                self._send_json(200, merge_requests[(page - 1) * per_page:page * per_page], headers)
+
+            def _send_json(self, status, data, headers=None):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def get_time(day: int, hour: int = 0) -> datetime:
+    return datetime(2020, 1, day, hour, tzinfo=pytz.UTC)
+
+
+class FakeGitlabTestCase(TestCase):
+    """Runs a `FakeGitlabServer` for the GitLab project of a project, as the GitLab of the changelist reporter."""
+
+    def setUp(self) -> None:
+        self.project = setup_basic_environment().project
+        self.gitlab_project = self.project.version_control
+        self.gitlab_project.project_id = GITLAB_PROJECT_ID
+        self.gitlab_project.default_branch = 'master'
+        self.gitlab_project.token = GITLAB_TOKEN
+        self.gitlab_project.save()
+        self.gitlab = FakeGitlabServer(token=GITLAB_TOKEN)
+        self.gitlab.start()
+        self.addCleanup(self.gitlab.stop)
+        for patcher in [mock.patch('apps.changelist_reporter.tasks.GITLAB_BASE_URL', self.gitlab.base_url),
+                        mock.patch('apps.changelist_reporter.tasks.GITLAB_API_PAGINATION_PER_PAGE', 2)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_reported_change_list_ids(self):
+        return set(ChangeList.objects.filter(project=self.project).values_list('change_list_id', flat=True))
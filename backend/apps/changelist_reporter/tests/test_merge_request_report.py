@@ -0,0 +1,41 @@
+from apps.changelist_reporter.merge_request_index import index_merge_requests
+from apps.changelist_reporter.models import GitlabMergeRequest
+from apps.changelist_reporter.tasks import add_gitlab_merge_request_report
+from apps.changelist_reporter.tests.fake_gitlab import GITLAB_PROJECT_ID, GITLAB_TOKEN, FakeGitlabTestCase, get_time
+
+
+class MergeRequestReportTest(FakeGitlabTestCase):
+    def _report(self, commit_hash: str) -> None:
+        self.gitlab.requests.clear()
+        add_gitlab_merge_request_report(
+            nemo_project_id=self.project.id,
+            gitlab_project_token=GITLAB_TOKEN,
+            gitlab_project_id=GITLAB_PROJECT_ID,
+            gitlab_project_default_branch='master',
+            gitlab_merge_request_commit_hash=commit_hash,
+        )
+
+    def test_indexed_merge_request_should_be_reported_without_calling_gitlab(self):
+        merge_requests = [self.gitlab.add_merge_request(GITLAB_PROJECT_ID, iid, updated_at=get_time(iid)) for iid in range(1, 4)]
+        index_merge_requests(self.gitlab_project, merge_requests)
+        for iid, commit_hash_field in [(1, 'sha'), (2, 'merge_commit_sha')]:
+            self._report(merge_requests[iid - 1][commit_hash_field])
+            self.assertEqual(self.gitlab.requests, [])
+        self.assertEqual(self.get_reported_change_list_ids(), {'1', '2'})
+
+    def test_not_indexed_merge_request_should_be_fetched_by_commit(self):
+        merge_request = self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 1, updated_at=get_time(1))
+        merge_request['squash_commit_sha'] = 'a' * 40
+
+        self._report('a' * 40)
+
+        self.assertEqual(self.get_reported_change_list_ids(), {'1'})
+        self.assertEqual([request['path'] for request in self.gitlab.requests],
+                         [f'/api/v4/projects/{GITLAB_PROJECT_ID}/repository/commits/{"a" * 40}/merge_requests'])
+        self.assertEqual(GitlabMergeRequest.objects.get().squash_commit_sha, 'a' * 40)
+
+    def test_merge_request_of_other_branch_should_not_be_reported(self):
+        merge_request = self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 1, updated_at=get_time(1), target_branch='other')
+        self._report(merge_request['sha'])
+        self.assertEqual(self.get_reported_change_list_ids(), set())
+        self.assertFalse(GitlabMergeRequest.objects.exists())
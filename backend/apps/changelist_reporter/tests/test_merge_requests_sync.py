@@ -0,0 +1,140 @@
+from datetime import timedelta
+
+import mock
+from django.conf import settings
+
+from apps.changelist_reporter.models import GitlabMergeRequest
+from apps.changelist_reporter.tasks import get_all_merge_requests_from_gitlab, get_gitlab_changelists_and_report_to_devopsmetrics
+from apps.changelist_reporter.tests.fake_gitlab import GITLAB_PROJECT_ID, GITLAB_TOKEN, FakeGitlabTestCase, get_time
+from apps.dashboard.models import GitlabProject
+from apps.devops_metrics.serializers import ChangeListSerializer
+from apps.utils.validation_utils import InconsistentDataError
+
+
+class MergeRequestsSyncTest(FakeGitlabTestCase):
+    def _sync(self, merged_after=None) -> None:
+        self.gitlab.requests.clear()
+        get_gitlab_changelists_and_report_to_devopsmetrics(
+            nemo_project_id=self.project.id,
+            gitlab_project_id=GITLAB_PROJECT_ID,
+            gitlab_project_default_branch='master',
+            gitlab_project_token=GITLAB_TOKEN,
+            gitlab_project_merge_request_merged_after=merged_after,
+        )
+
+    def _get_sync_cursor(self):
+        gitlab_project = GitlabProject.objects.get(pk=self.gitlab_project.pk)
+        return gitlab_project.merge_requests_synced_until, gitlab_project.merge_requests_synced_iid
+
+    def test_first_sync_should_report_all_merged_merge_requests(self):
+        for iid in range(1, 6):
+            self.gitlab.add_merge_request(GITLAB_PROJECT_ID, iid, updated_at=get_time(iid))
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 6, updated_at=get_time(6), state='opened')
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 7, updated_at=get_time(7), target_branch='other')
+
+        self._sync()
+
+        self.assertEqual(self.get_reported_change_list_ids(), {'1', '2', '3', '4', '5'})
+        self.assertEqual(self._get_sync_cursor(), (get_time(5), 5))
+        self.assertEqual(set(GitlabMergeRequest.objects.values_list('iid', flat=True)), {1, 2, 3, 4, 5})
+        self.assertEqual(len(self.gitlab.requests), 3)
+        self.assertTrue(all(request['params']['order_by'] == 'updated_at' for request in self.gitlab.requests))
+        self.assertTrue(all('updated_after' not in request['params'] for request in self.gitlab.requests))
+
+    def test_next_sync_should_fetch_only_merge_requests_updated_after_cursor(self):
+        for iid in range(1, 6):
+            self.gitlab.add_merge_request(GITLAB_PROJECT_ID, iid, updated_at=get_time(iid))
+        self._sync()
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 6, updated_at=get_time(5))
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 7, updated_at=get_time(8))
+
+        self._sync()
+
+        self.assertEqual(self.get_reported_change_list_ids(), {'1', '2', '3', '4', '5', '6', '7'})
+        self.assertEqual(self._get_sync_cursor(), (get_time(8), 7))
+        self.assertEqual(len(self.gitlab.requests), 2)
+        self.assertEqual(self.gitlab.requests[0]['params']['updated_after'],
+                         (get_time(5) - timedelta(minutes=settings.GITLAB_MERGE_REQUESTS_SYNC_OVERLAP_MINUTES)).isoformat())
+
+    def test_merge_request_missed_before_cursor_should_be_reported_on_overlap(self):
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 1, updated_at=get_time(1, 12))
+        self._sync()
+        # E.g. shifted to an already fetched page of the previous sync
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 2, updated_at=get_time(1, 12) - timedelta(minutes=1))
+
+        self._sync()
+
+        self.assertEqual(self.get_reported_change_list_ids(), {'1', '2'})
+        self.assertEqual(self._get_sync_cursor(), (get_time(1, 12), 1))
+
+    def test_cursor_should_not_pass_merge_request_failed_to_be_reported(self):
+        for iid in range(1, 4):
+            self.gitlab.add_merge_request(GITLAB_PROJECT_ID, iid, updated_at=get_time(iid))
+        validate_and_save = ChangeListSerializer.validate_and_save
+
+        def fail_second_merge_request(data, **kwargs):
+            if data['change_list_id'] == '2':
+                raise ValueError("E.g. a database error")
+            return validate_and_save(data=data, **kwargs)
+        with mock.patch('apps.changelist_reporter.tasks.bulk_upsert_changelists', side_effect=InconsistentDataError("")), \
+                mock.patch.object(ChangeListSerializer, 'validate_and_save', side_effect=fail_second_merge_request):
+            self._sync()
+
+        self.assertEqual(self.get_reported_change_list_ids(), {'1', '3'})
+        self.assertEqual(self._get_sync_cursor(), (get_time(1), 1))
+
+        self._sync()
+        self.assertEqual(self.get_reported_change_list_ids(), {'1', '2', '3'})
+        self.assertEqual(self._get_sync_cursor(), (get_time(3), 3))
+
+    def test_cursor_should_pass_merge_request_rejected_by_validation(self):
+        for iid in range(1, 4):
+            self.gitlab.add_merge_request(GITLAB_PROJECT_ID, iid, updated_at=get_time(iid))
+        self.gitlab.merge_requests[GITLAB_PROJECT_ID][1]['merge_commit_sha'] = 'invalid'
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 3, updated_at=get_time(4))['merge_commit_sha'] = f'{2000:040x}'
+
+        self._sync()
+
+        self.assertEqual(self.get_reported_change_list_ids(), {'1', '3'})
+        self.assertEqual(self._get_sync_cursor(), (get_time(4), 3))
+
+    def test_sync_without_new_merge_requests_should_keep_cursor(self):
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 1, updated_at=get_time(1))
+        self._sync()
+        self._sync()
+        self.assertEqual(self._get_sync_cursor(), (get_time(1), 1))
+        self.assertEqual(self.get_reported_change_list_ids(), {'1'})
+
+    def test_sync_of_merged_after_should_not_advance_cursor(self):
+        for iid in range(1, 4):
+            self.gitlab.add_merge_request(GITLAB_PROJECT_ID, iid, updated_at=get_time(iid))
+        self._sync(merged_after=get_time(1, 12).isoformat())
+        self.assertEqual(self.get_reported_change_list_ids(), {'2', '3'})
+        self.assertEqual(self._get_sync_cursor(), (None, None))
+
+        self._sync()
+        self.assertEqual(self.get_reported_change_list_ids(), {'1', '2', '3'})
+
+    def test_changing_gitlab_project_should_reset_cursor(self):
+        self.gitlab.add_merge_request(GITLAB_PROJECT_ID, 1, updated_at=get_time(1))
+        self._sync()
+        gitlab_project = GitlabProject.objects.get(pk=self.gitlab_project.pk)
+        gitlab_project.default_branch = 'main'
+        gitlab_project.save()
+        self.assertEqual(self._get_sync_cursor(), (None, None))
+        self.assertFalse(GitlabMergeRequest.objects.exists())
+
+    def test_all_pages_should_be_fetched_in_order(self):
+        for iid in range(1, 10):
+            self.gitlab.add_merge_request(GITLAB_PROJECT_ID, iid, updated_at=get_time(iid))
+        merge_requests = get_all_merge_requests_from_gitlab(GITLAB_PROJECT_ID, 'master', GITLAB_TOKEN)
+        self.assertEqual([merge_request['iid'] for merge_request in merge_requests], list(range(1, 10)))
+        self.assertEqual(sorted(int(request['params']['page']) for request in self.gitlab.requests), list(range(1, 6)))
+
+    def test_pages_should_be_followed_without_total_pages(self):
+        self.gitlab.omits_total_pages = True
+        for iid in range(1, 6):
+            self.gitlab.add_merge_request(GITLAB_PROJECT_ID, iid, updated_at=get_time(iid))
+        merge_requests = get_all_merge_requests_from_gitlab(GITLAB_PROJECT_ID, 'master', GITLAB_TOKEN)
+        self.assertEqual([merge_request['iid'] for merge_request in merge_requests], list(range(1, 6)))
+        self.assertEqual([request['params']['page'] for request in self.gitlab.requests], ['1', '2', '3'])
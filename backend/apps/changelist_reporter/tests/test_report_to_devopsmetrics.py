@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.changelist_reporter.models import ChangeListReport
+from apps.changelist_reporter.tasks import report_to_devopsmetrics
+from apps.changelist_reporter.tests.fake_gitlab import get_time
+from apps.dashboard.tests.utils import setup_basic_environment
+from apps.devops_metrics.models import ChangeList
+
+
+def _get_change_list_report(iid: int, commit_hash: str = None) -> ChangeListReport:
+    return ChangeListReport(str(iid), f'Merge request #{iid}', commit_hash or f'{iid:040x}', get_time(1, iid % 24))
+
+
+class ReportToDevopsMetricsTest(TestCase):
+    def setUp(self) -> None:
+        self.project = setup_basic_environment().project
+
+    def _get_reports(self, change_lists):
+        return [(change_list.id, change_list.report['status'], change_list.report['details']) for change_list in change_lists]
+
+    def test_new_change_lists_should_be_saved(self):
+        change_lists = report_to_devopsmetrics(self.project.id, [_get_change_list_report(iid) for iid in range(1, 4)])
+        self.assertEqual(self._get_reports(change_lists), [(str(iid), 'SUCCESSFUL', None) for iid in range(1, 4)])
+        self.assertEqual(set(ChangeList.objects.filter(project=self.project).values_list('change_list_id', 'commit_hash')),
+                         {(str(iid), f'{iid:040x}') for iid in range(1, 4)})
+
+    def test_existing_and_invalid_change_lists_should_fail(self):
+        report_to_devopsmetrics(self.project.id, [_get_change_list_report(1), _get_change_list_report(2)])
+
+        change_lists = report_to_devopsmetrics(self.project.id, [
+            _get_change_list_report(1),
+            _get_change_list_report(3, commit_hash=f'{2:040x}'),
+            _get_change_list_report(4, commit_hash='not-a-hash'),
+            _get_change_list_report(5),
+            _get_change_list_report(5, commit_hash=f'{6:040x}'),
+        ])
+
+        reports = self._get_reports(change_lists)
+        self.assertEqual(reports[0][1:], ('FAILED', {'change_list_id': ['This id already exists in this project.']}))
+        self.assertEqual(reports[1][1:], ('FAILED', {'commit_hash': ['This commit hash already exists in this project.']}))
+        self.assertEqual(reports[2][1], 'FAILED')
+        self.assertIn('commit_hash', reports[2][2])
+        self.assertEqual(reports[3][1:], ('SUCCESSFUL', None))
+        self.assertEqual(reports[4][1:], ('FAILED', {'change_list_id': ['This id already exists in this project.']}))
+        self.assertEqual(set(ChangeList.objects.filter(project=self.project).values_list('change_list_id', flat=True)),
+                         {'1', '2', '5'})
+
+    def test_queries_should_not_grow_with_change_lists(self):
+        report_to_devopsmetrics(self.project.id, [_get_change_list_report(iid) for iid in range(1, 11)])
+        with CaptureQueriesContext(connection) as queries:
+            report_to_devopsmetrics(self.project.id, [_get_change_list_report(iid) for iid in range(1, 51)])
+        self.assertLessEqual(len(queries), 10)
+        self.assertEqual(ChangeList.objects.filter(project=self.project).count(), 50)
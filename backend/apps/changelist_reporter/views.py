@@ -9,6 +9,7 @@ from apps.changelist_reporter.serializers import GitlabDevopsmetricsReporterSeri
 from apps.changelist_reporter.tasks import \
     get_gitlab_changelists_and_report_to_devopsmetrics, add_gitlab_merge_request_report
 from apps.dashboard.models import Project
+from apps.dashboard.project_token_cache import project_token_cache
 
 
 @permission_classes((AllowAny,))
@@ -51,7 +52,8 @@ class GitlabMergeRequestReport(ViewSet):
         nemo_project_access_token = request.headers.get(settings.PROJECT_TOKEN_HEADER)
         merge_request_commit_hash = serializer.validated_data.get('commit_hash')
 
-        nemo_project = Project.objects.get(auth_token__key=nemo_project_access_token)
+        nemo_project = Project.objects.select_related('version_control').get(
+            pk=project_token_cache.get_project_id(nemo_project_access_token))
 
         add_gitlab_merge_request_report.delay(
             nemo_project_id=nemo_project.id,
@@ -1,7 +1,6 @@
 import json
 import logging
 from typing import List, Optional
-import requests
 from requests import codes
 from requests.exceptions import HTTPError
 from django.conf import settings
@@ -15,9 +14,12 @@ from apps.dashboard.models.dory import MaturityItemDoryResult
 from apps.utils.url import get_authorized_url
 from apps.dashboard.data_collectors.base import DataCollector
 from apps.dashboard.data_collectors.registry import register
+from apps.utils.http_client import HttpClient
 
 logger = logging.getLogger(__name__)
 
+dory_http_client = HttpClient('dory')
+
 
 @register()
 class DoryEvaluationCollector(DataCollector):
@@ -84,7 +86,7 @@ class DoryEvaluationCollector(DataCollector):
         Returns:
             str: Dory evaluation ID
         """
-        response = requests.post(
+        response = dory_http_client.post(
             self.get_evaluations_url(),
             json={
                 "repository_url": get_authorized_url(git_repo.git_http_url, git_repo.username, git_repo.password),
@@ -110,7 +112,7 @@ class DoryEvaluationCollector(DataCollector):
         Returns:
             List[MaturityItemDoryResult]: Full item results
         """
-        response = requests.get(self.get_evaluations_url(dory_evaluation_submission_id))
+        response = dory_http_client.get(self.get_evaluations_url(dory_evaluation_submission_id))
         if response.status_code == codes.ok:
             response_json = json.loads(response.text)
             dory_evaluation_run_error = response_json['run_error']
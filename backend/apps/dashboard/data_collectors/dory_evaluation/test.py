@@ -4,7 +4,7 @@ from typing import List
 import mock
 from django.test import TestCase
 from rest_framework import status
-from apps.dashboard.data_collectors.dory_evaluation import DoryEvaluationCollector
+from apps.dashboard.data_collectors.dory_evaluation import DoryEvaluationCollector, dory_http_client
 from apps.dashboard.tests.utils import setup_basic_environment
 from apps.dashboard.models import (
     EvaluationType,
@@ -23,12 +23,12 @@ class DorySubmissionMock:
         self.run_error = run_error
 
     def __enter__(self):
-        self._request_get_patch = mock.patch('requests.get')
+        self._request_get_patch = mock.patch.object(dory_http_client, 'get')
         mock_get = self._request_get_patch.__enter__()
         mock_get.return_value.text = self._get_get_response_text()
         mock_get.return_value.status_code = status.HTTP_200_OK
 
-        self._request_post_patch = mock.patch('requests.post')
+        self._request_post_patch = mock.patch.object(dory_http_client, 'post')
         mock_post = self._request_post_patch.__enter__()
         mock_post.return_value.text = self._get_post_response_text()
         mock_post.return_value.status_code = status.HTTP_202_ACCEPTED
@@ -1,14 +1,15 @@
-from typing import Iterable
+from typing import Iterable, List
 from celery.utils.log import get_task_logger
 from rest_framework import serializers
-from apps.devops_metrics.serializers import ChangeListSerializer
-from apps.utils import exception_utils
+from apps.devops_metrics.bulk_operations import bulk_upsert_changelists, get_existing_changelists_keys
+from apps.devops_metrics.serializers import ChangeListBulkItemSerializer
 from apps.utils.git_miner import GitCommandException, GitMinerFactory, Commit
 from apps.devops_metrics.models import ChangeList
 from apps.dashboard.models import GitRepo
 from apps.dashboard.data_collectors.base import DataCollector
 from apps.dashboard.data_collectors.registry import register
 from apps.utils.trace_utils import ElapsedTimeTracer
+from apps.utils.validation_utils import InconsistentDataError
 
 logger = get_task_logger(__name__)
 elapsed_time_tracer = ElapsedTimeTracer(logger)
@@ -37,21 +38,49 @@ Commit Body:
                 self.save_new_changelists_of_repo(git_repo)
             except GitCommandException as e:
                 logger.exception(e)
-            except serializers.ValidationError:
+            except (serializers.ValidationError, InconsistentDataError):
                 logger.exception(f'Failed to validate and save project ({git_repo.nemo_project}) changelists.')
 
     def save_new_changelists_of_repo(self, git_repo: GitRepo):
         elapsed_time_tracer.reset(f"Started collecting new changelists ... (GitRepo ID: {git_repo.pk})")
         new_changelists = self.get_new_changelists(git_repo)
         elapsed_time_tracer.log("New Nemo changelists created.")
-        for cl in new_changelists:
-            try:
-                ChangeListSerializer.validate_and_save(instance=cl,
-                                                       context={'project_id': cl.project_id})
-            except Exception as e:
-                if not exception_utils.is_exception_about_unique_constraint(e):
-                    raise e
+        changelists_serializer = ChangeListBulkItemSerializer(
+            data=ChangeListBulkItemSerializer(self._without_repeated_changelist_ids(new_changelists), many=True).data,
+            many=True,
+        )
+        changelists_serializer.is_valid(raise_exception=True)
+        rows = changelists_serializer.validated_data
+        existing_changelists = get_existing_changelists_keys(git_repo.nemo_project,
+                                                             [row['commit_hash'] for row in rows],
+                                                             [row['change_list_id'] for row in rows])
+        existing_commit_hashes = {commit_hash for commit_hash, _ in existing_changelists}
+        existing_change_list_ids = {change_list_id for _, change_list_id in existing_changelists}
+        # The rows clashing with an existing changelist are skipped, so that the next ones are saved still.
+        new_rows = []
+        clashing_rows = []
+        for row in rows:
+            if row['commit_hash'] not in existing_commit_hashes and row['change_list_id'] not in existing_change_list_ids:
+                new_rows.append(row)
+            elif (row['commit_hash'], row['change_list_id']) not in existing_changelists:
+                clashing_rows.append(row)
+        bulk_upsert_changelists(git_repo.nemo_project, new_rows)
         elapsed_time_tracer.log("New changelists saved.")
+        if clashing_rows:
+            raise InconsistentDataError(
+                "Couldn't save the changelists with the commit hash or the change list id of another changelist: "
+                + ", ".join(f"(commit_hash={row['commit_hash']}, change_list_id={row['change_list_id']})" for row in clashing_rows))
+
+    @staticmethod
+    def _without_repeated_changelist_ids(changelists: List[ChangeList]) -> List[ChangeList]:
+        """A Change-Id may be used by more than one commit (e.g. a reverted change merged again); the first one is kept."""
+        seen_changelist_ids = set()
+        unique_changelists = []
+        for cl in changelists:
+            if cl.change_list_id not in seen_changelist_ids:
+                seen_changelist_ids.add(cl.change_list_id)
+                unique_changelists.append(cl)
+        return unique_changelists
 
     def get_new_changelists(self, git_repo: GitRepo):
         # TODO: Find the latest changelist based on the previous data collection, instead of depending on the id.
@@ -130,3 +130,14 @@ class GerritChangeListCollectorTest(TestCase):
         self._gerrit_commit(change_id="1")
         with self.assertRaises(InconsistentDataError):
             self.changelist_collector.save_new_changelists_of_repo(self.nemo_git_repo)
+
+    def test_changelists_after_a_reused_change_id_should_be_saved(self):
+        self._gerrit_commit('1', change_id="1")
+        self.changelist_collector.save_new_changelists_of_repo(self.nemo_git_repo)
+        self._gerrit_commit('2', change_id="1")
+        self._gerrit_commit('3', change_id="3")
+        with self.assertRaises(InconsistentDataError):
+            self.changelist_collector.save_new_changelists_of_repo(self.nemo_git_repo)
+        self._gerrit_commit('4', change_id="4")
+        self.changelist_collector.save_new_changelists_of_repo(self.nemo_git_repo)
+        self.assertEqual(list(ChangeList.objects.order_by('id').values_list('title', flat=True)), ['1', '3', '4'])
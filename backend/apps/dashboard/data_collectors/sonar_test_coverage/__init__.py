@@ -3,7 +3,6 @@ import logging
 from itertools import groupby
 from typing import Tuple, Union
 from abc import abstractmethod, ABC
-import requests
 from requests.auth import HTTPBasicAuth
 from rest_framework import serializers
 from apps.dashboard.models import (
@@ -13,9 +12,12 @@ from apps.dashboard.models import (
 from apps.dashboard.serializers import CoverageReportSerializer
 from apps.dashboard.data_collectors.base import DataCollector
 from apps.dashboard.data_collectors.registry import register
+from apps.utils.http_client import HttpClient
 
 logger = logging.getLogger(__name__)
 
+sonar_http_client = HttpClient('sonar')
+
 
 class SonarTestCoverageCollectorBase(DataCollector, ABC):
     MAX_ATTEMPTS_TO_GET_COVERAGE = 3
@@ -85,7 +87,7 @@ class SonarTestCoverageCollectorBase(DataCollector, ABC):
                 'branch': sonar_project.coverage_branch,
             }
             auth = SonarTestCoverageCollectorBase.get_auth(sonar_project)
-            response = requests.get(
+            response = sonar_http_client.get(
                 url=url,
                 params=params,
                 auth=auth,
@@ -103,9 +105,9 @@ class SonarTestCoverageCollectorBase(DataCollector, ABC):
             'branch': sonar_project.coverage_branch,
         }
         auth = SonarTestCoverageCollectorBase.get_auth(sonar_project)
-        response = requests.get(url=url,
-                                params=params,
-                                auth=auth)
+        response = sonar_http_client.get(url=url,
+                                         params=params,
+                                         auth=auth)
         return response
 
     def collect_and_save_data(self):
@@ -1,12 +1,17 @@
+import bisect
+import functools
+import itertools
 import logging
+import math
 from abc import ABC, abstractmethod
-from datetime import date, datetime, time, timedelta
-from typing import Dict, List, Tuple, TypeVar, Generic
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar, Generic
 from django.conf import settings
 
 import pytz
 from apps.devops_metrics.serializers import MetricDataPointSerializer
 
+from apps.dashboard.metrics import instrumentation
 from apps.utils import general_utils
 
 
@@ -15,11 +20,83 @@ logger = logging.getLogger(__name__)
 TMetric = TypeVar('TMetric')
 
 
+class SlidingTimeWindows:
+    """
+    Locates the rows of consecutive sliding windows `[t - window_length, t)` in a list of time-sorted rows.
+
+    Window boundaries are found by binary search, which is done in C and never visits the rows one by one;
+     so walking all the windows costs O(timestamps * log(rows)) instead of O(rows * timestamps).
+    A `window_length` of None means the windows are not bounded from the start.
+    """
+
+    def __init__(self, sorted_times: Sequence[datetime], window_length: Optional[timedelta]):
+        self.sorted_times = sorted_times
+        self.window_length = window_length
+
+    def iterate(
+            self,
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> Iterator[Tuple[datetime, int, int]]:
+        """
+        Yields `(timestamp, start, end)` for each of the consecutive timestamps;
+         the rows in the window of `timestamp` are `rows[start:end]`.
+        """
+        assert step_length >= timedelta(0), f"Expected a non-negative step_length but got: {step_length}"
+        start = 0
+        end = 0
+        for i in range(num_timestamps):
+            timestamp = first_timestamp + i * step_length
+            # Both boundaries only move forward; so the previous ones bound the search.
+            end = bisect.bisect_left(self.sorted_times, timestamp, lo=end)
+            if self.window_length is not None:
+                start = bisect.bisect_left(self.sorted_times, timestamp - self.window_length, lo=start, hi=end)
+            yield timestamp, start, end
+
+
+def prefix_sums(values: Iterable) -> List:
+    """Returns `p` with `p[i] == sum(values[:i])`; so the sum of `values[start:end]` is `p[end] - p[start]`."""
+    return list(itertools.accumulate(values, initial=0))
+
+
+def get_day_start(day: date) -> datetime:
+    """Returns the timestamp that daily graphs consider as the start of the given day."""
+    local_timezone = pytz.timezone(settings.TIME_ZONE)
+    return general_utils.convert_date_to_datetime(day, time.min.replace(tzinfo=local_timezone))
+
+
+def get_day(timestamp: datetime) -> date:
+    """Returns the day that the given timestamp belongs to, with regard to `get_day_start`."""
+    day_start_timezone = timezone(get_day_start(timestamp.date()).utcoffset())
+    return timestamp.astimezone(day_start_timezone).date()
+
+
+def unzip_columns(rows: Sequence[Tuple], columns_count: int) -> Tuple[Tuple, ...]:
+    """Transposes rows (e.g. the result of a `values_list`) to a tuple of columns; empty rows give empty columns."""
+    return tuple(zip(*rows)) or ((),) * columns_count
+
+
+def _measured(compute_for_consecutive_timestamps):
+    @functools.wraps(compute_for_consecutive_timestamps)
+    def wrapper(self, first_timestamp: datetime, num_timestamps: int, step_length: timedelta):
+        with instrumentation.measure_metric_computation(type(self).__name__, num_timestamps):
+            return compute_for_consecutive_timestamps(self, first_timestamp, num_timestamps, step_length)
+    return wrapper
+
+
 class ConsecutiveTimestampsMetricComputerMixin(ABC, Generic[TMetric]):
     DEFAULT_CONSECUTIVE_TIMESTAMPS_DIFFERENCE = timedelta(days=1)
 
     _DEFAULT_COMPUTE_OPERATIONS_THRESHOLD = 100_000_000
 
+    def __init_subclass__(cls, **kwargs):
+        # Every implementation of the computation exports its measurements (see `instrumentation`).
+        super().__init_subclass__(**kwargs)
+        compute = cls.__dict__.get('compute_for_consecutive_timestamps')
+        if compute is not None and not getattr(compute, '__isabstractmethod__', False):
+            cls.compute_for_consecutive_timestamps = _measured(compute)
+
     def compute_for_single_timestamp(self, timestamp: datetime) -> TMetric:
         data_list = self.compute_for_consecutive_timestamps(
             first_timestamp=timestamp,
@@ -42,23 +119,53 @@ class ConsecutiveTimestampsMetricComputerMixin(ABC, Generic[TMetric]):
         pass
 
     def get_daily_graph_data_serialized(self, period_start_date: date, period_end_date: date) -> List[Dict]:
-        local_timezone = pytz.timezone(settings.TIME_ZONE)
-        period_days = (period_end_date - period_start_date).days + 1
-        first_dt_next_day_at_00 = general_utils.convert_date_to_datetime(period_start_date + timedelta(days=1),
-                                                                         time.min.replace(tzinfo=local_timezone))
-        daily_metrics = self.compute_for_consecutive_timestamps(
-            first_timestamp=first_dt_next_day_at_00,
-            num_timestamps=period_days,
+        return self.get_graph_data_serialized(
+            period_start_date,
+            period_end_date,
             step_length=ConsecutiveTimestampsMetricComputerMixin.DEFAULT_CONSECUTIVE_TIMESTAMPS_DIFFERENCE,
         )
-        daily_metrics_one_day_offset = []
-        for date, value in daily_metrics:
-            daily_metrics_one_day_offset += [(date - timedelta(days=1), value)]
-        return MetricDataPointSerializer(daily_metrics_one_day_offset, many=True).data
+
+    def get_graph_data_serialized(
+            self,
+            period_start_date: date,
+            period_end_date: date,
+            step_length: timedelta,
+            max_data_points: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Returns a data point per `step_length` of the period, dated at the start of the step;
+         each one is the value of the metric at the end of its step (e.g. the end of the day for daily graphs), or at
+         the end of the period for the last step, if it's cut by it.
+
+        If the period has more than `max_data_points` steps, the steps get longer (by a whole factor) to keep the
+         number of the computed windows bounded.
+        """
+        period_start = get_day_start(period_start_date)
+        period_end = get_day_start(period_end_date + timedelta(days=1))
+        data_points_count = math.ceil((period_end - period_start) / step_length)
+        if max_data_points is not None and data_points_count > max_data_points:
+            step_length *= math.ceil(data_points_count / max_data_points)
+            data_points_count = math.ceil((period_end - period_start) / step_length)
+        # The period may not be a whole number of steps; then the last step is cut by the end of the period.
+        whole_steps_count = data_points_count
+        if period_start + data_points_count * step_length > period_end:
+            whole_steps_count -= 1
+        metrics_of_steps = []
+        if whole_steps_count > 0:
+            metrics = self.compute_for_consecutive_timestamps(
+                first_timestamp=period_start + step_length,
+                num_timestamps=whole_steps_count,
+                step_length=step_length,
+            )
+            metrics_of_steps += [(timestamp - step_length, value) for timestamp, value in metrics]
+        if whole_steps_count < data_points_count:
+            metrics_of_steps.append((period_start + whole_steps_count * step_length, self.compute_for_single_timestamp(period_end)))
+        return MetricDataPointSerializer(metrics_of_steps, many=True).data
 
     def _warn_about_performance_if_operations_count_is_too_large(self, operations_count: int, compute_operations_thresholds: int = None) -> None:
         if compute_operations_thresholds is None:
             compute_operations_thresholds = ConsecutiveTimestampsMetricComputerMixin._DEFAULT_COMPUTE_OPERATIONS_THRESHOLD
+        instrumentation.record_operations_estimate(operations_count)
         if operations_count > compute_operations_thresholds:
             # TODO: switch to warning log when issue #11714 is done.
             logger.error(f"""\
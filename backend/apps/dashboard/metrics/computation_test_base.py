@@ -59,7 +59,7 @@ computed={computed}
     ):
         step_length = coalesce(step_length, ConsecutiveTimestampsMetricComputerMixin.DEFAULT_CONSECUTIVE_TIMESTAMPS_DIFFERENCE)
         num_timestamps = len(expected_values)
-        expected = [(first_timestamp+timedelta(days=i), v) for i, v in enumerate(expected_values)]
+        expected = [(first_timestamp + i * step_length, v) for i, v in enumerate(expected_values)]
         c = self.get_computer(*computer_init_args, **computer_init_kwargs,)
         computed = c.compute_for_consecutive_timestamps(
             first_timestamp=first_timestamp,
@@ -1,13 +1,13 @@
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, List
+from typing import Callable, Optional, Tuple, List
 from abc import abstractmethod
 from statistics import mean
 
 from django.db import models
 
 from apps.dashboard.models import Project, CoverageReport
-from apps.dashboard.metrics.computation_base import ConsecutiveTimestampsMetricComputerMixin
+from apps.dashboard.metrics.computation_base import ConsecutiveTimestampsMetricComputerMixin, SlidingTimeWindows, prefix_sums
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +26,13 @@ class CoverageMetricComputerBase(ConsecutiveTimestampsMetricComputerMixin[float]
     def compute_for_reports(self, coverage_reports) -> Optional[float]:
         pass
 
+    def get_window_computer(self, coverage_reports) -> Callable[[int, int], Optional[float]]:
+        """
+        Returns a function that computes the metric for `coverage_reports[start:end]`.
+        Subclasses can override it to answer each window without visiting all of its reports.
+        """
+        return lambda start, end: self.compute_for_reports(coverage_reports[start:end])
+
     def _get_queryset_for_interval(self, first_timestamp: datetime, last_timestamp: datetime):
         qs = (
             CoverageReport.objects
@@ -51,16 +58,12 @@ class CoverageMetricComputerBase(ConsecutiveTimestampsMetricComputerMixin[float]
         last_timestamp = first_timestamp + (num_timestamps-1) * step_length
         qs = self._get_queryset_for_interval(first_timestamp, last_timestamp)
         coverage_reports = list(qs)
-        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps * len(coverage_reports))
+        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps + len(coverage_reports))
+        windows = SlidingTimeWindows([r.last_update_time for r in coverage_reports], self.checking_period)
+        compute_for_window = self.get_window_computer(coverage_reports)
         data_points: List[Tuple[datetime, Optional[float]]] = []
-        for i in range(num_timestamps):
-            current_timestamp = first_timestamp + timedelta(days=i)
-            if self.checking_period is None:
-                current_coverage_reports = [r for r in coverage_reports if r.last_update_time < current_timestamp]
-            else:
-                checking_start_timestamp = current_timestamp - self.checking_period
-                current_coverage_reports = [r for r in coverage_reports if checking_start_timestamp <= r.last_update_time < current_timestamp]
-            data_points.append((current_timestamp, self.compute_for_reports(current_coverage_reports)))
+        for current_timestamp, start, end in windows.iterate(first_timestamp, num_timestamps, step_length):
+            data_points.append((current_timestamp, compute_for_window(start, end)))
         return data_points
 
 
@@ -74,6 +77,10 @@ class OverallCoverageComputer(CoverageMetricComputerBase):
     def compute_for_reports(self, coverage_reports) -> Optional[float]:
         return coverage_reports[-1].value if coverage_reports else None
 
+    # Override
+    def get_window_computer(self, coverage_reports) -> Callable[[int, int], Optional[float]]:
+        return lambda start, end: coverage_reports[end - 1].value if end > start else None
+
     # Override
     # This is overrided with an implementation with much higher performance
     #  since it is called frequently for the first page.
@@ -93,6 +100,11 @@ class IncrementalCoverageComputer(CoverageMetricComputerBase):
     def compute_for_reports(self, coverage_reports) -> Optional[float]:
         return mean(r.value for r in coverage_reports) if coverage_reports else None
 
+    # Override
+    def get_window_computer(self, coverage_reports) -> Callable[[int, int], Optional[float]]:
+        value_sums = prefix_sums(r.value for r in coverage_reports)
+        return lambda start, end: (value_sums[end] - value_sums[start]) / (end - start) if end > start else None
+
     # Override
     # This is overrided with an implementation with much higher performance
     #  since it is called frequently for the first page.
@@ -0,0 +1,108 @@
+import logging
+import uuid
+from datetime import date, timedelta
+from typing import Callable, Optional, Sequence, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TGraphData = TypeVar('TGraphData')
+
+
+def get_environment_scope(environment_id: int) -> str:
+    """Scope of the graphs computed from the deployments and the service status reports of an environment."""
+    return f"environment:{environment_id}"
+
+
+def get_project_changelists_scope(project_id: int) -> str:
+    """Scope of the graphs computed from the changelists of a project."""
+    return f"project-changelists:{project_id}"
+
+
+def get_project_coverage_scope(project_id: int) -> str:
+    """Scope of the graphs computed from the coverage reports of a project."""
+    return f"project-coverage:{project_id}"
+
+
+class MetricGraphCache:
+    """
+    Caches the serialized data of metric graphs, with invalidation by scope.
+
+    Each scope (e.g. an environment) has a version, which is a part of the keys of the graphs depending on it;
+     so invalidating a scope only replaces its version, and the stale graphs are never read again (and expire later).
+    Each day of a scope has a version too, for the graphs of the periods ending on it; so an event (e.g. a deployment)
+     only invalidates the graphs ending on or after its day, and the ones of the earlier periods stay cached.
+    Graphs of periods ended before today only change when their scopes are invalidated; so they are kept much longer.
+    """
+    KEYS_PREFIX = "MetricGraphCache:"
+    # Invalidating the graphs from an earlier day invalidates the whole scope instead (rather than a version per day).
+    MAX_INVALIDATED_DAYS = 31
+
+    def __init__(self, cache_name: str = settings.CACHE_NAME_METRIC_GRAPHS) -> None:
+        self.cache = caches[cache_name]
+
+    def get_or_compute(
+            self,
+            scopes: Sequence[str],
+            key_parts: Sequence,
+            period_end_date: date,
+            compute: Callable[[], TGraphData],
+    ) -> TGraphData:
+        versions = [version
+                    for scope in scopes
+                    for version in [self._get_version(scope),
+                                    self._get_version(scope, min(period_end_date, self._get_last_versioned_day()))]]
+        key = self.KEYS_PREFIX + ":".join(map(str, [*scopes, *versions, *key_parts]))
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        data = compute()
+        if period_end_date < timezone.now().date():
+            timeout = settings.METRIC_GRAPHS_OF_PAST_DAYS_CACHE_TIMEOUT
+        else:
+            timeout = settings.METRIC_GRAPHS_CACHE_TIMEOUT
+        self.cache.set(key, data, timeout=timeout)
+        return data
+
+    def invalidate(self, scope: str, first_day: Optional[date] = None) -> None:
+        """Invalidates the graphs of the scope ending on or after the day (e.g. of a saved event), or all of them."""
+        last_day = self._get_last_versioned_day()
+        if first_day is None or (last_day - first_day).days > self.MAX_INVALIDATED_DAYS:
+            self.cache.set(self._get_version_key(scope), uuid.uuid4().hex, timeout=None)
+            return
+        first_day = min(first_day, last_day)
+        days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+        # The versions of the days expire with the graphs; a missing one is just replaced (see `_get_version`).
+        self.cache.set_many({self._get_version_key(scope, day): uuid.uuid4().hex for day in days},
+                            timeout=settings.METRIC_GRAPHS_OF_PAST_DAYS_CACHE_TIMEOUT)
+
+    def invalidate_now_and_on_commit(self, scope: str, first_day: Optional[date] = None) -> None:
+        """
+        Invalidates the scope (see `invalidate`) both now and after the current transaction (if any) commits;
+         so the graphs computed (and cached) from the data before the commit are not read afterwards.
+        """
+        self.invalidate(scope, first_day)
+        transaction.on_commit(lambda: self.invalidate(scope, first_day))
+
+    @staticmethod
+    def _get_last_versioned_day() -> date:
+        """
+        The periods ending after it share the version of this day; it is a day after today, as the dates of the periods
+         may be in another timezone.
+        """
+        return timezone.localdate() + timedelta(days=1)
+
+    def _get_version(self, scope: str, day: Optional[date] = None) -> str:
+        version_key = self._get_version_key(scope, day)
+        timeout = None if day is None else settings.METRIC_GRAPHS_OF_PAST_DAYS_CACHE_TIMEOUT
+        self.cache.add(version_key, uuid.uuid4().hex, timeout=timeout)
+        return self.cache.get(version_key)
+
+    def _get_version_key(self, scope: str, day: Optional[date] = None) -> str:
+        if day is None:
+            return f"{self.KEYS_PREFIX}version:{scope}"
+        return f"{self.KEYS_PREFIX}version:{scope}:{day.isoformat()}"
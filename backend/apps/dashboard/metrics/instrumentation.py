@@ -0,0 +1,115 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from django.db import connection
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import Histogram
+
+ENDPOINT_NONE = "none"
+
+_COUNT_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000, float('inf'))
+_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+_LABELS = ['computer', 'endpoint']
+
+rows_loaded = Histogram(
+    'nemo_metric_computer_rows_loaded',
+    "Number of rows fetched from the database by a metric computation.",
+    _LABELS, namespace=NAMESPACE, buckets=_COUNT_BUCKETS,
+)
+timestamps_computed = Histogram(
+    'nemo_metric_computer_timestamps_computed',
+    "Number of timestamps computed by a metric computation.",
+    _LABELS, namespace=NAMESPACE, buckets=_COUNT_BUCKETS,
+)
+operations_estimate = Histogram(
+    'nemo_metric_computer_operations_estimate',
+    "Operations count estimated by a metric computation (the one checked against the performance threshold).",
+    _LABELS, namespace=NAMESPACE, buckets=_COUNT_BUCKETS,
+)
+query_seconds = Histogram(
+    'nemo_metric_computer_query_seconds',
+    "Time spent in the database queries of a metric computation.",
+    _LABELS, namespace=NAMESPACE, buckets=_SECONDS_BUCKETS,
+)
+compute_seconds = Histogram(
+    'nemo_metric_computer_compute_seconds',
+    "Time spent in a metric computation, excluding its database queries.",
+    _LABELS, namespace=NAMESPACE, buckets=_SECONDS_BUCKETS,
+)
+
+_current_endpoint: ContextVar[str] = ContextVar('metric_computation_endpoint', default=ENDPOINT_NONE)
+
+
+class MetricComputation:
+    """Measurements of a single (outermost) metric computation."""
+
+    def __init__(self):
+        self.rows_loaded = 0
+        self.query_seconds = 0.0
+        self.operations_estimate: Optional[int] = None
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_seconds += time.perf_counter() - start
+            rowcount = context['cursor'].rowcount
+            if not many and rowcount is not None and rowcount > 0:
+                self.rows_loaded += rowcount
+
+
+_current_computation: ContextVar[Optional[MetricComputation]] = ContextVar('metric_computation', default=None)
+
+
+@contextmanager
+def measure_metric_computation(computer_name: str, num_timestamps: int) -> Iterator[None]:
+    """
+    Exports the measurements of the computation in the context, labelled by the computer and the current endpoint.
+    Nested computations (e.g. the fallback of a computer to its parent class) are measured as a part of the outermost one.
+    """
+    if _current_computation.get() is not None:
+        yield
+        return
+    computation = MetricComputation()
+    token = _current_computation.set(computation)
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(computation.execute_wrapper):
+            yield
+    finally:
+        total_seconds = time.perf_counter() - start
+        _current_computation.reset(token)
+        labels = {'computer': computer_name, 'endpoint': _current_endpoint.get()}
+        rows_loaded.labels(**labels).observe(computation.rows_loaded)
+        timestamps_computed.labels(**labels).observe(num_timestamps)
+        if computation.operations_estimate is not None:
+            operations_estimate.labels(**labels).observe(computation.operations_estimate)
+        query_seconds.labels(**labels).observe(computation.query_seconds)
+        compute_seconds.labels(**labels).observe(max(total_seconds - computation.query_seconds, 0))
+
+
+def record_operations_estimate(operations_count: int) -> None:
+    computation = _current_computation.get()
+    if computation is not None:
+        computation.operations_estimate = operations_count
+
+
+class MetricComputationEndpointMiddleware:
+    """Labels the metric computations of each request by the name of its URL pattern."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_endpoint.set(ENDPOINT_NONE)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_endpoint.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        url_name = request.resolver_match.url_name if request.resolver_match is not None else None
+        _current_endpoint.set(url_name or ENDPOINT_NONE)
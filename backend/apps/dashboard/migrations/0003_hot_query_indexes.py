@@ -0,0 +1,21 @@
+# Generated by Django 2.2.27 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_quality_committee_group'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coveragereport',
+            index=models.Index(fields=['project', 'coverage_type', 'last_update_time'], name='coverage_report_type_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluationreport',
+            index=models.Index(fields=['project', 'maturity_model_item', '-latest_evaluation_time', '-creation_time'], name='evaluation_report_latest_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.27 on 2026-10-18 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gitlabproject',
+            name='merge_requests_synced_iid',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='gitlabproject',
+            name='merge_requests_synced_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -61,6 +61,9 @@ class CoverageReport(ExportModelOperationsMixin('CoverageReport'), SealableModel
                 name='unique_project_and_coverage_type_and_version'
             ),
         ]
+        indexes = [
+            models.Index(fields=['project', 'coverage_type', 'last_update_time'], name='coverage_report_type_time_idx'),
+        ]
         ordering = (
             '-last_update_time',
             '-creation_time',
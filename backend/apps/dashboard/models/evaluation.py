@@ -140,6 +140,11 @@ class EvaluationReport(ExportModelOperationsMixin('EvaluationReport'), SealableM
                 name="evaluation_report_last_update_time_gte_creation_time",
             ),
         ]
+        indexes = [
+            # Of `LatestEvaluationReportFinder`
+            models.Index(fields=['project', 'maturity_model_item', '-latest_evaluation_time', '-creation_time'],
+                         name='evaluation_report_latest_idx'),
+        ]
 
     @staticmethod
     def is_in_validity_period(evaluation_report: EvaluationReport, maturity_model_item: MaturityModelItem, current_time: datetime):
@@ -98,6 +98,28 @@ class GitlabProject(models.Model):
         max_length=DEFAULT_BRANCH_MAX_LENGTH,
         blank=True,
     )
+    # The cursor of syncing the merged merge requests: the `updated_at` and `iid` of the last synced one
+    merge_requests_synced_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    merge_requests_synced_iid = models.IntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
+
+    tracker = FieldTracker(fields=['project_id', 'default_branch'])
+
+    def save(self, *args, **kwargs):
+        if self.tracker.has_changed('project_id') or self.tracker.has_changed('default_branch'):
+            # The merge requests of another project (or branch) are synced (and indexed) from the start.
+            self.merge_requests_synced_until = None
+            self.merge_requests_synced_iid = None
+            if self.pk is not None:
+                self.merge_requests.all().delete()
+        super().save(*args, **kwargs)
 
 
 class SonarProject(models.Model):
@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+
+from apps.dashboard.models import ProjectAPIToken
+
+
+class ProjectTokenCache:
+    """
+    In-process LRU cache of the project IDs of the API tokens (the absent tokens too), with a TTL.
+
+    A saved or deleted token is invalidated by the signals in this process only; so other processes may accept
+     a revoked token (or reject a new one) for at most `PROJECT_TOKEN_CACHE_TTL_SECONDS`.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # Token -> (project ID or None, expiration time)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_project_id(self, token: Optional[str]) -> Optional[int]:
+        """Returns the ID of the project of the token, or None if there is no such token."""
+        if not token:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(token)
+                return entry[0]
+        project_id = (ProjectAPIToken.objects
+                      .filter(key=token)
+                      .values_list('project_id', flat=True)
+                      .first())
+        with self._lock:
+            self._entries[token] = (project_id, now + self.ttl_seconds)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return project_id
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+project_token_cache = ProjectTokenCache(
+    max_size=settings.PROJECT_TOKEN_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PROJECT_TOKEN_CACHE_TTL_SECONDS,
+)
+
+
+def token_belongs_to_project(token: Optional[str], project_id: int) -> bool:
+    return token is not None and project_token_cache.get_project_id(token) == project_id
@@ -370,6 +370,15 @@ class CoverageReportSerializer(serializers.ModelSerializer, SerializerValidateAn
         return attrs
 
 
+class CoverageReportBulkItemSerializer(serializers.ModelSerializer):
+    """A coverage report written in a batch; its version uniqueness is checked together with the other ones of the batch."""
+
+    class Meta:
+        model = CoverageReport
+        fields = ['value', 'coverage_type', 'creation_time', 'version']
+        validators = []
+
+
 class MaturityModelItemToggleRequestSerializer(serializers.ModelSerializer):
     project = serializers.PrimaryKeyRelatedField(read_only=True)
     applicant = serializers.PrimaryKeyRelatedField(read_only=True)
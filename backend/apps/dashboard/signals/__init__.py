@@ -4,3 +4,4 @@ from apps.dashboard.signals.request_profile import *
 from apps.dashboard.signals.user import *
 from apps.dashboard.signals.project import *
 from apps.dashboard.signals.user_object_permission import *
+from apps.dashboard.signals.coverage_report import *
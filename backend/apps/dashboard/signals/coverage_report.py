@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.dashboard.models import CoverageReport
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_project_coverage_scope
+
+
+@receiver([post_save, post_delete], sender=CoverageReport)
+def invalidate_coverage_graphs_of_project(instance, *args, **kwargs):
+    MetricGraphCache().invalidate_now_and_on_commit(get_project_coverage_scope(instance.project_id))
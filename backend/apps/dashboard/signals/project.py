@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from apps.dashboard.models import Project, ProjectAPIToken, GitlabProject
+from apps.dashboard.project_token_cache import project_token_cache
 from apps.dashboard.groups_and_permissions_handler import (
     create_project_groups_and_assign_permissions,
     delete_project_groups,
@@ -30,6 +31,12 @@ def create_token(sender, instance, created, **kwargs):
         ProjectAPIToken.objects.create(project=instance)
 
 
+@receiver(post_save, sender=ProjectAPIToken)
+@receiver(post_delete, sender=ProjectAPIToken)
+def invalidate_cached_project_token(instance, **kwargs):
+    project_token_cache.invalidate(instance.key)
+
+
 @receiver(post_save, sender=Project)
 def create_version_control_settings_after_project_created(instance, created, **kwargs):
     if created:
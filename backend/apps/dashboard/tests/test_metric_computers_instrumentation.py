@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+
+from apps.dashboard.metrics.instrumentation import ENDPOINT_NONE
+from apps.dashboard.tests.utils import setup_basic_environment
+from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer
+from apps.devops_metrics.models import ChangeList, Deployment
+
+
+class MetricComputersInstrumentationTest(APITestCase):
+    def setUp(self) -> None:
+        self.env = setup_basic_environment()
+        caches[settings.CACHE_NAME_METRIC_GRAPHS].clear()
+        now = timezone.now()
+        changelist = ChangeList.objects.create(project=self.env.project, change_list_id='1', commit_hash='1' * 40,
+                                               time=now - timedelta(days=2))
+        for status in [Deployment.STATUS_PASS, Deployment.STATUS_FAIL, Deployment.STATUS_PASS]:
+            Deployment.objects.create(environment=self.env.environment, change_list=changelist, status=status,
+                                      time=now - timedelta(days=1))
+
+    @staticmethod
+    def _get_sample_value(name: str, computer: str, endpoint: str) -> float:
+        return REGISTRY.get_sample_value(name, {'computer': computer, 'endpoint': endpoint}) or 0
+
+    def test_computation_should_be_measured(self):
+        labels = {'computer': ChangeFailureRateComputer.__name__, 'endpoint': ENDPOINT_NONE}
+        computations_count = self._get_sample_value('nemo_metric_computer_timestamps_computed_count', **labels)
+        timestamps_count = self._get_sample_value('nemo_metric_computer_timestamps_computed_sum', **labels)
+        rows_count = self._get_sample_value('nemo_metric_computer_rows_loaded_sum', **labels)
+
+        ChangeFailureRateComputer(self.env.environment, timedelta(days=7)).compute_for_consecutive_timestamps(
+            first_timestamp=timezone.now(), num_timestamps=5, step_length=timedelta(days=1))
+
+        self.assertEqual(self._get_sample_value('nemo_metric_computer_timestamps_computed_count', **labels), computations_count + 1)
+        self.assertEqual(self._get_sample_value('nemo_metric_computer_timestamps_computed_sum', **labels), timestamps_count + 5)
+        self.assertEqual(self._get_sample_value('nemo_metric_computer_rows_loaded_sum', **labels), rows_count + 3)
+        self.assertGreater(self._get_sample_value('nemo_metric_computer_query_seconds_count', **labels), 0)
+
+    def test_computations_of_requests_should_be_labelled_by_endpoint(self):
+        labels = {'computer': ChangeFailureRateComputer.__name__, 'endpoint': 'project-environments-daily-change-failure-rate'}
+        computations_count = self._get_sample_value('nemo_metric_computer_compute_seconds_count', **labels)
+        url = f'/v1/devops-metrics/project/{self.env.project.pk}/environment/{self.env.environment.pk}/metric/change-failure-rate/'
+        response = self.client.get(url, **{'HTTP_NEMO_PROJECT_TOKEN': self.env.project.auth_token.key})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._get_sample_value('nemo_metric_computer_compute_seconds_count', **labels), computations_count + 1)
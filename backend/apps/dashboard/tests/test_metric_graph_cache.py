@@ -0,0 +1,70 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from apps.dashboard.metrics.graph_cache import MetricGraphCache
+
+
+@override_settings(CACHES={
+    settings.CACHE_NAME_METRIC_GRAPHS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class MetricGraphCacheTest(SimpleTestCase):
+    def setUp(self) -> None:
+        caches[settings.CACHE_NAME_METRIC_GRAPHS].clear()
+        self.graph_cache = MetricGraphCache()
+        self.today = timezone.now().date()
+
+    def _get_or_compute(self, scopes, compute, period_end_date=None):
+        return self.graph_cache.get_or_compute(
+            scopes=scopes,
+            key_parts=["graph", 7, self.today],
+            period_end_date=period_end_date or self.today,
+            compute=compute,
+        )
+
+    def test_graph_should_be_computed_once(self):
+        compute = mock.Mock(return_value=[1, 2])
+        self.assertEqual(self._get_or_compute(["a"], compute), [1, 2])
+        self.assertEqual(self._get_or_compute(["a"], compute), [1, 2])
+        compute.assert_called_once()
+
+    def test_graph_should_be_recomputed_only_when_one_of_its_scopes_is_invalidated(self):
+        compute = mock.Mock(return_value=[1, 2])
+        self._get_or_compute(["a", "b"], compute)
+        self.graph_cache.invalidate("c")
+        self._get_or_compute(["a", "b"], compute)
+        self.assertEqual(compute.call_count, 1)
+        self.graph_cache.invalidate("b")
+        self._get_or_compute(["a", "b"], compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_graphs_of_past_periods_should_be_kept_longer(self):
+        with mock.patch.object(self.graph_cache.cache, 'set', wraps=self.graph_cache.cache.set) as cache_set:
+            self._get_or_compute(["a"], lambda: [1], period_end_date=self.today)
+            self._get_or_compute(["b"], lambda: [1], period_end_date=self.today - timedelta(days=1))
+        timeouts = [c.kwargs['timeout'] for c in cache_set.call_args_list if c.args[1] == [1]]
+        self.assertEqual(timeouts, [settings.METRIC_GRAPHS_CACHE_TIMEOUT, settings.METRIC_GRAPHS_OF_PAST_DAYS_CACHE_TIMEOUT])
+
+    def test_invalidating_from_a_day_should_keep_only_the_graphs_of_earlier_periods(self):
+        compute = mock.Mock(return_value=[1, 2])
+        yesterday, tomorrow = self.today - timedelta(days=1), self.today + timedelta(days=1)
+        for period_end_date in [yesterday, self.today, tomorrow + timedelta(days=30)]:
+            self._get_or_compute(["a"], compute, period_end_date=period_end_date)
+        self.graph_cache.invalidate("a", first_day=self.today)
+        self._get_or_compute(["a"], compute, period_end_date=yesterday)
+        self.assertEqual(compute.call_count, 3)
+        self._get_or_compute(["a"], compute, period_end_date=self.today)
+        self._get_or_compute(["a"], compute, period_end_date=tomorrow + timedelta(days=30))
+        self.assertEqual(compute.call_count, 5)
+
+    def test_invalidating_from_a_day_long_ago_should_invalidate_the_whole_scope(self):
+        compute = mock.Mock(return_value=[1, 2])
+        long_ago = self.today - timedelta(days=MetricGraphCache.MAX_INVALIDATED_DAYS + 1)
+        self._get_or_compute(["a"], compute, period_end_date=long_ago - timedelta(days=1))
+        self.graph_cache.invalidate("a", first_day=long_ago)
+        self._get_or_compute(["a"], compute, period_end_date=long_ago - timedelta(days=1))
+        self.assertEqual(compute.call_count, 2)
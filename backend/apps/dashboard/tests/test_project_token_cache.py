@@ -0,0 +1,44 @@
+import mock
+from django.test import TestCase
+
+from apps.dashboard.models import ProjectAPIToken
+from apps.dashboard.project_token_cache import ProjectTokenCache, project_token_cache
+from apps.dashboard.tests.utils import setup_basic_environment
+
+
+class ProjectTokenCacheTest(TestCase):
+    def setUp(self):
+        self.env = setup_basic_environment()
+        self.token = self.env.project.auth_token.key
+        self.cache = ProjectTokenCache(max_size=2, ttl_seconds=60)
+
+    def test_project_id_should_be_queried_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cache.get_project_id(self.token), self.env.project.id)
+            self.assertEqual(self.cache.get_project_id(self.token), self.env.project.id)
+
+    def test_absent_token_should_have_no_project(self):
+        self.assertIsNone(self.cache.get_project_id('absent'))
+        self.assertIsNone(self.cache.get_project_id(None))
+
+    def test_least_recently_used_token_should_be_evicted(self):
+        self.cache.get_project_id(self.token)
+        self.cache.get_project_id('absent-1')
+        self.cache.get_project_id(self.token)
+        self.cache.get_project_id('absent-2')
+        with self.assertNumQueries(0):
+            self.cache.get_project_id(self.token)
+        with self.assertNumQueries(1):
+            self.cache.get_project_id('absent-1')
+
+    def test_expired_token_should_be_queried_again(self):
+        with mock.patch('apps.dashboard.project_token_cache.time.monotonic', return_value=1000):
+            self.cache.get_project_id(self.token)
+        with mock.patch('apps.dashboard.project_token_cache.time.monotonic', return_value=1061):
+            with self.assertNumQueries(1):
+                self.cache.get_project_id(self.token)
+
+    def test_deleted_token_should_be_invalidated(self):
+        self.assertEqual(project_token_cache.get_project_id(self.token), self.env.project.id)
+        ProjectAPIToken.objects.get(key=self.token).delete()
+        self.assertIsNone(project_token_cache.get_project_id(self.token))
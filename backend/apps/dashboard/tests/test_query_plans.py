@@ -0,0 +1,157 @@
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.dashboard.metrics.coverage.computation import IncrementalCoverageComputer, OverallCoverageComputer
+from apps.dashboard.models import CoverageReport, Environment, EvaluationReport, EvaluationType, MaturityModelItem, Project
+from apps.dashboard.project_retrieve_utils import LatestEvaluationReportFinder
+from apps.dashboard.tests.utils import setup_basic_environment
+from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer, ChangeFailureRateSqlComputer
+from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer, DeploymentFrequencySqlComputer
+from apps.devops_metrics.lead_time.computation import LeadTimeComputer, LeadTimeSqlComputer
+from apps.devops_metrics.models import ChangeList, Deployment, ServiceStatusReport
+from apps.devops_metrics.multi_metric_computer import MultiMetricComputer, compute_metrics_of_environments
+from apps.devops_metrics.rollups import build_daily_environment_metric_rollups
+from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer, TimeToRestoreSqlComputer
+from apps.utils.query_plan_utils import analyze_tables, get_fully_scanned_tables
+
+_HOT_TABLES = {model._meta.db_table for model in [ChangeList, Deployment, ServiceStatusReport, EvaluationReport, CoverageReport]}
+
+
+class HotQueriesPlanTest(TestCase):
+    """
+    Checks that the queries of the metric computers and `LatestEvaluationReportFinder` don't scan the hot tables
+     fully; i.e. they keep using the indexes as the tables grow.
+    """
+    PROJECTS_COUNT = 50
+    ROWS_PER_PROJECT = 400
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        env = setup_basic_environment()
+        cls.now = timezone.now()
+        evaluation_type = EvaluationType.objects.create(kind=EvaluationType.KIND_MANUAL)
+        cls.maturity_model_items = [
+            MaturityModelItem.objects.create(code=f'{i:04}', name=f'Item {i}', evaluation_type=evaluation_type,
+                                             maturity_model_level=env.maturity_model_level)
+            for i in range(10)
+        ]
+        projects = [env.project] + [
+            Project.objects.create(name=f'Project #{i}', maturity_model=env.maturity_model, creator=env.user)
+            for i in range(2, cls.PROJECTS_COUNT + 1)
+        ]
+        environments = [env.environment] + [Environment.objects.create(project=p, name='Default') for p in projects[1:]]
+        changelists, service_status_reports, evaluation_reports, coverage_reports = [], [], [], []
+        for project, environment in zip(projects, environments):
+            for i in range(cls.ROWS_PER_PROJECT):
+                time = cls.now - timedelta(hours=i)
+                changelists.append(ChangeList(project=project, change_list_id=str(i), commit_hash=f'{project.id}-{i}', time=time))
+                service_status_reports.append(ServiceStatusReport(
+                    environment=environment, time=time,
+                    status=ServiceStatusReport.STATUS_UP if i % 3 else ServiceStatusReport.STATUS_DOWN))
+                evaluation_reports.append(EvaluationReport(
+                    project=project, maturity_model_item=cls.maturity_model_items[i % len(cls.maturity_model_items)],
+                    status=EvaluationReport.STATUS_PASS, creation_time=time, last_update_time=time, latest_evaluation_time=time))
+                coverage_reports.append(CoverageReport(
+                    project=project, value=i % 100, creation_time=time, last_update_time=time,
+                    coverage_type=CoverageReport.TYPE_OVERALL if i % 2 else CoverageReport.TYPE_INCREMENTAL))
+        changelists = ChangeList.objects.bulk_create(changelists)
+        environments_of_projects = {environment.project_id: environment for environment in environments}
+        Deployment.objects.bulk_create([
+            Deployment(environment=environments_of_projects[changelist.project_id], change_list=changelist,
+                       time=changelist.time + timedelta(minutes=30),
+                       status=Deployment.STATUS_PASS if i % 4 else Deployment.STATUS_FAIL)
+            for i, changelist in enumerate(changelists)
+        ])
+        ServiceStatusReport.objects.bulk_create(service_status_reports)
+        EvaluationReport.objects.bulk_create(evaluation_reports)
+        CoverageReport.objects.bulk_create(coverage_reports)
+        analyze_tables(sorted(_HOT_TABLES))
+        cls.user = env.user
+        cls.project = env.project
+        cls.environment = env.environment
+        cls.environments = environments
+
+    def _assert_no_full_scans_on_hot_tables(self, captured_queries) -> None:
+        self.assertTrue(captured_queries)
+        for query in captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertFalse(get_fully_scanned_tables(query['sql']) & _HOT_TABLES)
+
+    def test_full_scan_should_be_detected_for_queries_without_usable_index(self):
+        sql = f"SELECT id FROM {ServiceStatusReport._meta.db_table} WHERE status = '{ServiceStatusReport.STATUS_DOWN}'"
+        self.assertEqual(get_fully_scanned_tables(sql), {ServiceStatusReport._meta.db_table})
+
+    def test_queries_of_devops_metric_computers_should_not_scan_hot_tables_fully(self):
+        computer_classes = [
+            ChangeFailureRateComputer, ChangeFailureRateSqlComputer,
+            DeploymentFrequencyComputer, DeploymentFrequencySqlComputer,
+            LeadTimeComputer, LeadTimeSqlComputer,
+            TimeToRestoreComputer, TimeToRestoreSqlComputer,
+            MultiMetricComputer,
+        ]
+        for computer_cls in computer_classes:
+            with self.subTest(computer=computer_cls.__name__):
+                with CaptureQueriesContext(connection) as context:
+                    computer_cls(self.environment, timedelta(days=3)).compute_for_consecutive_timestamps(
+                        first_timestamp=self.now - timedelta(days=2, minutes=7), num_timestamps=10, step_length=timedelta(hours=3))
+                self._assert_no_full_scans_on_hot_tables(context.captured_queries)
+
+    def test_queries_of_metrics_of_environments_should_not_scan_hot_tables_fully(self):
+        with CaptureQueriesContext(connection) as context:
+            compute_metrics_of_environments(self.environments[:3], timedelta(days=3), self.now)
+        self._assert_no_full_scans_on_hot_tables(context.captured_queries)
+
+    def test_queries_of_rollups_building_should_not_scan_hot_tables_fully(self):
+        with CaptureQueriesContext(connection) as context:
+            build_daily_environment_metric_rollups(self.environment, (self.now - timedelta(days=2)).date(), self.now.date())
+        self._assert_no_full_scans_on_hot_tables(context.captured_queries)
+
+    def test_queries_of_coverage_computers_should_not_scan_hot_tables_fully(self):
+        for computer_cls in [OverallCoverageComputer, IncrementalCoverageComputer]:
+            with self.subTest(computer=computer_cls.__name__):
+                computer = computer_cls(self.project, timedelta(days=3))
+                with CaptureQueriesContext(connection) as context:
+                    computer.compute_for_single_timestamp(self.now)
+                    computer.compute_for_consecutive_timestamps(
+                        first_timestamp=self.now - timedelta(days=2), num_timestamps=10, step_length=timedelta(hours=3))
+                self._assert_no_full_scans_on_hot_tables(context.captured_queries)
+
+    def test_queries_of_latest_evaluation_report_finder_should_not_scan_hot_tables_fully(self):
+        finder = LatestEvaluationReportFinder(project=self.project, current_time=self.now)
+        with CaptureQueriesContext(connection) as context:
+            finder.prefetch_latest_evaluation_reports_for_mm_items([item.id for item in self.maturity_model_items[:3]])
+            LatestEvaluationReportFinder(project=self.project, current_time=self.now) \
+                .get_latest_evaluation_report_of_item(self.maturity_model_items[0].id)
+        self._assert_no_full_scans_on_hot_tables(context.captured_queries)
+
+    def test_queries_of_list_pages_by_cursor_should_not_scan_hot_tables_fully(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.credentials(HTTP_NEMO_PROJECT_TOKEN=self.project.auth_token.key)
+        urls = [
+            f'/v1/devops-metrics/project/{self.project.id}/changelist/',
+            f'/v1/devops-metrics/project/{self.project.id}/environment/{self.environment.id}/deployment/',
+            f'/v1/devops-metrics/project/{self.project.id}/environment/{self.environment.id}/report/',
+            f'/v1/dashboard/project/{self.project.id}/item/{self.maturity_model_items[0].id}/evaluation-report/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first_page = client.get(url, {'cursor': '', 'limit': 5})
+                # `CaptureQueriesContext` doesn't work here, since the queries log is reset at the start of the request.
+                captured_queries = []
+
+                def capture(execute, sql, params, many, context):
+                    result = execute(sql, params, many, context)
+                    captured_queries.append({'sql': connection.ops.last_executed_query(context['cursor'], sql, params)})
+                    return result
+
+                with connection.execute_wrapper(capture):
+                    response = client.get(f'{url}?{urlsplit(first_page.data["next"]).query}')
+                self.assertEqual(len(response.data['results']), 5)
+                self._assert_no_full_scans_on_hot_tables(captured_queries)
@@ -4,17 +4,23 @@ from rest_framework.decorators import permission_classes
 
 from apps.dashboard.models.coverage_report import CoverageReport
 from apps.dashboard.permissions import NestedModelsRelatedToProjectPermissions
-from apps.dashboard.serializers import CoverageReportSerializer
+from apps.dashboard.serializers import CoverageReportBulkItemSerializer, CoverageReportSerializer
 from apps.devops_metrics.constants import PROJECT_ID_URL_PARAMETER
+from apps.devops_metrics.ingestion import AsyncIngestionViewSetMixin
+from apps.devops_metrics.models import IngestionReceipt
 from apps.devops_metrics.permissions import NestedApiProjectTokenPermission
 
 
 @permission_classes((Or(NestedApiProjectTokenPermission, NestedModelsRelatedToProjectPermissions),))
-class CoverageReportViewSet(mixins.CreateModelMixin,
+class CoverageReportViewSet(AsyncIngestionViewSetMixin,
+                            mixins.CreateModelMixin,
                             mixins.ListModelMixin,
                             mixins.RetrieveModelMixin,
                             viewsets.GenericViewSet):
     serializer_class = CoverageReportSerializer
+    ingestion_kind = IngestionReceipt.KIND_COVERAGE_REPORT
+    ingestion_serializer_class = CoverageReportBulkItemSerializer
+    ingestion_time_field = 'creation_time'
 
     def get_queryset(self):
         return CoverageReport.objects.filter(project_id=self.kwargs[PROJECT_ID_URL_PARAMETER])
@@ -38,8 +38,10 @@ from apps.dashboard.metrics.coverage.computation import (
     OverallCoverageComputer,
     IncrementalCoverageComputer,
 )
-from apps.devops_metrics.constants import PROJECT_ID_URL_PARAMETER
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_project_coverage_scope
+from apps.devops_metrics.constants import PROJECT_ID_URL_PARAMETER, GRANULARITY_STEP_LENGTHS, MAX_GRAPH_DATA_POINTS
 from apps.devops_metrics.serializers import DailyMetricReportRequestParametersSerializer
+from apps.utils.pagination import KeysetPagination
 
 logger = logging.getLogger(__name__)
 
@@ -140,14 +142,27 @@ class ProjectViewSet(mixins.ListModelMixin,
         checking_period = timedelta(days=parsed_parameters['checking_period_days'])
         first_date = parsed_parameters['period_start_date']
         last_date = parsed_parameters['period_end_date']
-        overall_coverage_computer = OverallCoverageComputer(project, checking_period)
-        incremental_coverage_computer = IncrementalCoverageComputer(project, checking_period)
-        overall_coverage_data = overall_coverage_computer.get_daily_graph_data_serialized(first_date, last_date)
-        incremental_coverage_data = incremental_coverage_computer.get_daily_graph_data_serialized(first_date, last_date)
-        return Response({
-            "overall": overall_coverage_data,
-            "incremental": incremental_coverage_data,
-        })
+        step_length = GRANULARITY_STEP_LENGTHS[parsed_parameters['granularity']]
+
+        def compute_graphs():
+            overall_coverage_computer = OverallCoverageComputer(project, checking_period)
+            incremental_coverage_computer = IncrementalCoverageComputer(project, checking_period)
+            overall_coverage_data = overall_coverage_computer.get_graph_data_serialized(
+                first_date, last_date, step_length, max_data_points=MAX_GRAPH_DATA_POINTS)
+            incremental_coverage_data = incremental_coverage_computer.get_graph_data_serialized(
+                first_date, last_date, step_length, max_data_points=MAX_GRAPH_DATA_POINTS)
+            return {
+                "overall": overall_coverage_data,
+                "incremental": incremental_coverage_data,
+            }
+        data = MetricGraphCache().get_or_compute(
+            scopes=[get_project_coverage_scope(project.id)],
+            key_parts=["daily-coverage", parsed_parameters['checking_period_days'], first_date, last_date,
+                       parsed_parameters['granularity']],
+            period_end_date=last_date,
+            compute=compute_graphs,
+        )
+        return Response(data)
 
     @action(detail=True, url_path="api-token", name="api-token")
     def api_token(self, request, *args, **kwargs):
@@ -173,10 +188,15 @@ class GitlabProjectViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
             .filter(nemo_project=self.kwargs[PROJECT_ID_URL_PARAMETER])
 
 
+class EvaluationReportKeysetPagination(KeysetPagination):
+    ordering_field = 'latest_evaluation_time'
+
+
 class EvaluationReportViewSet(viewsets.ReadOnlyModelViewSet):
     URL_PARAM_MM_ITEM_ID = 'mm_item_id'
 
     serializer_class = EvaluationReportSerializer
+    pagination_class = EvaluationReportKeysetPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['latest_evaluation_time']
     ordering = ['-latest_evaluation_time']
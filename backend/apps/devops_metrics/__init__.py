@@ -0,0 +1 @@
+default_app_config = 'apps.devops_metrics.apps.DevopsMetricsConfig'
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from rangefilter.filter import DateRangeFilter
 from apps.devops_metrics.models import \
-    ChangeList, Deployment, ServiceStatusReport
+    ChangeList, Deployment, ServiceStatusReport, DailyEnvironmentMetricRollup, IngestionReceipt, RawEventsArchive
 from apps.devops_metrics.forms import DeploymentForm, ChangeListForm
 
 
@@ -38,3 +38,23 @@ class ServiceStatusReportAdmin(admin.ModelAdmin):
     def get_project(self, obj):
         return obj.environment.project
     get_project.short_description = 'Project'
+
+
+@admin.register(DailyEnvironmentMetricRollup)
+class DailyEnvironmentMetricRollupAdmin(admin.ModelAdmin):
+    list_display = ('id', 'environment', 'day', 'deployments_count', 'failed_deployments_count',
+                    'lead_times_count', 'down_times_count')
+    list_filter = (('day', DateRangeFilter), 'environment__project')
+
+
+@admin.register(RawEventsArchive)
+class RawEventsArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'environment', 'horizon', 'update_time')
+    list_filter = ('environment__project',)
+
+
+@admin.register(IngestionReceipt)
+class IngestionReceiptAdmin(admin.ModelAdmin):
+    list_display = ('id', 'project', 'environment', 'kind', 'status', 'creation_time', 'finish_time')
+    list_filter = (('creation_time', DateRangeFilter), 'project', 'kind', 'status')
+    readonly_fields = ('creation_time', 'finish_time')
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class DevopsMetricsConfig(AppConfig):
     name = 'apps.devops_metrics'
+
+    def ready(self):
+        import apps.devops_metrics.signals
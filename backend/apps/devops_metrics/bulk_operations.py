@@ -0,0 +1,208 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from apps.dashboard.models import Environment, Project
+from apps.devops_metrics.compaction import (
+    delete_redundant_service_status_reports,
+    get_redundant_service_status_report_ids,
+    get_service_status_reports_lateness_horizon)
+from apps.devops_metrics.models import ChangeList, Deployment, ServiceStatusReport
+from apps.devops_metrics.serializers import DeploymentBulkItemSerializer, ServiceStatusReportSerializer
+from apps.devops_metrics.signals import (
+    handle_changelists_change,
+    handle_deployments_change,
+    handle_service_status_reports_change)
+from apps.utils import exception_utils
+from apps.utils.validation_utils import InconsistentDataError, check_for_duplicate_values_in_unique_fields
+
+UPSERT_CHANGELISTS_BATCH_SIZE = 1000
+
+TItemResult = Dict[str, Any]
+
+
+@dataclass
+class ChangeListUpsertResult:
+    id: int
+    change_list_id: str
+    commit_hash: str
+    created: bool
+
+
+def bulk_upsert_changelists(project: Project, rows: Sequence[Dict]) -> List[ChangeListUpsertResult]:
+    """
+    Inserts the changelists of the rows (with the keys of `ChangeListSerializer`), or updates the title and time of the
+     existing ones with the same commit hash and change list id; with a few queries per `UPSERT_CHANGELISTS_BATCH_SIZE` rows.
+
+    The rows must be validated already (e.g. by `ChangeListSerializer` fields); the results are in the order of the rows.
+
+    Raises:
+        serializers.ValidationError: If the rows have duplicate commit hashes or change list ids.
+        InconsistentDataError: If a row has the commit hash of a changelist but not its change list id (or vice versa);
+         nothing is saved then.
+    """
+    check_for_duplicate_values_in_unique_fields(rows, 'commit_hash')
+    check_for_duplicate_values_in_unique_fields(rows, 'change_list_id')
+    results: List[ChangeListUpsertResult] = []
+    with transaction.atomic():
+        for batch_start in range(0, len(rows), UPSERT_CHANGELISTS_BATCH_SIZE):
+            batch = rows[batch_start:batch_start + UPSERT_CHANGELISTS_BATCH_SIZE]
+            _check_consistency_with_existing_changelists(project, batch)
+            try:
+                results += _upsert_changelists(project, batch)
+            except IntegrityError as e:
+                # Another changelist is saved concurrently.
+                if exception_utils.is_exception_about_unique_constraint(e):
+                    raise InconsistentDataError(f"Couldn't upsert the changelists of project {project.id} because of a "
+                                                "unique constraint violation.") from e
+                raise
+        changelists = [(ChangeList(id=r.id, project=project, time=row['time']), r.created) for r, row in zip(results, rows)]
+        handle_changelists_change([changelist for changelist, created in changelists if created], created=True)
+        handle_changelists_change([changelist for changelist, created in changelists if not created], created=False)
+    return results
+
+
+def get_existing_changelists_keys(project: Project, commit_hashes: Iterable[str],
+                                  change_list_ids: Iterable[str]) -> Set[Tuple[str, str]]:
+    """
+    Returns the (commit hash, change list id) of the changelists of the project with any of the commit hashes or change
+     list ids; with a single query.
+    """
+    return set(ChangeList.objects
+               .filter(project=project)
+               .filter(Q(commit_hash__in=list(commit_hashes)) | Q(change_list_id__in=[str(i) for i in change_list_ids]))
+               .values_list('commit_hash', 'change_list_id'))
+
+
+def _check_consistency_with_existing_changelists(project: Project, rows: Sequence[Dict]) -> None:
+    existing_changelists = (ChangeList.objects
+                            .filter(project=project)
+                            .filter(Q(commit_hash__in=[row['commit_hash'] for row in rows])
+                                    | Q(change_list_id__in=[row['change_list_id'] for row in rows]))
+                            .values_list('commit_hash', 'change_list_id'))
+    change_list_ids_of_commit_hashes = dict(existing_changelists)
+    commit_hashes_of_change_list_ids = {change_list_id: commit_hash for commit_hash, change_list_id in existing_changelists}
+    for row in rows:
+        commit_hash = row['commit_hash']
+        change_list_id = str(row['change_list_id'])
+        if change_list_ids_of_commit_hashes.get(commit_hash, change_list_id) != change_list_id \
+                or commit_hashes_of_change_list_ids.get(change_list_id, commit_hash) != commit_hash:
+            raise InconsistentDataError(f"Couldn't save a changelist with commit_hash={commit_hash} and change_list_id={change_list_id} "
+                                        "because of a unique constraint violation. But this tuple of info doesn't exist in a single record at DB. "
+                                        "Perhaps a data inconsistency has been occured; e.g. a CL is saved (or trying to save) with commit hash of another.")
+
+
+def _upsert_changelists(project: Project, rows: Sequence[Dict]) -> List[ChangeListUpsertResult]:
+    # The update is skipped if the change list id is different (i.e. only by a concurrent save); so the row is not returned.
+    query = f"""
+        INSERT INTO {ChangeList._meta.db_table} AS changelist (project_id, change_list_id, commit_hash, time, title)
+        VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))}
+        ON CONFLICT (project_id, commit_hash) DO UPDATE
+            SET time = EXCLUDED.time, title = EXCLUDED.title
+            WHERE changelist.change_list_id = EXCLUDED.change_list_id
+        RETURNING changelist.id, changelist.commit_hash, changelist.xmax = 0
+    """
+    now = timezone.now()
+    parameters = []
+    for row in rows:
+        parameters += [project.id, str(row['change_list_id']), row['commit_hash'], row.get('time') or now, row.get('title')]
+    with connection.cursor() as cursor:
+        cursor.execute(query, parameters)
+        returned_rows = {commit_hash: (id_, created) for id_, commit_hash, created in cursor.fetchall()}
+    if len(returned_rows) != len(rows):
+        raise InconsistentDataError(f"Couldn't upsert the changelists of project {project.id}; "
+                                    "some of them were saved concurrently with other change list ids.")
+    return [
+        ChangeListUpsertResult(
+            id=returned_rows[row['commit_hash']][0],
+            change_list_id=str(row['change_list_id']),
+            commit_hash=row['commit_hash'],
+            created=returned_rows[row['commit_hash']][1],
+        )
+        for row in rows
+    ]
+
+
+def bulk_create_deployments(environment: Environment, items: Sequence[Dict]) -> List[TItemResult]:
+    """
+    Creates the deployments of the (not validated) items, with the keys of `DeploymentBulkItemSerializer`; with the same
+     rules as creating one, but with a few queries in total. The valid items are created even if others are not.
+
+    Returns the result of each item, in order: `{index, created, id}` or `{index, created, errors}`.
+    """
+    item_serializers = [DeploymentBulkItemSerializer(data=item) for item in items]
+    valid_items = [s.validated_data for s in item_serializers if s.is_valid()]
+    changelists = {
+        changelist.commit_hash: changelist
+        for changelist in ChangeList.objects.filter(project_id=environment.project_id,
+                                                    commit_hash__in={item['commit_hash'] for item in valid_items})
+    }
+
+    results: List[TItemResult] = []
+    deployments = []
+    for index, item_serializer in enumerate(item_serializers):
+        if item_serializer.errors:
+            results.append({'index': index, 'created': False, 'errors': item_serializer.errors})
+            continue
+        item = item_serializer.validated_data
+        change_list = changelists.get(item['commit_hash'])
+        if change_list is None:
+            error = "Changelist with this commit hash not found for this project."
+        elif item['time'] < change_list.time:
+            error = "Deployment is before Changelist time!"
+        else:
+            results.append({'index': index, 'created': True})
+            deployments.append(Deployment(environment=environment, change_list=change_list,
+                                          status=item['status'], time=item['time']))
+            continue
+        results.append({'index': index, 'created': False, 'errors': {api_settings.NON_FIELD_ERRORS_KEY: [error]}})
+
+    with transaction.atomic():
+        # Unlike `save`, `bulk_create` doesn't send the model signals.
+        deployments = Deployment.objects.bulk_create(deployments)
+        if deployments:
+            handle_deployments_change(deployments)
+    created_results = (result for result in results if result['created'])
+    for result, deployment in zip(created_results, deployments):
+        result['id'] = deployment.id
+    return results
+
+
+def bulk_create_service_status_reports(environment: Environment, items: Sequence[Dict]) -> List[TItemResult]:
+    """
+    Creates the service status reports of the (not validated) items, with the keys of `ServiceStatusReportSerializer`.
+    The redundant reports (see `get_redundant_service_status_report_ids`), of the existing ones too, are deleted after
+     creating them, if `DEVOPS_METRICS_SERVICE_STATUS_TRANSITIONS_ONLY` is enabled.
+
+    Returns the result of each item, in order: `{index, created, id}` or `{index, created, errors}`.
+    """
+    item_serializers = [ServiceStatusReportSerializer(data=item) for item in items]
+    results: List[TItemResult] = []
+    valid_items = []
+    for index, item_serializer in enumerate(item_serializers):
+        if item_serializer.is_valid():
+            results.append({'index': index, 'created': True})
+            valid_items.append((index, {'time': timezone.now(), **item_serializer.validated_data}))
+        else:
+            results.append({'index': index, 'created': False, 'errors': item_serializer.errors})
+    with transaction.atomic():
+        reports = ServiceStatusReport.objects.bulk_create([
+            ServiceStatusReport(environment=environment, status=item['status'], time=item['time'])
+            for _, item in valid_items
+        ])
+        if reports and settings.DEVOPS_METRICS_SERVICE_STATUS_TRANSITIONS_ONLY:
+            delete_redundant_service_status_reports(get_redundant_service_status_report_ids(
+                environment_id=environment.id,
+                start=min(report.time for report in reports),
+                horizon=get_service_status_reports_lateness_horizon(),
+            ))
+        if reports:
+            handle_service_status_reports_change(reports)
+    for (index, _), report in zip(valid_items, reports):
+        results[index]['id'] = report.id
+    return results
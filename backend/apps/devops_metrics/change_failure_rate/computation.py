@@ -1,9 +1,12 @@
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, List
+from typing import Optional, Sequence, Tuple, List
 
+from apps.dashboard.metrics.computation_base import SlidingTimeWindows, prefix_sums, unzip_columns
 from apps.devops_metrics.metric_computer import MetricComputer
-from apps.devops_metrics.models import Deployment
+from apps.devops_metrics.models import DailyEnvironmentMetricRollup, Deployment
+from apps.devops_metrics.rollups import DailyRollupMetricComputerMixin
+from apps.devops_metrics.sql_metric_computer import SqlMetricComputer
 
 logger = logging.getLogger(__name__)
 
@@ -23,17 +26,54 @@ class ChangeFailureRateComputer(MetricComputer[Optional[float]]):
                                .filter(time__gte=first_timestamp - self.checking_period)
                                .filter(time__lt=last_timestamp)
                                .order_by('time')
-                               .only('time', 'status')
-                               .seal())
-        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps * len(all_deployments))
+                               .values_list('time', 'status'))
+        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps + len(all_deployments))
+        times, statuses = unzip_columns(all_deployments, 2)
+        return self.compute_for_deployments(times, statuses, first_timestamp, num_timestamps, step_length)
+
+    def compute_for_deployments(
+            self,
+            times: Sequence[datetime],
+            statuses: Sequence[str],
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, Optional[float]]]:
+        """Gets the time-sorted deployments of the environment, covering the checking periods of the timestamps."""
+        windows = SlidingTimeWindows(times, self.checking_period)
+        failed_counts = prefix_sums(map(Deployment.STATUS_FAIL.__eq__, statuses))
         rates: List[Tuple[datetime, Optional[float]]] = []
-        for i in range(num_timestamps):
-            current_dt = first_timestamp + i * step_length
-            checking_start_timestamp = current_dt - self.checking_period
-            current_deployments = [d for d in all_deployments if checking_start_timestamp <= d.time < current_dt]
-            failed_deployments = [d for d in current_deployments if d.status == Deployment.STATUS_FAIL]
-            total_count = len(current_deployments)
-            failed_count = len(failed_deployments)
+        for current_dt, start, end in windows.iterate(first_timestamp, num_timestamps, step_length):
+            total_count = end - start
+            failed_count = failed_counts[end] - failed_counts[start]
             rate = (failed_count / total_count) * 100 if total_count > 0 else None
             rates.append((current_dt, rate))
         return rates
+
+
+class ChangeFailureRateRollupComputer(DailyRollupMetricComputerMixin[Optional[float]], ChangeFailureRateComputer):
+
+    # Override
+    def compute_for_rollups(self, rollups: Sequence[DailyEnvironmentMetricRollup]) -> Optional[float]:
+        total_count = sum(r.deployments_count for r in rollups)
+        failed_count = sum(r.failed_deployments_count for r in rollups)
+        return (failed_count / total_count) * 100 if total_count > 0 else None
+
+
+class ChangeFailureRateSqlComputer(SqlMetricComputer[Optional[float]]):
+
+    # Override
+    def get_windows_query(self) -> str:
+        return f"""
+            SELECT ts.i, COUNT(d.id), COUNT(d.id) FILTER (WHERE d.status = '{Deployment.STATUS_FAIL}')
+            FROM timestamps ts
+            LEFT JOIN {Deployment._meta.db_table} d
+                ON d.environment_id = %(environment_id)s AND d.time >= ts.t - %(checking_period)s AND d.time < ts.t
+            GROUP BY ts.i
+            ORDER BY ts.i
+        """
+
+    # Override
+    def convert_window_row(self, row: Sequence) -> Optional[float]:
+        total_count, failed_count = row
+        return (failed_count / total_count) * 100 if total_count > 0 else None
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from typing import List, Sequence
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from apps.dashboard.models import Environment
+from apps.devops_metrics.models import ServiceStatusReport
+
+
+def get_service_status_reports_lateness_horizon() -> datetime:
+    """
+    Returns the time before which no more service status reports are expected; i.e. the reports are posted at most
+     `DEVOPS_METRICS_SERVICE_STATUS_REPORTS_MAX_DELAY_MINUTES` after their time.
+    """
+    return timezone.now() - timedelta(minutes=settings.DEVOPS_METRICS_SERVICE_STATUS_REPORTS_MAX_DELAY_MINUTES)
+
+
+def get_redundant_service_status_report_ids(environment_id: int, start: datetime, horizon: datetime) -> List[int]:
+    """
+    Returns the IDs of the stored service status reports of the environment which carry no information for the metrics,
+     from the run of UP reports ongoing at `start` on; to be deleted after storing the reports from `start` on.
+
+    Only UP reports are redundant: the outages are paired from the first DOWN report after an UP, and end at the first UP
+     after that; but an outage cut by the start of a checking period starts at its first DOWN report inside the period.
+     So the repeated DOWN reports are kept, and the metrics stay the same as with the whole stream.
+    Of a run of UP reports, the first one and the last one are kept; and the ones between them only once they're before
+     the lateness horizon (see `get_service_status_reports_lateness_horizon`), since a DOWN report posted late between
+     them would be restored by the next one.
+    The runs ended before `start` may still have such reports (e.g. the ones within the horizon when a DOWN report
+     ended the run); they're left to `compact_service_status_reports`.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH reports AS (
+                SELECT id, time, status, LAG(status) OVER w AS previous_status, LEAD(status) OVER w AS next_status
+                FROM {ServiceStatusReport._meta.db_table}
+                WHERE environment_id = %(environment_id)s AND time >= COALESCE((
+                    SELECT MAX(time) FROM {ServiceStatusReport._meta.db_table}
+                    WHERE environment_id = %(environment_id)s AND status = %(down)s AND time < %(start)s
+                ), '-infinity')
+                WINDOW w AS (ORDER BY time, id)
+            )
+            SELECT id FROM reports
+            WHERE status = %(up)s AND previous_status = %(up)s AND next_status = %(up)s AND time < %(horizon)s
+        """, {'environment_id': environment_id, 'start': start, 'horizon': horizon,
+              'up': ServiceStatusReport.STATUS_UP, 'down': ServiceStatusReport.STATUS_DOWN})
+        return [report_id for report_id, in cursor.fetchall()]
+
+
+def delete_redundant_service_status_reports(report_ids: Sequence[int]) -> None:
+    """The metrics don't change; so the rollups and the cached graphs are left as they are (and no signals are sent)."""
+    if report_ids:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {ServiceStatusReport._meta.db_table} WHERE id = ANY(%s)", [list(report_ids)])
+
+
+def compact_service_status_reports(environment: Environment, horizon: datetime, chunk_size: int = 10000,
+                                   dry_run: bool = False) -> int:
+    """
+    Deletes the redundant service status reports (see `get_redundant_service_status_report_ids`) of the environment
+     before the lateness horizon, i.e. the UP reports between the first and the last UP report of each run; scanning its
+     reports in chunks of `chunk_size`. Returns the number of the (to be) deleted reports.
+    """
+    deleted_count = 0
+    # Of the last two scanned reports
+    previous_statuses = (None, None)
+    previous_report_id = None
+    previous_report_time = None
+    last_time = None
+    last_id = None
+    while True:
+        reports = ServiceStatusReport.objects.filter(environment=environment).order_by('time', 'id')
+        if last_time is not None:
+            reports = reports.filter(time__gte=last_time).exclude(time=last_time, id__lte=last_id)
+        chunk = list(reports.values_list('id', 'time', 'status')[:chunk_size])
+        if not chunk:
+            return deleted_count
+        redundant_report_ids = []
+        for report_id, time, status in chunk:
+            if status == ServiceStatusReport.STATUS_UP and previous_statuses == (ServiceStatusReport.STATUS_UP,) * 2 \
+                    and previous_report_time < horizon:
+                redundant_report_ids.append(previous_report_id)
+            previous_statuses = (previous_statuses[1], status)
+            previous_report_id = report_id
+            previous_report_time = time
+        if not dry_run:
+            delete_redundant_service_status_reports(redundant_report_ids)
+        deleted_count += len(redundant_report_ids)
+        last_id, last_time, _ = chunk[-1]
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from rest_framework_extensions.settings import extensions_api_settings
 
 
@@ -13,6 +15,16 @@ ENVIRONMENT_ID_URL_PARAMETER = \
 
 DEPLOYMENT_NOT_ENOUGH = 'Deployments not enough to calculate.'
 
+MAX_BULK_DEPLOYMENTS = 1000
+
+MAX_BULK_CHANGELISTS = 10000
+
+EXPORT_FORMAT_NDJSON = 'ndjson'
+
+EXPORT_FORMAT_CSV = 'csv'
+
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched from the database at a time
+
 KEY_CHANGE_FAILURE_RATE = "change_failure_rate"
 
 KEY_TIME_TO_RESTORE = "time_to_restore"
@@ -25,4 +37,25 @@ DEFAULT_CHECKING_PERIOD_DAYS = 62  # 2 months
 
 DEFAULT_PERIOD_IN_DAYS = 186  # 6 months
 
-MAX_PERIOD_IN_DAYS = 186  # 6 months
+MAX_PERIOD_IN_DAYS = 2 * 366  # 2 years; long periods are downsampled (see MAX_GRAPH_DATA_POINTS)
+
+# So the graphs of the longest periods (with the default checking period) ending today are computed from the raw events.
+MIN_RAW_EVENTS_RETENTION_DAYS = MAX_PERIOD_IN_DAYS + DEFAULT_CHECKING_PERIOD_DAYS
+
+TASK_ARCHIVE_OLD_RAW_EVENTS = "Archive old raw DevOps events."
+
+TASK_WRITE_STALE_INGESTION_RECEIPTS = "Write stale pending ingestion receipts."
+
+GRANULARITY_HOURLY = 'hourly'
+
+GRANULARITY_DAILY = 'daily'
+
+GRANULARITY_WEEKLY = 'weekly'
+
+GRANULARITY_STEP_LENGTHS = {
+    GRANULARITY_HOURLY: timedelta(hours=1),
+    GRANULARITY_DAILY: timedelta(days=1),
+    GRANULARITY_WEEKLY: timedelta(weeks=1),
+}
+
+MAX_GRAPH_DATA_POINTS = 200
@@ -1,8 +1,11 @@
 from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple
 
+from apps.dashboard.metrics.computation_base import SlidingTimeWindows
 from apps.devops_metrics.metric_computer import MetricComputer
-from apps.devops_metrics.models import Deployment
+from apps.devops_metrics.models import DailyEnvironmentMetricRollup, Deployment
+from apps.devops_metrics.rollups import DailyRollupMetricComputerMixin
+from apps.devops_metrics.sql_metric_computer import SqlMetricComputer
 
 
 class DeploymentFrequencyComputer(MetricComputer[Optional[float]]):
@@ -16,23 +19,66 @@ class DeploymentFrequencyComputer(MetricComputer[Optional[float]]):
             step_length: timedelta,
     ) -> List[Tuple[datetime, Optional[float]]]:
         last_timestamp = first_timestamp + (num_timestamps-1) * step_length
-        all_deployment_times = Deployment.objects \
+        all_deployment_times = list(Deployment.objects \
             .filter(environment=self.environment) \
             .filter(status=Deployment.STATUS_PASS) \
             .filter(time__gte=first_timestamp - self.checking_period) \
             .filter(time__lt=last_timestamp) \
             .order_by('time') \
-            .values_list('time', flat=True)
-        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps * len(all_deployment_times))
+            .values_list('time', flat=True))
+        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps + len(all_deployment_times))
+        return self.compute_for_passed_deployment_times(all_deployment_times, first_timestamp, num_timestamps, step_length)
+
+    def compute_for_passed_deployment_times(
+            self,
+            all_deployment_times: Sequence[datetime],
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, Optional[float]]]:
+        """Gets the sorted times of the passed deployments of the environment, covering the checking periods of the timestamps."""
+        windows = SlidingTimeWindows(all_deployment_times, self.checking_period)
         frequencies: List[Tuple[datetime, Optional[float]]] = []
-        for i in range(num_timestamps):
-            current_dt = first_timestamp + i * step_length
-            checking_start_timestamp = current_dt - self.checking_period
-            current_deployment_times = [t for t in all_deployment_times if checking_start_timestamp <= t < current_dt]
-            total_count = len(current_deployment_times)
+        for current_dt, start, end in windows.iterate(first_timestamp, num_timestamps, step_length):
+            total_count = end - start
             if total_count < DeploymentFrequencyComputer.MINIMUM_DEPLOYMENTS_REQUIRED:
                 freq = None
             else:
-                freq = (max(current_deployment_times) - min(current_deployment_times)).total_seconds() / (total_count - 1)
+                # The times are sorted; so the first and the last ones are the min and the max.
+                freq = (all_deployment_times[end - 1] - all_deployment_times[start]).total_seconds() / (total_count - 1)
             frequencies.append((current_dt, freq))
         return frequencies
+
+
+class DeploymentFrequencyRollupComputer(DailyRollupMetricComputerMixin[Optional[float]], DeploymentFrequencyComputer):
+
+    # Override
+    def compute_for_rollups(self, rollups: Sequence[DailyEnvironmentMetricRollup]) -> Optional[float]:
+        total_count = sum(r.passed_deployments_count for r in rollups)
+        if total_count < DeploymentFrequencyComputer.MINIMUM_DEPLOYMENTS_REQUIRED:
+            return None
+        first_deployment_time = min(r.first_passed_deployment_time for r in rollups if r.first_passed_deployment_time is not None)
+        last_deployment_time = max(r.last_passed_deployment_time for r in rollups if r.last_passed_deployment_time is not None)
+        return (last_deployment_time - first_deployment_time).total_seconds() / (total_count - 1)
+
+
+class DeploymentFrequencySqlComputer(SqlMetricComputer[Optional[float]]):
+
+    # Override
+    def get_windows_query(self) -> str:
+        return f"""
+            SELECT ts.i, COUNT(d.id), MIN(d.time), MAX(d.time)
+            FROM timestamps ts
+            LEFT JOIN {Deployment._meta.db_table} d
+                ON d.environment_id = %(environment_id)s AND d.status = '{Deployment.STATUS_PASS}'
+                AND d.time >= ts.t - %(checking_period)s AND d.time < ts.t
+            GROUP BY ts.i
+            ORDER BY ts.i
+        """
+
+    # Override
+    def convert_window_row(self, row: Sequence) -> Optional[float]:
+        total_count, first_deployment_time, last_deployment_time = row
+        if total_count < DeploymentFrequencyComputer.MINIMUM_DEPLOYMENTS_REQUIRED:
+            return None
+        return (last_deployment_time - first_deployment_time).total_seconds() / (total_count - 1)
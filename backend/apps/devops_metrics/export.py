@@ -0,0 +1,74 @@
+import csv
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Sequence
+
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+
+from apps.devops_metrics.constants import EXPORT_CHUNK_SIZE, EXPORT_FORMAT_CSV, EXPORT_FORMAT_NDJSON
+from apps.devops_metrics.serializers import ExportRequestParametersSerializer
+
+_CONTENT_TYPES = {
+    EXPORT_FORMAT_NDJSON: 'application/x-ndjson',
+    EXPORT_FORMAT_CSV: 'text/csv',
+}
+
+
+class _EchoBuffer:
+    """A file-like object which returns what is written to it; so `csv.writer` gives the lines instead of storing them."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _format_value(value):
+    # The full precision of the times is kept (unlike `DjangoJSONEncoder`).
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iterate_ndjson_lines(field_names: Sequence[str], rows: Iterable[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(field_names, map(_format_value, row)))) + '\n'
+
+
+def iterate_csv_lines(field_names: Sequence[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(field_names)
+    for row in rows:
+        yield writer.writerow(map(_format_value, row))
+
+
+class RawEventsExportViewSetMixin:
+    """
+    Adds the `export` action, which streams the records in a time range (`?start_time=&end_time=`, the end excluded)
+     as NDJSON or CSV (`?file_format=`), in the order of time; e.g. to load them into a data warehouse.
+    The rows are read `EXPORT_CHUNK_SIZE` at a time (by a server-side cursor) and written as they are read; so the
+     memory usage doesn't grow with the number of the exported records.
+    """
+    # Exported column -> field lookup
+    export_fields: Dict[str, str]
+    export_file_name: str
+
+    @action(detail=False, methods=['get'], url_path='export', pagination_class=None)
+    def export(self, request, *args, **kwargs):
+        parameters_serializer = ExportRequestParametersSerializer(data=request.query_params)
+        parameters_serializer.is_valid(raise_exception=True)
+        parameters = parameters_serializer.validated_data
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if parameters['start_time'] is not None:
+            queryset = queryset.filter(time__gte=parameters['start_time'])
+        if parameters['end_time'] is not None:
+            queryset = queryset.filter(time__lt=parameters['end_time'])
+        rows = queryset \
+            .order_by('time', 'id') \
+            .values_list(*self.export_fields.values()) \
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        file_format = parameters['file_format']
+        iterate_lines = iterate_csv_lines if file_format == EXPORT_FORMAT_CSV else iterate_ndjson_lines
+        response = StreamingHttpResponse(iterate_lines(list(self.export_fields), rows),
+                                         content_type=_CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{self.export_file_name}.{file_format}"'
+        return response
@@ -0,0 +1,193 @@
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_project_coverage_scope
+from apps.dashboard.models import CoverageReport, Environment, Project
+from apps.dashboard.serializers import CoverageReportBulkItemSerializer
+from apps.devops_metrics.bulk_operations import (
+    TItemResult,
+    bulk_create_deployments,
+    bulk_create_service_status_reports,
+    bulk_upsert_changelists)
+from apps.devops_metrics.constants import ENVIRONMENT_ID_URL_PARAMETER, PROJECT_ID_URL_PARAMETER
+from apps.devops_metrics.models import IngestionReceipt
+from apps.devops_metrics.serializers import ChangeListBulkItemSerializer, IngestionReceiptSerializer
+from apps.devops_metrics.tasks import write_pending_ingestion_receipts_of_project
+from apps.utils.validation_utils import InconsistentDataError
+
+logger = logging.getLogger(__name__)
+
+ASYNC_QUERY_PARAMETER = 'async'
+
+# Of a single run of the writer task; the rest are written by the next run.
+MAX_WRITTEN_RECEIPTS = 1000
+
+
+class AsyncIngestionViewSetMixin:
+    """
+    Adds the opt-in `?async=1` mode to the create endpoint: only the shape of the posted record is validated
+     (by `ingestion_serializer_class`), and a receipt is returned (with 202) to be queried for the outcome later.
+    The records are written in batches per project by `write_pending_ingestion_receipts`.
+    """
+    ingestion_kind: str
+    ingestion_serializer_class: Callable[..., serializers.Serializer]
+    # Set to the receipt time if not posted; so the records don't get the time they are written at.
+    ingestion_time_field = 'time'
+
+    # Override
+    def create(self, request, *args, **kwargs):
+        if request.query_params.get(ASYNC_QUERY_PARAMETER) != '1':
+            return super().create(request, *args, **kwargs)
+        serializer = self.ingestion_serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        project = get_object_or_404(Project, pk=self.kwargs[PROJECT_ID_URL_PARAMETER])
+        environment = None
+        if ENVIRONMENT_ID_URL_PARAMETER in self.kwargs:
+            environment = get_object_or_404(Environment, pk=self.kwargs[ENVIRONMENT_ID_URL_PARAMETER], project=project)
+        record = dict(serializer.data)
+        creation_time = timezone.now()
+        record.setdefault(self.ingestion_time_field, serializers.DateTimeField().to_representation(creation_time))
+        receipt = IngestionReceipt.objects.create(
+            project=project,
+            environment=environment,
+            kind=self.ingestion_kind,
+            records=[record],
+            creator=request.user if request.user.is_authenticated else None,
+            creation_time=creation_time,
+        )
+        transaction.on_commit(lambda: write_pending_ingestion_receipts_of_project.apply_async(
+            args=[project.id],
+            countdown=settings.ASYNC_INGESTION_WRITE_DELAY_SECONDS,
+        ))
+        return Response(IngestionReceiptSerializer(receipt).data, status=status.HTTP_202_ACCEPTED)
+
+
+def _write_changelists(project: Project, environment: Optional[Environment], records: Sequence[Dict],
+                       creator: Optional[User]) -> List[TItemResult]:
+    rows_serializer = ChangeListBulkItemSerializer(data=records, many=True)
+    rows_serializer.is_valid(raise_exception=True)
+    return [
+        {'index': index, 'created': result.created, 'id': result.id}
+        for index, result in enumerate(bulk_upsert_changelists(project, rows_serializer.validated_data))
+    ]
+
+
+def _write_deployments(project: Project, environment: Optional[Environment], records: Sequence[Dict],
+                       creator: Optional[User]) -> List[TItemResult]:
+    return bulk_create_deployments(environment, records)
+
+
+def _write_service_status_reports(project: Project, environment: Optional[Environment], records: Sequence[Dict],
+                                  creator: Optional[User]) -> List[TItemResult]:
+    return bulk_create_service_status_reports(environment, records)
+
+
+def _write_coverage_reports(project: Project, environment: Optional[Environment], records: Sequence[Dict],
+                            creator: Optional[User]) -> List[TItemResult]:
+    item_serializers = [CoverageReportBulkItemSerializer(data=record) for record in records]
+    valid_items = [s.validated_data for s in item_serializers if s.is_valid()]
+    saved_versions = set(CoverageReport.objects
+                         .filter(project=project)
+                         .filter(version__in={item['version'] for item in valid_items if item.get('version')})
+                         .values_list('coverage_type', 'version'))
+    results: List[TItemResult] = []
+    reports = []
+    for index, item_serializer in enumerate(item_serializers):
+        if item_serializer.errors:
+            results.append({'index': index, 'created': False, 'errors': item_serializer.errors})
+            continue
+        item = item_serializer.validated_data
+        version = (item['coverage_type'], item.get('version'))
+        if version in saved_versions:
+            results.append({'index': index, 'created': False, 'errors': {
+                'version': [f"CoverageReport with type {version[0]} and version {version[1]} already reported."],
+            }})
+            continue
+        if item.get('version'):
+            saved_versions.add(version)
+        results.append({'index': index, 'created': True})
+        reports.append(CoverageReport(project=project, creator=creator, **item))
+    reports = CoverageReport.objects.bulk_create(reports)
+    # Unlike `save`, `bulk_create` doesn't send the model signals.
+    MetricGraphCache().invalidate_now_and_on_commit(get_project_coverage_scope(project.id))
+    created_results = (result for result in results if result['created'])
+    for result, report in zip(created_results, reports):
+        result['id'] = report.id
+    return results
+
+
+_WRITERS = {
+    IngestionReceipt.KIND_CHANGELIST: _write_changelists,
+    IngestionReceipt.KIND_DEPLOYMENT: _write_deployments,
+    IngestionReceipt.KIND_SERVICE_STATUS_REPORT: _write_service_status_reports,
+    IngestionReceipt.KIND_COVERAGE_REPORT: _write_coverage_reports,
+}
+_KINDS_IN_WRITING_ORDER = list(_WRITERS)
+
+
+def write_pending_ingestion_receipts(project_id: int) -> int:
+    """
+    Writes the records of the pending receipts of the project, with a bulk write per kind (and environment); the
+     changelists before the others. If a batch fails as a whole (e.g. because of an inconsistent changelist), its receipts are written one by one.
+    Returns the number of the written receipts; at most `MAX_WRITTEN_RECEIPTS`.
+    """
+    with transaction.atomic():
+        receipts = list(IngestionReceipt.objects
+                        .select_for_update(skip_locked=True, of=('self',))
+                        .filter(project_id=project_id)
+                        .filter(status=IngestionReceipt.STATUS_PENDING)
+                        .select_related('project', 'environment', 'creator')
+                        .order_by('creation_time')[:MAX_WRITTEN_RECEIPTS])
+        batches = defaultdict(list)
+        for receipt in receipts:
+            batches[(receipt.kind, receipt.environment_id, receipt.creator_id)].append(receipt)
+        # The changelists first; since a deployment may be of a changelist posted after it (yet written together).
+        for batch in sorted(batches.values(), key=lambda batch: _KINDS_IN_WRITING_ORDER.index(batch[0].kind)):
+            _write_receipts(batch)
+        finish_time = timezone.now()
+        for receipt in receipts:
+            receipt.finish_time = finish_time
+        IngestionReceipt.objects.bulk_update(receipts, ['status', 'results', 'finish_time'])
+    return len(receipts)
+
+
+def _write_receipts(receipts: Sequence[IngestionReceipt]) -> None:
+    """Gets receipts of the same kind, project, environment and creator."""
+    first_receipt = receipts[0]
+    writer = _WRITERS[first_receipt.kind]
+    try:
+        with transaction.atomic():
+            results = writer(first_receipt.project, first_receipt.environment,
+                             [record for receipt in receipts for record in receipt.records], first_receipt.creator)
+    except (serializers.ValidationError, InconsistentDataError, DatabaseError) as e:
+        if len(receipts) > 1:
+            for receipt in receipts:
+                _write_receipts([receipt])
+            return
+        logger.info(f"Failed to write the records of ingestion receipt {first_receipt.id}: {e}")
+        detail = e.detail if isinstance(e, serializers.ValidationError) else [str(e)]
+        first_receipt.status = IngestionReceipt.STATUS_FAILED
+        first_receipt.results = [
+            {'index': index, 'created': False, 'errors': {api_settings.NON_FIELD_ERRORS_KEY: detail}}
+            for index in range(len(first_receipt.records))
+        ]
+        return
+    offset = 0
+    for receipt in receipts:
+        receipt_results = results[offset:offset + len(receipt.records)]
+        offset += len(receipt.records)
+        for index, result in enumerate(receipt_results):
+            result['index'] = index
+        receipt.results = receipt_results
+        failed = any('errors' in result for result in receipt_results)
+        receipt.status = IngestionReceipt.STATUS_FAILED if failed else IngestionReceipt.STATUS_SUCCEEDED
@@ -1,12 +1,20 @@
+import bisect
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 
+from django.db.models import Min, Q
+
+from apps.dashboard.metrics.computation_base import SlidingTimeWindows, prefix_sums, unzip_columns
 from apps.devops_metrics.metric_computer import MetricComputer
-from apps.devops_metrics.models import ChangeList, Deployment
+from apps.devops_metrics.models import ChangeList, DailyEnvironmentMetricRollup, Deployment
+from apps.devops_metrics.rollups import DailyRollupMetricComputerMixin
+from apps.devops_metrics.sql_metric_computer import SqlMetricComputer
 
 logger = logging.getLogger(__name__)
 
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
 
 class LeadTimeComputer(MetricComputer[Optional[int]]):
 
@@ -18,62 +26,164 @@ class LeadTimeComputer(MetricComputer[Optional[int]]):
             step_length: timedelta,
     ) -> List[Tuple[datetime, Optional[int]]]:
         last_timestamp = first_timestamp + (num_timestamps-1) * step_length
-        all_changelist_deployment_times = list(Deployment.objects
-                                          .filter(environment=self.environment)
-                                          .filter(status=Deployment.STATUS_PASS)
-                                          .filter(time__gte=first_timestamp - self.checking_period)
-                                          .filter(time__lt=last_timestamp)
-                                          .order_by('change_list_id', 'time')
-                                          .distinct('change_list_id')
-                                          .only('change_list_id', 'time')
-                                          .seal())
-        all_changelist_times = list(ChangeList.objects
-                               .filter(project_id=self.environment.project_id)
-                               .filter(time__gte=first_timestamp - self.checking_period)
-                               .filter(time__lt=last_timestamp)
-                               .order_by('time')
-                               .only('id', 'time')
-                               .seal())
-        all_changelists_count = len(all_changelist_times)
-        all_changelist_deployments_count = len(all_changelist_deployment_times)
-        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps * (all_changelists_count + all_changelist_deployments_count))
+        changelists = list(ChangeList.objects
+                           .filter(project_id=self.environment.project_id)
+                           .filter(time__gte=first_timestamp - self.checking_period)
+                           .filter(time__lt=last_timestamp)
+                           .annotate(first_passed_deployment_time=Min('deployment__time', filter=Q(
+                               deployment__environment=self.environment,
+                               deployment__status=Deployment.STATUS_PASS,
+                               deployment__time__gte=first_timestamp - self.checking_period,
+                               deployment__time__lt=last_timestamp,
+                           )))
+                           .order_by('time', 'id')
+                           .values_list('time', 'first_passed_deployment_time'))
+        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps + len(changelists))
+        changelist_times, deployment_times = unzip_columns(changelists, 2)
+        return self.compute_for_changelists(changelist_times, deployment_times, first_timestamp, num_timestamps, step_length)
+
+    def compute_for_changelists(
+            self,
+            changelist_times: Sequence[datetime],
+            deployment_times: Sequence[Optional[datetime]],
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, Optional[int]]]:
+        """
+        Gets the time-sorted changelists of the project, covering the checking periods of the timestamps,
+         and the time of their first passed deployment in the environment among the deployments covering the same period.
+        """
+        windows = SlidingTimeWindows(changelist_times, self.checking_period)
+
+        a_deployment_precedes_its_changelist = any(
+            d is not None and d < c for c, d in zip(changelist_times, deployment_times)
+        )
+        if a_deployment_precedes_its_changelist:
+            # Inconsistent data; the checking period can cut such deployments from the start too.
+            return [
+                (current_dt, self._compute_single_timestamp_avg_lead_time(changelist_times[start:end], deployment_times[start:end], current_dt))
+                for current_dt, start, end in windows.iterate(first_timestamp, num_timestamps, step_length)
+            ]
+
+        closest_deployment_times = self._get_closest_passed_deployment_times(deployment_times)
+        # Non-decreasing, with the Nones (if any) at the end.
+        deployed_changelists_count = len(closest_deployment_times) - closest_deployment_times.count(None)
+        lead_time_sums = prefix_sums(
+            (closest_deployment_times[i] - changelist_times[i]) // _ONE_MICROSECOND
+            for i in range(deployed_changelists_count)
+        )
         result: List[Tuple[datetime, Optional[int]]] = []
-        for i in range(num_timestamps):
-            current_dt = first_timestamp + i * step_length
-            lead_time = self._compute_single_timestamp_avg_lead_time(all_changelist_deployment_times, all_changelist_times, current_dt)
+        for current_dt, start, end in windows.iterate(first_timestamp, num_timestamps, step_length):
+            # A changelist has a lead time in the window iff its closest deployment is before the end of the window:
+            #  deployments of the later changelists (which are out of the window) are after the end of the window too.
+            deployed_end = bisect.bisect_left(closest_deployment_times, current_dt,
+                                              lo=start, hi=max(start, min(end, deployed_changelists_count)))
+            lead_times_count = deployed_end - start
+            if lead_times_count == 0:
+                lead_time = None
+            else:
+                total_lead_time = (lead_time_sums[deployed_end] - lead_time_sums[start]) * _ONE_MICROSECOND
+                lead_time = int(total_lead_time.total_seconds() / lead_times_count)
             result.append((current_dt, lead_time))
         return result
 
-    def _compute_single_timestamp_avg_lead_time(self, all_changelist_deployment_times, all_changelist_times, current_dt):
-        checking_start_dt = current_dt - self.checking_period
-        changelist_times = [c for c in all_changelist_times if checking_start_dt <= c.time < current_dt]
-        deployment_times = {d.change_list_id: d.time
-                       for d in all_changelist_deployment_times
-                       if checking_start_dt <= d.time < current_dt}
+    @staticmethod
+    def _get_closest_passed_deployment_times(deployment_times: Sequence[Optional[datetime]]) -> List[Optional[datetime]]:
+        """
+        Gets the first passed deployment time of the time-sorted changelists,
+         and returns the earliest one at or after each changelist, computed in one reverse pass.
+        """
+        closest_deployment_times: List[Optional[datetime]] = []
+        closest_deployment_time = None
+        for deployment_time in reversed(deployment_times):
+            if deployment_time is not None and (closest_deployment_time is None or deployment_time < closest_deployment_time):
+                closest_deployment_time = deployment_time
+            closest_deployment_times.append(closest_deployment_time)
+        closest_deployment_times.reverse()
+        return closest_deployment_times
 
+    def _compute_single_timestamp_avg_lead_time(
+            self,
+            changelist_times: Sequence[datetime],
+            deployment_times: Sequence[Optional[datetime]],
+            current_dt: datetime,
+    ) -> Optional[int]:
+        """Gets the time-sorted changelists in the checking period of `current_dt` and their first passed deployment times."""
+        checking_start_dt = current_dt - self.checking_period
         closest_passed_deployment_time_to_current_changelist = None
         total_lead_time = timedelta(0)
         lead_times_count = 0
-        for change_list in reversed(changelist_times):
-            first_passed_deployment_time_on_current_changelist = deployment_times.get(change_list.id)
-
-            if closest_passed_deployment_time_to_current_changelist is None:
-                closest_passed_deployment_time_to_current_changelist = first_passed_deployment_time_on_current_changelist
-
-            an_earlier_deployment_exists = bool(
-                first_passed_deployment_time_on_current_changelist is not None
-                and first_passed_deployment_time_on_current_changelist < closest_passed_deployment_time_to_current_changelist
-            )
-            if an_earlier_deployment_exists:
-                closest_passed_deployment_time_to_current_changelist = first_passed_deployment_time_on_current_changelist
+        for changelist_time, deployment_time in zip(reversed(changelist_times), reversed(deployment_times)):
+            deployment_is_in_checking_period = deployment_time is not None and checking_start_dt <= deployment_time < current_dt
+            if deployment_is_in_checking_period and (
+                    closest_passed_deployment_time_to_current_changelist is None
+                    or deployment_time < closest_passed_deployment_time_to_current_changelist
+            ):
+                closest_passed_deployment_time_to_current_changelist = deployment_time
 
             if closest_passed_deployment_time_to_current_changelist is None:
                 continue
 
-            total_lead_time += closest_passed_deployment_time_to_current_changelist - change_list.time
+            total_lead_time += closest_passed_deployment_time_to_current_changelist - changelist_time
             lead_times_count += 1
 
         if lead_times_count == 0:
             return None
 
         return int(total_lead_time.total_seconds() / lead_times_count)
+
+
+class LeadTimeRollupComputer(DailyRollupMetricComputerMixin[Optional[int]], LeadTimeComputer):
+    """
+    The lead times of the rollups are the ones of the changelists first deployed in a window (see
+     `DailyEnvironmentMetricRollup`), rather than created in it; so only the archived windows are answered from them.
+    """
+    ARCHIVED_WINDOWS_ONLY = True
+
+    # Override
+    def compute_for_rollups(self, rollups: Sequence[DailyEnvironmentMetricRollup]) -> Optional[int]:
+        lead_times_count = sum(r.lead_times_count for r in rollups)
+        if lead_times_count == 0:
+            return None
+        total_lead_time = sum((r.lead_times_sum for r in rollups), timedelta(0))
+        return int(total_lead_time.total_seconds() / lead_times_count)
+
+
+class LeadTimeSqlComputer(SqlMetricComputer[Optional[int]]):
+
+    # Override
+    def get_windows_query(self) -> str:
+        # The closest passed deployment of each changelist is the earliest one (in the window) of it and the later changelists.
+        return f"""
+            , changelists AS (
+                SELECT c.id, c.time, (
+                    SELECT MIN(d.time)
+                    FROM {Deployment._meta.db_table} d
+                    WHERE d.change_list_id = c.id AND d.environment_id = %(environment_id)s
+                        AND d.status = '{Deployment.STATUS_PASS}'
+                        AND d.time >= %(range_start)s AND d.time < %(range_end)s
+                ) AS deployment_time
+                FROM {ChangeList._meta.db_table} c
+                WHERE c.project_id = %(project_id)s AND c.time >= %(range_start)s AND c.time < %(range_end)s
+            )
+            SELECT ts.i, SUM(l.closest_deployment_time - l.time), COUNT(l.closest_deployment_time)
+            FROM timestamps ts
+            LEFT JOIN LATERAL (
+                SELECT c.time, MIN(
+                    CASE WHEN c.deployment_time >= ts.t - %(checking_period)s AND c.deployment_time < ts.t
+                    THEN c.deployment_time END
+                ) OVER (ORDER BY c.time DESC, c.id DESC ROWS UNBOUNDED PRECEDING) AS closest_deployment_time
+                FROM changelists c
+                WHERE c.time >= ts.t - %(checking_period)s AND c.time < ts.t
+            ) l ON TRUE
+            GROUP BY ts.i
+            ORDER BY ts.i
+        """
+
+    # Override
+    def convert_window_row(self, row: Sequence) -> Optional[int]:
+        total_lead_time, lead_times_count = row
+        if lead_times_count == 0:
+            return None
+        return int(total_lead_time.total_seconds() / lead_times_count)
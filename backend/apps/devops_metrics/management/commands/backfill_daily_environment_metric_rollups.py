@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.dashboard.metrics.computation_base import get_day
+from apps.dashboard.models import Environment
+from apps.devops_metrics.models import Deployment, ServiceStatusReport
+from apps.devops_metrics.rollups import update_daily_environment_metric_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Computes the daily metric rollups of environments from their raw events; '
+        'existing rollups of the days in the period are replaced'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--environment-id', type=int, default=None, help='ID of environment (all environments by default)')
+        parser.add_argument('--first-day', type=date.fromisoformat, default=None,
+                            help='First day of period, e.g. 2022-01-01 (the day of the earliest event by default)')
+        parser.add_argument('--last-day', type=date.fromisoformat, default=None, help='Last day of period (today by default)')
+        parser.add_argument('--chunk-days', type=int, default=30, help='Number of days computed and saved at once')
+
+    def handle(self, *args, **options):
+        environments = Environment.objects.order_by('id')
+        if options['environment_id'] is not None:
+            environments = environments.filter(id=options['environment_id'])
+        last_day = options['last_day'] or get_day(timezone.now())
+        chunk_length = timedelta(days=options['chunk_days'])
+        for environment in environments:
+            first_day = options['first_day'] or self._get_day_of_earliest_event(environment)
+            if first_day is None:
+                continue
+            saved_rollups_count = 0
+            chunk_first_day = first_day
+            while chunk_first_day <= last_day:
+                chunk_last_day = min(chunk_first_day + chunk_length - timedelta(days=1), last_day)
+                saved_rollups_count += update_daily_environment_metric_rollups(environment, chunk_first_day, chunk_last_day)
+                chunk_first_day = chunk_last_day + timedelta(days=1)
+            self.stdout.write(f"Environment {environment.id}: {saved_rollups_count} daily rollups saved.")
+        self.stdout.write(self.style.SUCCESS(f"Operation completed successfully."))
+
+    @staticmethod
+    def _get_day_of_earliest_event(environment: Environment):
+        earliest_event_times = [
+            Deployment.objects.filter(environment=environment).aggregate(time=Min('time'))['time'],
+            ServiceStatusReport.objects.filter(environment=environment).aggregate(time=Min('time'))['time'],
+        ]
+        earliest_event_times = [t for t in earliest_event_times if t is not None]
+        if not earliest_event_times:
+            return None
+        return get_day(min(earliest_event_times))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.models import Environment
+from apps.devops_metrics.compaction import compact_service_status_reports, get_service_status_reports_lateness_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes the service status reports that carry no information for the metrics '
+        '(i.e. UP reports between the first and the last UP report of a run, before the lateness horizon); '
+        'the metrics stay the same'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--environment-id', type=int, default=None, help='ID of environment (all environments by default)')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Number of reports scanned (and deleted) at once')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the reports to be deleted')
+
+    def handle(self, *args, **options):
+        environments = Environment.objects.order_by('id')
+        if options['environment_id'] is not None:
+            environments = environments.filter(id=options['environment_id'])
+        horizon = get_service_status_reports_lateness_horizon()
+        for environment in environments:
+            deleted_reports_count = compact_service_status_reports(environment, horizon, options['chunk_size'], options['dry_run'])
+            verb = "to be deleted" if options['dry_run'] else "deleted"
+            self.stdout.write(f"Environment {environment.id}: {deleted_reports_count} service status reports {verb}.")
+        self.stdout.write(self.style.SUCCESS(f"Operation completed successfully."))
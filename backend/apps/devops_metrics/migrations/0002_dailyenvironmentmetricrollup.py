@@ -0,0 +1,39 @@
+# Generated by Django 2.2.27 on 2026-10-18 19:54
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_quality_committee_group'),
+        ('devops_metrics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyEnvironmentMetricRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('deployments_count', models.PositiveIntegerField(default=0)),
+                ('failed_deployments_count', models.PositiveIntegerField(default=0)),
+                ('first_passed_deployment_time', models.DateTimeField(blank=True, null=True)),
+                ('last_passed_deployment_time', models.DateTimeField(blank=True, null=True)),
+                ('lead_times_sum', models.DurationField(default=datetime.timedelta(0))),
+                ('lead_times_count', models.PositiveIntegerField(default=0)),
+                ('down_times_sum', models.DurationField(default=datetime.timedelta(0))),
+                ('down_times_count', models.PositiveIntegerField(default=0)),
+                ('environment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metric_rollups', to='dashboard.Environment')),
+            ],
+            options={
+                'ordering': ('-day',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyenvironmentmetricrollup',
+            constraint=models.UniqueConstraint(fields=('environment', 'day'), name='unique_day_in_environment_metric_rollups'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.27 on 2026-10-18 20:17
+
+from django.conf import settings
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dashboard', '0002_quality_committee_group'),
+        ('devops_metrics', '0002_dailyenvironmentmetricrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionReceipt',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('changelist', 'changelist'), ('deployment', 'deployment'), ('service-status-report', 'service status report'), ('coverage-report', 'coverage report')], max_length=30)),
+                ('records', django.contrib.postgres.fields.jsonb.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('succeeded', 'succeeded'), ('failed', 'failed')], default='pending', max_length=10)),
+                ('results', django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True)),
+                ('creation_time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finish_time', models.DateTimeField(blank=True, null=True)),
+                ('creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('environment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='dashboard.Environment')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingestion_receipts', to='dashboard.Project')),
+            ],
+            options={
+                'ordering': ('-creation_time',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ingestionreceipt',
+            index=models.Index(fields=['project', 'status', 'creation_time'], name='ingestion_receipt_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.27 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devops_metrics', '0003_ingestionreceipt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changelist',
+            index=models.Index(fields=['project', 'time'], name='changelist_project_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deployment',
+            index=models.Index(fields=['environment', 'status', 'time'], name='deployment_env_status_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicestatusreport',
+            index=models.Index(fields=['environment', 'time'], name='status_report_env_time_idx'),
+        ),
+    ]
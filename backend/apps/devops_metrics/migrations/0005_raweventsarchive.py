@@ -0,0 +1,24 @@
+# Generated by Django 2.2.27 on 2026-10-18 20:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_hot_query_indexes'),
+        ('devops_metrics', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawEventsArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('horizon', models.DateTimeField()),
+                ('update_time', models.DateTimeField(auto_now=True)),
+                ('environment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='raw_events_archive', to='dashboard.Environment')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.27 on 2026-10-18 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devops_metrics', '0005_raweventsarchive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deployment',
+            index=models.Index(fields=['environment', 'time'], name='deployment_env_time_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.27 on 2026-10-18 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devops_metrics', '0006_deployment_env_time_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingestionreceipt',
+            index=models.Index(condition=models.Q(status='pending'), fields=['creation_time'], name='ingestion_receipt_stale_idx'),
+        ),
+    ]
@@ -1,3 +1,7 @@
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
@@ -45,6 +49,9 @@ class ChangeList(ExportModelOperationsMixin('ChangeList'), SealableModel):
             models.UniqueConstraint(fields=['project', 'change_list_id'], name='unique_change_list_id_in_project'),
             models.UniqueConstraint(fields=['project', 'commit_hash'], name='unique_commit_hash_in_project'),
         ]
+        indexes = [
+            models.Index(fields=['project', 'time'], name='changelist_project_time_idx'),
+        ]
         ordering = ('-time',)
 
     def __str__(self):
@@ -100,6 +107,11 @@ class Deployment(ExportModelOperationsMixin('Deployment'), SealableModel):
     time = models.DateTimeField(default=timezone.now, blank=True)
 
     class Meta:
+        indexes = [
+            models.Index(fields=['environment', 'status', 'time'], name='deployment_env_status_time_idx'),
+            # Of the pages of the deployments list (see `KeysetPagination`)
+            models.Index(fields=['environment', 'time'], name='deployment_env_time_idx'),
+        ]
         ordering = ('-time',)
 
     def __str__(self):
@@ -126,7 +138,106 @@ class ServiceStatusReport(ExportModelOperationsMixin('ServiceStatusReport'), Sea
     time = models.DateTimeField(default=timezone.now, blank=True)
 
     class Meta:
+        indexes = [
+            models.Index(fields=['environment', 'time'], name='status_report_env_time_idx'),
+        ]
         ordering = ('-time',)
 
     def __str__(self):
         return "%s" % self.status
+
+
+class DailyEnvironmentMetricRollup(models.Model):
+    """
+    Per-day aggregates of the raw DevOps events of an environment.
+
+    Days are bounded the same way as the daily metric graphs (see `get_day_start`).
+    Rows are recomputed from the raw events whenever they change; so they are derived data and can be rebuilt anytime.
+    """
+    environment = models.ForeignKey(Environment, on_delete=models.CASCADE, related_name='daily_metric_rollups')
+    day = models.DateField()
+    deployments_count = models.PositiveIntegerField(default=0)
+    failed_deployments_count = models.PositiveIntegerField(default=0)
+    first_passed_deployment_time = models.DateTimeField(null=True, blank=True)
+    last_passed_deployment_time = models.DateTimeField(null=True, blank=True)
+    # Of the changelists whose first passed deployment on the environment happened in the day
+    lead_times_sum = models.DurationField(default=timedelta(0))
+    lead_times_count = models.PositiveIntegerField(default=0)
+    # Of the outages (DOWN->UP transitions of the environment) restored in the day
+    down_times_sum = models.DurationField(default=timedelta(0))
+    down_times_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['environment', 'day'], name='unique_day_in_environment_metric_rollups'),
+        ]
+        ordering = ('-day',)
+
+    @property
+    def passed_deployments_count(self):
+        return self.deployments_count - self.failed_deployments_count
+
+    def __str__(self):
+        return f"{self.environment} {self.day}"
+
+
+class RawEventsArchive(models.Model):
+    """
+    The deployments and service status reports of the environment before the horizon are rolled up into the daily
+     rollups and deleted (see `archive_old_raw_events`); so the rollups of those days are never recomputed.
+    """
+    environment = models.OneToOneField(Environment, on_delete=models.CASCADE, related_name='raw_events_archive')
+    horizon = models.DateTimeField()
+    update_time = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.environment} before {self.horizon}"
+
+
+class IngestionReceipt(models.Model):
+    """
+    Records posted to a create endpoint with `?async=1`; they are written later (in batches) by a Celery task,
+     and the outcome is kept here to be queried by the reporter.
+    """
+    KIND_CHANGELIST = 'changelist'
+    KIND_DEPLOYMENT = 'deployment'
+    KIND_SERVICE_STATUS_REPORT = 'service-status-report'
+    KIND_COVERAGE_REPORT = 'coverage-report'
+    KIND_CHOICES = (
+        (KIND_CHANGELIST, 'changelist'),
+        (KIND_DEPLOYMENT, 'deployment'),
+        (KIND_SERVICE_STATUS_REPORT, 'service status report'),
+        (KIND_COVERAGE_REPORT, 'coverage report'),
+    )
+    STATUS_PENDING = 'pending'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'pending'),
+        (STATUS_SUCCEEDED, 'succeeded'),
+        (STATUS_FAILED, 'failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='ingestion_receipts')
+    environment = models.ForeignKey(Environment, on_delete=models.CASCADE, null=True, blank=True)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    # As posted (after validating their shape)
+    records = JSONField()
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # The results of the records (e.g. their IDs or errors), in order
+    results = JSONField(null=True, blank=True)
+    creation_time = models.DateTimeField(default=timezone.now)
+    finish_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'status', 'creation_time'], name='ingestion_receipt_pending_idx'),
+            # Of the sweep of the stale pending receipts (of all projects); `STATUS_PENDING`
+            models.Index(fields=['creation_time'], name='ingestion_receipt_stale_idx', condition=models.Q(status='pending')),
+        ]
+        ordering = ('-creation_time',)
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
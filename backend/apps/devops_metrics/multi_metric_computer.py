@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from apps.dashboard.metrics import instrumentation
+from apps.dashboard.metrics.computation_base import ConsecutiveTimestampsMetricComputerMixin, unzip_columns
+from apps.dashboard.models import Environment
+from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer
+from apps.devops_metrics.constants import (
+    KEY_CHANGE_FAILURE_RATE,
+    KEY_DEPLOYMENT_FREQUENCY,
+    KEY_LEAD_TIME,
+    KEY_TIME_TO_RESTORE)
+from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer
+from apps.devops_metrics.lead_time.computation import LeadTimeComputer
+from apps.devops_metrics.metric_computer import MetricComputer
+from apps.devops_metrics.models import ChangeList, Deployment, ServiceStatusReport
+from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer
+
+TMetrics = Dict[str, Optional[float]]
+
+
+class MultiMetricComputer(MetricComputer[TMetrics]):
+    """
+    Computes all the DevOps metrics of an environment together, keyed by the metric keys (e.g. `KEY_LEAD_TIME`).
+
+    The deployments, changelists and service status reports are loaded once and shared between the metrics;
+     the values are the same as the ones of the metrics' own computers.
+    """
+
+    # Override
+    def compute_for_consecutive_timestamps(
+            self,
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, TMetrics]]:
+        last_timestamp = first_timestamp + (num_timestamps-1) * step_length
+        first_checking_start = first_timestamp - self.checking_period
+        deployments = list(Deployment.objects
+                           .filter(environment=self.environment)
+                           .filter(time__gte=first_checking_start)
+                           .filter(time__lt=last_timestamp)
+                           .order_by('time', 'id')
+                           .values_list('time', 'status', 'change_list_id'))
+        changelists = list(ChangeList.objects
+                           .filter(project_id=self.environment.project_id)
+                           .filter(time__gte=first_checking_start)
+                           .filter(time__lt=last_timestamp)
+                           .order_by('time', 'id')
+                           .values_list('time', 'id'))
+        service_status_reports = list(ServiceStatusReport.objects
+                                      .filter(environment=self.environment)
+                                      .filter(time__gte=first_checking_start)
+                                      .filter(time__lt=last_timestamp)
+                                      .order_by('time', 'id')
+                                      .values_list('time', 'status'))
+        self._warn_about_performance_if_operations_count_is_too_large(
+            num_timestamps + len(deployments) + len(changelists) + len(service_status_reports))
+        return self.compute_for_rows(deployments, changelists, service_status_reports, first_timestamp, num_timestamps, step_length)
+
+    def compute_for_rows(
+            self,
+            deployments: Sequence[Tuple[datetime, str, int]],
+            changelists: Sequence[Tuple[datetime, int]],
+            service_status_reports: Sequence[Tuple[datetime, str]],
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, TMetrics]]:
+        """
+        Gets the time-sorted rows covering the checking periods of the timestamps:
+         `(time, status, change_list_id)` of the deployments and `(time, status)` of the service status reports of the
+         environment, and `(time, id)` of the changelists of its project.
+        """
+        deployment_times, deployment_statuses, _ = unzip_columns(deployments, 3)
+        passed_deployment_times = [t for t, s in zip(deployment_times, deployment_statuses) if s == Deployment.STATUS_PASS]
+        # The deployments are sorted by time; so the first one of each changelist is the earliest one.
+        first_passed_deployment_times: Dict[int, datetime] = {}
+        for deployment_time, status, changelist_id in deployments:
+            if status == Deployment.STATUS_PASS:
+                first_passed_deployment_times.setdefault(changelist_id, deployment_time)
+        changelist_times, changelist_ids = unzip_columns(changelists, 2)
+        report_times, report_statuses = unzip_columns(service_status_reports, 2)
+
+        args = (first_timestamp, num_timestamps, step_length)
+        metrics_data_points = {
+            KEY_DEPLOYMENT_FREQUENCY: self._get_computer(DeploymentFrequencyComputer).compute_for_passed_deployment_times(
+                passed_deployment_times, *args),
+            KEY_LEAD_TIME: self._get_computer(LeadTimeComputer).compute_for_changelists(
+                changelist_times, [first_passed_deployment_times.get(i) for i in changelist_ids], *args),
+            KEY_TIME_TO_RESTORE: self._get_computer(TimeToRestoreComputer).compute_for_service_status_reports(
+                report_times, report_statuses, *args),
+            KEY_CHANGE_FAILURE_RATE: self._get_computer(ChangeFailureRateComputer).compute_for_deployments(
+                deployment_times, deployment_statuses, *args),
+        }
+        timestamps = [timestamp for timestamp, _ in metrics_data_points[KEY_DEPLOYMENT_FREQUENCY]]
+        return [
+            (timestamp, {key: data_points[i][1] for key, data_points in metrics_data_points.items()})
+            for i, timestamp in enumerate(timestamps)
+        ]
+
+    def _get_computer(self, computer_cls):
+        return computer_cls(self.environment, self.checking_period)
+
+
+def compute_metrics_of_environments(
+        environments: Sequence[Environment],
+        checking_period: timedelta,
+        timestamp: datetime,
+) -> Dict[int, TMetrics]:
+    """
+    Computes all the DevOps metrics of many environments at the timestamp, keyed by the environment IDs.
+
+    The rows of all the environments are loaded together (three queries in total) and grouped by environment;
+     so the cost doesn't grow by a query per environment.
+    """
+    with instrumentation.measure_metric_computation(compute_metrics_of_environments.__name__, num_timestamps=len(environments)):
+        return _compute_metrics_of_environments(environments, checking_period, timestamp)
+
+
+def _compute_metrics_of_environments(
+        environments: Sequence[Environment],
+        checking_period: timedelta,
+        timestamp: datetime,
+) -> Dict[int, TMetrics]:
+    environment_ids = [environment.id for environment in environments]
+    project_ids = {environment.project_id for environment in environments}
+    checking_start = timestamp - checking_period
+    deployments_of_environments = defaultdict(list)
+    for environment_id, *row in (Deployment.objects
+                                 .filter(environment_id__in=environment_ids)
+                                 .filter(time__gte=checking_start)
+                                 .filter(time__lt=timestamp)
+                                 .order_by('time', 'id')
+                                 .values_list('environment_id', 'time', 'status', 'change_list_id')):
+        deployments_of_environments[environment_id].append(tuple(row))
+    changelists_of_projects = defaultdict(list)
+    for project_id, *row in (ChangeList.objects
+                             .filter(project_id__in=project_ids)
+                             .filter(time__gte=checking_start)
+                             .filter(time__lt=timestamp)
+                             .order_by('time', 'id')
+                             .values_list('project_id', 'time', 'id')):
+        changelists_of_projects[project_id].append(tuple(row))
+    reports_of_environments = defaultdict(list)
+    for environment_id, *row in (ServiceStatusReport.objects
+                                 .filter(environment_id__in=environment_ids)
+                                 .filter(time__gte=checking_start)
+                                 .filter(time__lt=timestamp)
+                                 .order_by('time', 'id')
+                                 .values_list('environment_id', 'time', 'status')):
+        reports_of_environments[environment_id].append(tuple(row))
+
+    metrics_of_environments: Dict[int, TMetrics] = {}
+    for environment in environments:
+        computer = MultiMetricComputer(environment, checking_period)
+        [(_, metrics)] = computer.compute_for_rows(
+            deployments_of_environments[environment.id],
+            changelists_of_projects[environment.project_id],
+            reports_of_environments[environment.id],
+            first_timestamp=timestamp,
+            num_timestamps=1,
+            step_length=ConsecutiveTimestampsMetricComputerMixin.DEFAULT_CONSECUTIVE_TIMESTAMPS_DIFFERENCE,
+        )
+        metrics_of_environments[environment.id] = metrics
+    return metrics_of_environments
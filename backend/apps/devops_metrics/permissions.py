@@ -2,6 +2,7 @@ import logging
 from django.conf import settings
 from rest_framework.permissions import BasePermission
 from apps.dashboard.models import Project
+from apps.dashboard.project_token_cache import token_belongs_to_project
 from apps.devops_metrics.constants import PROJECT_ID_URL_PARAMETER
 
 
@@ -23,13 +24,7 @@ class NestedApiProjectTokenPermission(BasePermission):
             logger.debug(f"Project id url parameter not found. (request url parameters : {request_url_parameters})")
             return False
 
-        try:
-            project = Project.objects.get(pk=project_id)
-        except Project.DoesNotExist:
-            logger.debug(f"Project with id {project_id} not found.")
-            return False
-
-        if request_project_token == project.auth_token.key:
+        if token_belongs_to_project(request_project_token, project_id):
             return True
         else:
             logger.debug(f"Access token ({request_project_token}) is not valid for project {project_id}.")
@@ -43,7 +38,7 @@ class ApiProjectTokenPermission(BasePermission):
     def has_object_permission(self, request, view, obj):
         request_project_token = request.headers.get(settings.PROJECT_TOKEN_HEADER)
         if isinstance(obj, Project):
-            if request_project_token == obj.auth_token.key:
+            if token_belongs_to_project(request_project_token, obj.id):
                 return True
             else:
                 logger.debug(f"Access token ({request_project_token}) is not valid for project {obj.id}.")
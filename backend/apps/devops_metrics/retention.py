@@ -0,0 +1,141 @@
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from apps.dashboard.metrics.computation_base import get_day, get_day_start
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_environment_scope
+from apps.dashboard.models import Environment
+from apps.devops_metrics.constants import MIN_RAW_EVENTS_RETENTION_DAYS
+from apps.devops_metrics.models import Deployment, RawEventsArchive, ServiceStatusReport
+from apps.devops_metrics.rollups import get_raw_events_archive_horizon, replace_daily_environment_metric_rollups
+
+
+def get_raw_events_retention_horizon() -> Optional[datetime]:
+    """
+    Returns the start of the day before which the raw deployments and service status reports are archived
+     (see `archive_old_raw_events`), or None if they are kept forever (i.e. `DEVOPS_METRICS_RAW_EVENTS_RETENTION_DAYS` is 0).
+    Raw events are only archived while the daily graphs are answered from the rollups.
+    """
+    retention_days = settings.DEVOPS_METRICS_RAW_EVENTS_RETENTION_DAYS
+    if not retention_days:
+        return None
+    if not settings.DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED:
+        raise ValueError("Raw events can't be archived while the daily rollups are disabled "
+                         "(`DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED`); the archived periods would have no metrics.")
+    if retention_days < MIN_RAW_EVENTS_RETENTION_DAYS:
+        raise ValueError(f"Raw events must be kept at least {MIN_RAW_EVENTS_RETENTION_DAYS} days; "
+                         f"but the retention is {retention_days} days.")
+    return get_day_start(get_day(timezone.now() - timedelta(days=retention_days)))
+
+
+def _get_first_day(environment: Environment, start: Optional[datetime], end: datetime) -> Optional[date]:
+    """Returns the day of the earliest event in [start, end)."""
+    deployments = Deployment.objects.filter(environment=environment).filter(time__lt=end)
+    reports = ServiceStatusReport.objects.filter(environment=environment).filter(time__lt=end)
+    if start is not None:
+        deployments = deployments.filter(time__gte=start)
+        reports = reports.filter(time__gte=start)
+    earliest_event_times = [
+        deployments.aggregate(time=Min('time'))['time'],
+        reports.aggregate(time=Min('time'))['time'],
+    ]
+    earliest_event_times = [t for t in earliest_event_times if t is not None]
+    if not earliest_event_times:
+        return None
+    return get_day(min(earliest_event_times))
+
+
+def _iterate_months(first_day: date, horizon: datetime) -> Iterator[Tuple[date, datetime, datetime]]:
+    """
+    Yields the first day, start and end of the months from the first day to the horizon;
+     the first one starts at the first day, and the last one ends at the horizon.
+    """
+    month_first_day = first_day
+    while get_day_start(month_first_day) < horizon:
+        next_month_start = (month_first_day.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield month_first_day, get_day_start(month_first_day), min(get_day_start(next_month_start), horizon)
+        month_first_day = next_month_start
+
+
+def _get_service_status_report_to_keep(environment: Environment, horizon: datetime) -> Optional[int]:
+    """
+    Returns the ID of the report before the horizon which tells the status at the horizon: the last UP report, or the
+     first DOWN report of the outage ongoing at the horizon (see `OutageIntervals`); so the windows after the horizon
+     get the same outages.
+    """
+    reports = ServiceStatusReport.objects.filter(environment=environment).filter(time__lt=horizon).order_by('time', 'id')
+    last_report = reports.reverse().values_list('id', 'status').first()
+    if last_report is None:
+        return None
+    last_report_id, last_status = last_report
+    if last_status == ServiceStatusReport.STATUS_UP:
+        return last_report_id
+    last_up_time = reports.filter(status=ServiceStatusReport.STATUS_UP).aggregate(time=Max('time'))['time']
+    if last_up_time is not None:
+        reports = reports.filter(time__gt=last_up_time)
+    return reports.values_list('id', flat=True).first()
+
+
+def archive_old_raw_events(environment: Environment, horizon: datetime) -> int:
+    """
+    Rolls up the raw deployments and service status reports of the environment before the horizon (a day start) into
+     the daily rollups, and deletes them; a month at a time. Returns the number of the deleted events.
+
+    These are kept, so the metrics of the windows after the horizon (and their rollups) stay the same:
+     the report telling the status at the horizon, and the passed deployments of the changelists which are deployed
+     after the horizon too (for their lead times). The changelists are kept as well.
+    The earlier windows are answered from the rollups, only for the daily (or longer) steps of the graphs;
+     the other metrics of those windows are rejected (see `get_raw_events_archive_horizon`).
+    """
+    previous_horizon = get_raw_events_archive_horizon(environment.id)
+    if previous_horizon is not None and previous_horizon >= horizon:
+        return 0
+    deleted_events_count = 0
+    with transaction.atomic():
+        first_day = _get_first_day(environment, previous_horizon, horizon)
+        if first_day is not None:
+            # All the months are rolled up before deleting any; since the rollups of a month depend on the earlier
+            #  events (e.g. the outage ongoing at its start).
+            for month_first_day, _, period_end in _iterate_months(first_day, horizon):
+                replace_daily_environment_metric_rollups(environment, month_first_day,
+                                                         get_day(period_end - timedelta(microseconds=1)))
+            deleted_events_count = _delete_raw_events(environment, first_day, horizon)
+        RawEventsArchive.objects.update_or_create(environment=environment, defaults={'horizon': horizon})
+    # The graphs of the windows before the horizon (computed from the raw events) have changed.
+    MetricGraphCache().invalidate_now_and_on_commit(get_environment_scope(environment.id))
+    return deleted_events_count
+
+
+def _delete_raw_events(environment: Environment, first_day: date, horizon: datetime) -> int:
+    kept_report_id = _get_service_status_report_to_keep(environment, horizon)
+    deleted_events_count = 0
+    with connection.cursor() as cursor:
+        for i, (_, period_start, period_end) in enumerate(_iterate_months(first_day, horizon)):
+            if i == 0:
+                # Including the events kept by the previous archiving, if they aren't needed anymore
+                period_start = None
+            cursor.execute(f"""
+                DELETE FROM {Deployment._meta.db_table} AS deployment
+                WHERE environment_id = %(environment_id)s AND time < %(end)s
+                    AND (%(start)s::timestamptz IS NULL OR time >= %(start)s)
+                    AND NOT (status = %(passed)s AND EXISTS (
+                        SELECT FROM {Deployment._meta.db_table} AS later_deployment
+                        WHERE later_deployment.change_list_id = deployment.change_list_id
+                            AND later_deployment.environment_id = %(environment_id)s
+                            AND later_deployment.status = %(passed)s
+                            AND later_deployment.time >= %(horizon)s
+                    ))
+            """, {'environment_id': environment.id, 'start': period_start, 'end': period_end, 'horizon': horizon,
+                  'passed': Deployment.STATUS_PASS})
+            deleted_events_count += cursor.rowcount
+            cursor.execute(f"""
+                DELETE FROM {ServiceStatusReport._meta.db_table}
+                WHERE environment_id = %(environment_id)s AND time < %(end)s
+                    AND (%(start)s::timestamptz IS NULL OR time >= %(start)s) AND id IS DISTINCT FROM %(kept_report_id)s
+            """, {'environment_id': environment.id, 'start': period_start, 'end': period_end, 'kept_report_id': kept_report_id})
+            deleted_events_count += cursor.rowcount
+    return deleted_events_count
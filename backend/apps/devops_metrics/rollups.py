@@ -0,0 +1,222 @@
+import logging
+import math
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Generic, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Max, Min, Q
+
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_environment_scope
+from apps.dashboard.metrics.computation_base import TMetric, SlidingTimeWindows, get_day, get_day_start
+from apps.dashboard.models import Environment
+from apps.devops_metrics.models import ChangeList, DailyEnvironmentMetricRollup, Deployment, RawEventsArchive, ServiceStatusReport
+
+logger = logging.getLogger(__name__)
+
+_ONE_DAY = timedelta(days=1)
+
+
+def build_daily_environment_metric_rollups(environment: Environment, first_day: date, last_day: date) -> List[DailyEnvironmentMetricRollup]:
+    """
+    Computes the rollups of the days in [first_day, last_day] from the raw events (without saving them).
+    Days without any events get no rollup.
+    """
+    period_start = get_day_start(first_day)
+    period_end = get_day_start(last_day + _ONE_DAY)
+    rollups: Dict[date, DailyEnvironmentMetricRollup] = defaultdict(lambda: DailyEnvironmentMetricRollup(environment=environment))
+
+    deployments = (Deployment.objects
+                   .filter(environment=environment)
+                   .filter(time__gte=period_start)
+                   .filter(time__lt=period_end)
+                   .order_by('time', 'id')
+                   .values_list('time', 'status'))
+    for deployment_time, status in deployments:
+        rollup = rollups[get_day(deployment_time)]
+        rollup.deployments_count += 1
+        if status == Deployment.STATUS_FAIL:
+            rollup.failed_deployments_count += 1
+            continue
+        if rollup.first_passed_deployment_time is None:
+            rollup.first_passed_deployment_time = deployment_time
+        rollup.last_passed_deployment_time = deployment_time
+
+    for changelist_time, deployment_time in _get_changelists_first_deployed_in_period(environment, period_start, period_end):
+        rollup = rollups[get_day(deployment_time)]
+        rollup.lead_times_sum += deployment_time - changelist_time
+        rollup.lead_times_count += 1
+
+    for down_time, up_time in _get_outages_restored_in_period(environment, period_start, period_end):
+        rollup = rollups[get_day(up_time)]
+        rollup.down_times_sum += up_time - down_time
+        rollup.down_times_count += 1
+
+    for day, rollup in rollups.items():
+        rollup.day = day
+    return sorted(rollups.values(), key=lambda r: r.day)
+
+
+def _get_changelists_first_deployed_in_period(environment: Environment, period_start: datetime, period_end: datetime) -> List[Tuple[datetime, datetime]]:
+    deployed_changelist_ids = (Deployment.objects
+                               .filter(environment=environment)
+                               .filter(status=Deployment.STATUS_PASS)
+                               .filter(time__gte=period_start)
+                               .filter(time__lt=period_end)
+                               .values('change_list_id'))
+    return list(ChangeList.objects
+                .filter(project_id=environment.project_id)
+                # Only to narrow down the changelists (instead of all of the project); the first deployment is checked below.
+                .filter(id__in=deployed_changelist_ids)
+                .annotate(first_passed_deployment_time=Min('deployment__time', filter=Q(
+                    deployment__environment=environment,
+                    deployment__status=Deployment.STATUS_PASS,
+                )))
+                .filter(first_passed_deployment_time__gte=period_start)
+                .filter(first_passed_deployment_time__lt=period_end)
+                .order_by()
+                .values_list('time', 'first_passed_deployment_time'))
+
+
+def _get_outages_restored_in_period(environment: Environment, period_start: datetime, period_end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Pairs DOWN->UP transitions the same way as `OutageIntervals`, considering the outage ongoing at the period start."""
+    reports = ServiceStatusReport.objects.filter(environment=environment)
+    # Any UP report ends the ongoing outage (if any); so the outage ongoing at the period start (if any)
+    #  started at the first DOWN report after the last UP report.
+    last_up_time_before_period = (reports
+                                  .filter(status=ServiceStatusReport.STATUS_UP)
+                                  .filter(time__lt=period_start)
+                                  .aggregate(time=Max('time'))['time'])
+    ongoing_outage_reports = reports.filter(status=ServiceStatusReport.STATUS_DOWN).filter(time__lt=period_start)
+    if last_up_time_before_period is not None:
+        ongoing_outage_reports = ongoing_outage_reports.filter(time__gt=last_up_time_before_period)
+    down_time = ongoing_outage_reports.aggregate(time=Min('time'))['time']
+
+    outages: List[Tuple[datetime, datetime]] = []
+    period_reports = (reports
+                      .filter(time__gte=period_start)
+                      .filter(time__lt=period_end)
+                      .order_by('time', 'id')
+                      .values_list('time', 'status'))
+    for report_time, status in period_reports:
+        if status == ServiceStatusReport.STATUS_DOWN:
+            if down_time is None:
+                down_time = report_time
+        elif down_time is not None:
+            outages.append((down_time, report_time))
+            down_time = None
+    return outages
+
+
+def get_raw_events_archive_horizon(environment_id: int) -> Optional[datetime]:
+    """Returns the time before which the raw events of the environment are archived, if any."""
+    return (RawEventsArchive.objects
+            .filter(environment_id=environment_id)
+            .values_list('horizon', flat=True)
+            .first())
+
+
+def get_raw_events_archive_horizons(environment_ids: Sequence[int]) -> Dict[int, datetime]:
+    """Same as `get_raw_events_archive_horizon`, for many environments at once (keyed by the archived ones' IDs)."""
+    return dict(RawEventsArchive.objects
+                .filter(environment_id__in=environment_ids)
+                .values_list('environment_id', 'horizon'))
+
+
+def update_daily_environment_metric_rollups(environment: Environment, first_day: date, last_day: date) -> int:
+    """
+    Replaces the rollups of the days in [first_day, last_day] with freshly computed ones. Returns the number of saved rollups.
+    The days before the archive horizon of the environment are skipped; their raw events are archived (see `RawEventsArchive`).
+    """
+    horizon = get_raw_events_archive_horizon(environment.id)
+    if horizon is not None:
+        first_day = max(first_day, get_day(horizon))
+    if first_day > last_day:
+        return 0
+    return replace_daily_environment_metric_rollups(environment, first_day, last_day)
+
+
+def replace_daily_environment_metric_rollups(environment: Environment, first_day: date, last_day: date) -> int:
+    """Same as `update_daily_environment_metric_rollups`, but regardless of the retention horizon."""
+    rollups = build_daily_environment_metric_rollups(environment, first_day, last_day)
+    with transaction.atomic():
+        (DailyEnvironmentMetricRollup.objects
+         .filter(environment=environment)
+         .filter(day__gte=first_day)
+         .filter(day__lte=last_day)
+         .delete())
+        DailyEnvironmentMetricRollup.objects.bulk_create(rollups)
+        # The graphs answered from the rollups may have been cached since the raw events changed.
+        MetricGraphCache().invalidate_now_and_on_commit(get_environment_scope(environment.id), first_day)
+    return len(rollups)
+
+
+class DailyRollupMetricComputerMixin(ABC, Generic[TMetric]):
+    """
+    Answers consecutive timestamps from the `DailyEnvironmentMetricRollup`s; i.e. at most `checking_period` days rows per timestamp.
+
+    It is only used when the timestamps are day starts and the checking period is a whole number of days;
+     otherwise, the computation falls back to the raw events (the next class in the MRO).
+    Rollups are updated asynchronously; so the results may lag behind the raw events for a short while.
+
+    The metrics whose rollups don't give the same values as the raw events (e.g. the outages cut by the start of a window)
+     set `ARCHIVED_WINDOWS_ONLY`; so only the windows starting before the archive horizon (see `RawEventsArchive`) are
+     answered from the rollups, and the later ones from the raw events.
+    """
+    ARCHIVED_WINDOWS_ONLY = False
+
+    @abstractmethod
+    def compute_for_rollups(self, rollups: Sequence[DailyEnvironmentMetricRollup]) -> TMetric:
+        pass
+
+    def _is_aligned_to_days(self, first_timestamp: datetime, step_length: timedelta) -> bool:
+        return (
+            step_length % _ONE_DAY == timedelta(0)
+            and self.checking_period % _ONE_DAY == timedelta(0)
+            and first_timestamp == get_day_start(get_day(first_timestamp))
+        )
+
+    # Override
+    def compute_for_consecutive_timestamps(
+            self,
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, TMetric]]:
+        if not self._is_aligned_to_days(first_timestamp, step_length):
+            return super().compute_for_consecutive_timestamps(first_timestamp, num_timestamps, step_length)
+        if not self.ARCHIVED_WINDOWS_ONLY:
+            return self._compute_for_rollups_of_consecutive_timestamps(first_timestamp, num_timestamps, step_length)
+        horizon = get_raw_events_archive_horizon(self.environment.id)
+        archived_windows_count = 0
+        if horizon is not None:
+            # Of the windows starting before the horizon
+            archived_windows_count = min(max(math.ceil((horizon + self.checking_period - first_timestamp) / step_length), 0),
+                                         num_timestamps)
+        results = []
+        if archived_windows_count > 0:
+            results += self._compute_for_rollups_of_consecutive_timestamps(first_timestamp, archived_windows_count, step_length)
+        if archived_windows_count < num_timestamps:
+            results += super().compute_for_consecutive_timestamps(
+                first_timestamp + archived_windows_count * step_length, num_timestamps - archived_windows_count, step_length)
+        return results
+
+    def _compute_for_rollups_of_consecutive_timestamps(
+            self,
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, TMetric]]:
+        last_timestamp = first_timestamp + (num_timestamps-1) * step_length
+        rollups = list(DailyEnvironmentMetricRollup.objects
+                       .filter(environment=self.environment)
+                       .filter(day__gte=get_day(first_timestamp - self.checking_period))
+                       .filter(day__lt=get_day(last_timestamp))
+                       .order_by('day'))
+        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps * self.checking_period.days)
+        windows = SlidingTimeWindows([get_day_start(r.day) for r in rollups], self.checking_period)
+        return [
+            (current_dt, self.compute_for_rollups(rollups[start:end]))
+            for current_dt, start, end in windows.iterate(first_timestamp, num_timestamps, step_length)
+        ]
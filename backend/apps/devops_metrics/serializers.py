@@ -8,10 +8,14 @@ from apps.devops_metrics.constants import (
     ENVIRONMENT_ID_URL_PARAMETER,
     DEFAULT_CHECKING_PERIOD_DAYS,
     DEFAULT_PERIOD_IN_DAYS,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_NDJSON,
     MAX_PERIOD_IN_DAYS,
+    GRANULARITY_DAILY,
+    GRANULARITY_STEP_LENGTHS,
 )
 from apps.devops_metrics.models import ChangeList, \
-    Deployment, ServiceStatusReport
+    Deployment, ServiceStatusReport, IngestionReceipt
 from apps.utils import exception_utils
 from apps.utils.validation_utils import InconsistentDataError, SerializerValidateAndSaveMixin
 
@@ -70,6 +74,18 @@ class ChangeListSerializer(serializers.ModelSerializer, SerializerValidateAndSav
         raise e
 
 
+class ChangeListBulkItemSerializer(serializers.ModelSerializer):
+    """
+    An item of the bulk changelists endpoint. Its uniqueness is checked by `bulk_upsert_changelists`,
+     together with the other items.
+    """
+
+    class Meta:
+        model = ChangeList
+        fields = ['change_list_id', 'commit_hash', 'time', 'title']
+        validators = []
+
+
 class DeploymentSerializer(serializers.ModelSerializer):
     environment = serializers.PrimaryKeyRelatedField(read_only=True)
     commit_hash = serializers.CharField(write_only=True)
@@ -106,6 +122,16 @@ class DeploymentSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class DeploymentBulkItemSerializer(serializers.Serializer):
+    """
+    An item of the bulk deployments endpoint. Its changelist is resolved (and checked) by the view,
+     together with the changelists of the other items.
+    """
+    commit_hash = serializers.CharField()
+    status = serializers.ChoiceField(choices=Deployment.STATUS_CHOICES)
+    time = serializers.DateTimeField(default=timezone.now)
+
+
 class ServiceStatusReportSerializer(serializers.ModelSerializer):
     environment = serializers.PrimaryKeyRelatedField(read_only=True)
 
@@ -119,6 +145,13 @@ class ServiceStatusReportSerializer(serializers.ModelSerializer):
         return ServiceStatusReport.objects.create(**validated_data)
 
 
+class IngestionReceiptSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IngestionReceipt
+        fields = ['id', 'kind', 'environment', 'status', 'results', 'creation_time', 'finish_time']
+        read_only_fields = fields
+
+
 class MetricDataPointSerializer(serializers.Serializer):
     date = serializers.SerializerMethodField(method_name='get_data_point_date', read_only=True)
     value = serializers.SerializerMethodField(method_name='get_data_point_value', read_only=True)
@@ -151,6 +184,10 @@ class DailyMetricReportRequestParametersSerializer(serializers.Serializer):
     period_end_date = serializers.DateField(
         default=get_today_date,
     )
+    granularity = serializers.ChoiceField(
+        choices=list(GRANULARITY_STEP_LENGTHS),
+        default=GRANULARITY_DAILY,
+    )
 
     def validate(self, attrs):
         if attrs.get('period_start_date') is None:
@@ -166,3 +203,31 @@ class DailyMetricReportRequestParametersSerializer(serializers.Serializer):
             raise serializers.ValidationError(detail="Period end date must not be in the future.")
 
         return attrs
+
+
+class PortfolioRequestParametersSerializer(serializers.Serializer):
+    checking_period_days = serializers.IntegerField(
+        default=DEFAULT_CHECKING_PERIOD_DAYS,
+        min_value=1,
+    )
+    default_environments_only = serializers.BooleanField(
+        default=False,
+    )
+
+
+class ExportRequestParametersSerializer(serializers.Serializer):
+    file_format = serializers.ChoiceField(
+        choices=[EXPORT_FORMAT_NDJSON, EXPORT_FORMAT_CSV],
+        default=EXPORT_FORMAT_NDJSON,
+    )
+    start_time = serializers.DateTimeField(
+        default=None,
+    )
+    end_time = serializers.DateTimeField(
+        default=None,
+    )
+
+    def validate(self, attrs):
+        if attrs['start_time'] is not None and attrs['end_time'] is not None and attrs['start_time'] > attrs['end_time']:
+            raise serializers.ValidationError(detail="Period ends before it starts.")
+        return attrs
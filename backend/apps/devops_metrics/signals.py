@@ -0,0 +1,135 @@
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.dashboard.metrics.computation_base import get_day
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_environment_scope, get_project_changelists_scope
+from apps.devops_metrics.models import ChangeList, Deployment, ServiceStatusReport
+from apps.devops_metrics.tasks import update_daily_environment_metric_rollups_of_days
+
+
+# The days of the environments whose rollups are to be updated once the current transaction (of the thread) commits
+_pending_rollup_updates = threading.local()
+
+
+def _update_rollups_on_commit(environment_times: Iterable[Tuple[int, datetime]]) -> None:
+    """Queues the update of the rollups of the days of the events; each day once per transaction."""
+    if not hasattr(_pending_rollup_updates, 'days_of_environments'):
+        _pending_rollup_updates.days_of_environments = defaultdict(set)
+    for environment_id, time in environment_times:
+        _pending_rollup_updates.days_of_environments[environment_id].add(get_day(time).isoformat())
+    # The first callback to run queues the days of all the events of the transaction; the others find none.
+    #  (The days of a rolled back transaction are queued with the next one; updating them again is harmless.)
+    transaction.on_commit(_queue_pending_rollup_updates)
+
+
+def _queue_pending_rollup_updates() -> None:
+    days_of_environments: Dict[int, Set[str]] = getattr(_pending_rollup_updates, 'days_of_environments', {})
+    _pending_rollup_updates.days_of_environments = defaultdict(set)
+    for environment_id, days in days_of_environments.items():
+        update_daily_environment_metric_rollups_of_days.delay(environment_id=environment_id, days=sorted(days))
+
+
+def handle_deployments_change(deployments: Sequence[Deployment], created: bool = True) -> None:
+    """
+    Updates the data depending on the saved (or deleted) deployments.
+    Bulk operations, which don't send the model signals, must call it explicitly.
+    """
+    environment_ids = {d.environment_id for d in deployments}
+    if settings.DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED:
+        # The first passed deployment of the changelists (i.e. the days their lead times belong to) may change too.
+        passed_deployments = (Deployment.objects
+                              .filter(environment_id__in=environment_ids)
+                              .filter(change_list_id__in={d.change_list_id for d in deployments})
+                              .filter(status=Deployment.STATUS_PASS)
+                              .values_list('environment_id', 'time'))
+        _update_rollups_on_commit([*((d.environment_id, d.time) for d in deployments), *passed_deployments])
+    first_days = _get_first_days((d.environment_id, d.time) for d in deployments)
+    for environment_id in environment_ids:
+        MetricGraphCache().invalidate_now_and_on_commit(get_environment_scope(environment_id),
+                                                        first_days[environment_id] if created else None)
+
+
+def handle_changelists_change(changelists: Sequence[ChangeList], created: bool) -> None:
+    """
+    Updates the data depending on the saved (or deleted) changelists.
+    Bulk operations, which don't send the model signals, must call it explicitly.
+    """
+    if not created and settings.DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED:
+        # New changelists have no deployments yet.
+        first_passed_deployments = (Deployment.objects
+                                    .filter(change_list_id__in={c.id for c in changelists})
+                                    .filter(status=Deployment.STATUS_PASS)
+                                    .order_by('environment_id', 'change_list_id', 'time')
+                                    .distinct('environment_id', 'change_list_id')
+                                    .values_list('environment_id', 'time'))
+        _update_rollups_on_commit(first_passed_deployments)
+    first_days = _get_first_days((c.project_id, c.time) for c in changelists)
+    for project_id in {c.project_id for c in changelists}:
+        MetricGraphCache().invalidate_now_and_on_commit(get_project_changelists_scope(project_id),
+                                                        first_days[project_id] if created else None)
+
+
+def handle_service_status_reports_change(reports: Sequence[ServiceStatusReport], created: bool = True) -> None:
+    """
+    Updates the data depending on the saved (or deleted) service status reports.
+    Bulk operations, which don't send the model signals, must call it explicitly.
+    """
+    if settings.DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED:
+        # The outages that the next UP reports end may change too.
+        _update_rollups_on_commit([*((r.environment_id, r.time) for r in reports), *_get_next_up_report_times(reports)])
+    first_days = _get_first_days((r.environment_id, r.time) for r in reports)
+    for environment_id in {r.environment_id for r in reports}:
+        MetricGraphCache().invalidate_now_and_on_commit(get_environment_scope(environment_id),
+                                                        first_days[environment_id] if created else None)
+
+
+def _get_next_up_report_times(reports: Sequence[ServiceStatusReport]) -> List[Tuple[int, datetime]]:
+    """Gets the environment IDs and times of the first UP reports after the reports (if any); with one query."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT r.environment_id, (
+                SELECT u.time FROM {ServiceStatusReport._meta.db_table} u
+                WHERE u.environment_id = r.environment_id AND u.status = %s AND u.time > r.time
+                ORDER BY u.time
+                LIMIT 1
+            ) AS next_up_time
+            FROM unnest(%s::int[], %s::timestamptz[]) AS r(environment_id, time)
+        """, [ServiceStatusReport.STATUS_UP, [r.environment_id for r in reports], [r.time for r in reports]])
+        return [(environment_id, time) for environment_id, time in cursor.fetchall() if time is not None]
+
+
+def _get_first_days(scope_times: Iterable[Tuple[int, datetime]]) -> Dict[int, date]:
+    """
+    Gets the first (local) day of the times of each scope (environment or project id).
+    New events only change the metrics of the periods ending on or after their day, which the graph cache keeps apart.
+    """
+    first_days: Dict[int, date] = {}
+    for scope_id, time in scope_times:
+        day = get_day(time)
+        first_days[scope_id] = min(first_days.get(scope_id, day), day)
+    return first_days
+
+
+@receiver(post_save, sender=Deployment)
+@receiver(post_delete, sender=Deployment)
+def on_deployment_change(instance, created=False, **kwargs):
+    handle_deployments_change([instance], created=created)
+
+
+@receiver(post_save, sender=ChangeList)
+@receiver(post_delete, sender=ChangeList)
+def on_changelist_change(instance, created=False, **kwargs):
+    handle_changelists_change([instance], created=created)
+
+
+@receiver(post_save, sender=ServiceStatusReport)
+@receiver(post_delete, sender=ServiceStatusReport)
+def on_service_status_report_change(instance, created=False, **kwargs):
+    handle_service_status_reports_change([instance], created=created)
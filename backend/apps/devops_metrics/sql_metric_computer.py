@@ -0,0 +1,63 @@
+from abc import abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Sequence, Tuple
+
+from django.db import connection
+
+from apps.dashboard.metrics.computation_base import TMetric
+from apps.devops_metrics.metric_computer import MetricComputer
+
+
+class SqlMetricComputer(MetricComputer[TMetric]):
+    """
+    Computes the windows of all the timestamps in PostgreSQL; so only one row per timestamp leaves the database.
+
+    The query of a computer can use the `timestamps` relation, with the columns `i` (the index of the timestamp)
+     and `t` (the timestamp), and the named parameters of `_get_query_parameters`.
+    It must return one row per timestamp, ordered by `i`, starting with `i`.
+    The Python computers are the reference implementations; the SQL ones must give the same values.
+    """
+
+    _TIMESTAMPS_QUERY = """
+        WITH timestamps AS (
+            SELECT i, %(first_timestamp)s + i * %(step_length)s AS t
+            FROM generate_series(0, %(num_timestamps)s - 1) AS i
+        )
+    """
+
+    @abstractmethod
+    def get_windows_query(self) -> str:
+        pass
+
+    @abstractmethod
+    def convert_window_row(self, row: Sequence[Any]) -> TMetric:
+        """Gets a row of the query, without `i`."""
+
+    # Override
+    def compute_for_consecutive_timestamps(
+            self,
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, TMetric]]:
+        parameters = self._get_query_parameters(first_timestamp, num_timestamps, step_length)
+        with connection.cursor() as cursor:
+            cursor.execute(self._TIMESTAMPS_QUERY + self.get_windows_query(), parameters)
+            rows = cursor.fetchall()
+        assert len(rows) == num_timestamps, f"Expected {num_timestamps} rows but got: {len(rows)}"
+        return [
+            (first_timestamp + i * step_length, self.convert_window_row(row))
+            for i, *row in rows
+        ]
+
+    def _get_query_parameters(self, first_timestamp: datetime, num_timestamps: int, step_length: timedelta) -> Dict[str, Any]:
+        return {
+            'first_timestamp': first_timestamp,
+            'num_timestamps': num_timestamps,
+            'step_length': step_length,
+            'checking_period': self.checking_period,
+            'range_start': first_timestamp - self.checking_period,
+            'range_end': first_timestamp + (num_timestamps-1) * step_length,
+            'environment_id': self.environment.id,
+            'project_id': self.environment.project_id,
+        }
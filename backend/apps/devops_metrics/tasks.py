@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+from typing import List
+
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.utils import timezone
+
+from backend.celery import app
+from apps.dashboard.models import Environment
+from apps.devops_metrics.constants import TASK_ARCHIVE_OLD_RAW_EVENTS, TASK_WRITE_STALE_INGESTION_RECEIPTS
+from apps.devops_metrics.models import IngestionReceipt
+from apps.devops_metrics.retention import archive_old_raw_events, get_raw_events_retention_horizon
+from apps.devops_metrics.rollups import update_daily_environment_metric_rollups
+
+logger = get_task_logger(__name__)
+
+
+@app.task(name="Update daily environment metric rollups")
+def update_daily_environment_metric_rollups_of_days(environment_id: int, days: List[str]):
+    """
+    Args:
+        environment_id: ID of the environment
+        days: ISO-formatted dates of the days to update
+    """
+    try:
+        environment = Environment.objects.get(pk=environment_id)
+    except Environment.DoesNotExist:
+        logger.info(f"Environment {environment_id} doesn't exist anymore; its rollups are not updated.")
+        return
+    for day in sorted(set(days)):
+        day = date.fromisoformat(day)
+        update_daily_environment_metric_rollups(environment, day, day)
+    return f"Rollups of {len(days)} days of environment {environment_id} updated."
+
+
+@app.task(name="Write pending ingestion receipts")
+def write_pending_ingestion_receipts_of_project(project_id: int):
+    # Imported here, since the ingestion module starts this task.
+    from apps.devops_metrics.ingestion import MAX_WRITTEN_RECEIPTS, write_pending_ingestion_receipts
+    written_receipts_count = write_pending_ingestion_receipts(project_id)
+    if written_receipts_count == MAX_WRITTEN_RECEIPTS:
+        write_pending_ingestion_receipts_of_project.delay(project_id)
+    return f"{written_receipts_count} ingestion receipts of project {project_id} written."
+
+
+@app.task(name=TASK_WRITE_STALE_INGESTION_RECEIPTS)
+def write_stale_pending_ingestion_receipts():
+    """Writes the receipts pending for `ASYNC_INGESTION_STALE_RECEIPTS_MINUTES`; whose writer task was lost or failed."""
+    stale_before = timezone.now() - timedelta(minutes=settings.ASYNC_INGESTION_STALE_RECEIPTS_MINUTES)
+    project_ids = list(IngestionReceipt.objects
+                       .filter(status=IngestionReceipt.STATUS_PENDING)
+                       .filter(creation_time__lt=stale_before)
+                       .order_by()
+                       .values_list('project_id', flat=True)
+                       .distinct())
+    for project_id in project_ids:
+        try:
+            write_pending_ingestion_receipts_of_project(project_id)
+        except Exception:
+            logger.exception(f"Failed to write the pending ingestion receipts of project {project_id}.")
+    return f"Pending ingestion receipts of {len(project_ids)} projects written."
+
+
+@app.task(name=TASK_ARCHIVE_OLD_RAW_EVENTS)
+def archive_old_raw_events_of_environments():
+    horizon = get_raw_events_retention_horizon()
+    if horizon is None:
+        return "Raw events are kept forever."
+    deleted_events_count = 0
+    for environment in Environment.objects.order_by('id'):
+        deleted_events_count += archive_old_raw_events(environment, horizon)
+    return f"{deleted_events_count} raw events before {horizon} archived."
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer
 from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
 
@@ -39,3 +41,17 @@ class ChangeFailureRateComputerTest(MetricComputerTestBase):
     def test_cfr_should_be_none_when_no_data_exist(self):
         self._test_compute_for_single_timestamp(ChangeFailureRateComputer, time=200, checking_period=200,
                                                 expected_value=None)
+
+    def test_consecutive_computation_should_match_single_computations(self):
+        cl = self.add_changelist(id=0, time=100)
+        self.add_deployment(time=150, passed=True, changelist=cl)
+        self.add_deployment(time=160, passed=False, changelist=cl)
+        self.add_deployment(time=220, passed=False, changelist=cl)
+        self.add_deployment(time=300, passed=True, changelist=cl)
+        self.check_all_combinations_of_consecutive_timestamps(
+            expected_values=[None, 50, 200/3, 100, 0, 0],
+            first_timestamp=self.now + timedelta(seconds=150),
+            step_length=timedelta(seconds=50),
+            computer_cls=ChangeFailureRateComputer,
+            checking_period=100,
+        )
@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+
+import mock
+
+from apps.dashboard.metrics.computation_base import get_day_start
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_environment_scope
+from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer, ChangeFailureRateRollupComputer
+from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer, DeploymentFrequencyRollupComputer
+from apps.devops_metrics.lead_time.computation import LeadTimeComputer, LeadTimeRollupComputer
+from apps.devops_metrics.models import DailyEnvironmentMetricRollup, RawEventsArchive
+from apps.devops_metrics.rollups import update_daily_environment_metric_rollups
+from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
+from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer, TimeToRestoreRollupComputer
+
+_HOUR = 60 * 60
+
+
+class DailyRollupComputersTest(MetricComputerTestBase):
+    def setUp(self) -> None:
+        super().setUp()
+        cl = self.add_changelist(id=0, time=-5 * _HOUR)
+        for hours, passed in [(1, True), (2, False), (20, True), (30, False), (50, True), (52, True), (53, False), (100, True)]:
+            self.add_deployment(time=hours * _HOUR, passed=passed, changelist=cl)
+        for hours, up in [(3, False), (4, False), (6, True), (40, False), (70, True)]:
+            self.add_service_status_report(time=hours * _HOUR, up=up)
+        update_daily_environment_metric_rollups(self.environment, date(1999, 12, 1), date(2000, 1, 31))
+
+    def test_updating_rollups_should_invalidate_cached_graphs_of_environment(self):
+        with mock.patch.object(MetricGraphCache, 'invalidate') as invalidate:
+            update_daily_environment_metric_rollups(self.environment, date(2000, 1, 1), date(2000, 1, 2))
+        invalidate.assert_called_with(get_environment_scope(self.environment.id), date(2000, 1, 1))
+
+    def test_rollups_should_aggregate_events_of_each_day(self):
+        rollups = list(DailyEnvironmentMetricRollup.objects.filter(environment=self.environment).order_by('day'))
+        self.assertEqual(sum(r.deployments_count for r in rollups), 8)
+        self.assertEqual(sum(r.failed_deployments_count for r in rollups), 3)
+        self.assertEqual(sum((r.lead_times_sum for r in rollups), timedelta(0)), timedelta(hours=6))
+        self.assertEqual(sum(r.lead_times_count for r in rollups), 1)
+        self.assertEqual(sum((r.down_times_sum for r in rollups), timedelta(0)), timedelta(hours=3 + 30))
+        self.assertEqual(sum(r.down_times_count for r in rollups), 2)
+
+    def test_rollup_computers_should_match_raw_computers_in_daily_graphs(self):
+        for raw_computer_cls, rollup_computer_cls in [
+            (ChangeFailureRateComputer, ChangeFailureRateRollupComputer),
+            (DeploymentFrequencyComputer, DeploymentFrequencyRollupComputer),
+        ]:
+            for checking_period_days in [1, 2, 3, 7]:
+                with self.subTest(computer_cls=rollup_computer_cls, checking_period_days=checking_period_days):
+                    checking_period = timedelta(days=checking_period_days)
+                    expected = raw_computer_cls(self.environment, checking_period).get_daily_graph_data_serialized(
+                        date(1999, 12, 28), date(2000, 1, 10))
+                    actual = rollup_computer_cls(self.environment, checking_period).get_daily_graph_data_serialized(
+                        date(1999, 12, 28), date(2000, 1, 10))
+                    self.assertEqual(actual, expected)
+
+    def test_lead_time_and_time_to_restore_rollup_computers_should_match_raw_computers_after_archive_horizon(self):
+        # An outage and a lead time spanning days
+        cl = self.add_changelist(id=1, time=6 * _HOUR)
+        self.add_deployment(time=(48 + 9) * _HOUR, passed=True, changelist=cl)
+        cl = self.add_changelist(id=2, time=(48 + 1) * _HOUR)
+        self.add_deployment(time=(48 + 5) * _HOUR, passed=True, changelist=cl)
+        self.add_service_status_report(time=12 * _HOUR, up=False)
+        self.add_service_status_report(time=(48 + 12) * _HOUR, up=True)
+        update_daily_environment_metric_rollups(self.environment, date(1999, 12, 1), date(2000, 1, 31))
+        for raw_computer_cls, rollup_computer_cls in [
+            (LeadTimeComputer, LeadTimeRollupComputer),
+            (TimeToRestoreComputer, TimeToRestoreRollupComputer),
+        ]:
+            for checking_period_days in [1, 2, 7]:
+                with self.subTest(computer_cls=rollup_computer_cls, checking_period_days=checking_period_days):
+                    checking_period = timedelta(days=checking_period_days)
+                    expected = raw_computer_cls(self.environment, checking_period).get_daily_graph_data_serialized(
+                        date(1999, 12, 28), date(2000, 1, 10))
+                    actual = rollup_computer_cls(self.environment, checking_period).get_daily_graph_data_serialized(
+                        date(1999, 12, 28), date(2000, 1, 10))
+                    self.assertEqual(actual, expected)
+
+    def test_lead_time_and_time_to_restore_rollup_computers_should_average_rollups_of_archived_windows(self):
+        RawEventsArchive.objects.create(environment=self.environment, horizon=get_day_start(date(2000, 1, 3)))
+        for computer_cls, checking_period_days, expected_values in [
+            (LeadTimeRollupComputer, 1, [6 * _HOUR, None, None, None]),
+            (LeadTimeRollupComputer, 7, [6 * _HOUR] * 4),
+            # The last two windows start at the horizon; so the outage restored on Jan 3 is cut by their start.
+            (TimeToRestoreRollupComputer, 1, [3 * _HOUR, 0, 0, 0]),
+            (TimeToRestoreRollupComputer, 7, [3 * _HOUR, 3 * _HOUR, (3 + 30) * _HOUR // 2, (3 + 30) * _HOUR // 2]),
+        ]:
+            with self.subTest(computer_cls=computer_cls, checking_period_days=checking_period_days):
+                computer = computer_cls(self.environment, timedelta(days=checking_period_days))
+                data_points = computer.get_daily_graph_data_serialized(date(2000, 1, 1), date(2000, 1, 4))
+                self.assertEqual([data_point['value'] for data_point in data_points], expected_values)
+
+    def test_rollup_computers_should_fall_back_to_raw_events_for_timestamps_not_aligned_to_days(self):
+        self.check_all_combinations_of_consecutive_timestamps(
+            expected_values=[50, 50, 100 / 3],
+            first_timestamp=self.now + timedelta(hours=31),
+            step_length=timedelta(hours=23),
+            computer_cls=ChangeFailureRateRollupComputer,
+            checking_period=30 * _HOUR,
+        )
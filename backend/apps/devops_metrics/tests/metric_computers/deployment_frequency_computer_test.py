@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer
 from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
 
@@ -35,3 +37,19 @@ class DeploymentFrequencyComputerTest(MetricComputerTestBase):
 
         self._test_compute_for_single_timestamp(DeploymentFrequencyComputer, time=500, checking_period=400,
                                                 expected_value=200)
+
+    def test_consecutive_computation_should_match_single_computations(self):
+        changelist = self.add_changelist(0, 100)
+        self.add_deployment(time=150, passed=True, changelist=changelist)
+        self.add_deployment(time=160, passed=True, changelist=changelist)
+        self.add_deployment(time=200, passed=False, changelist=changelist)
+        self.add_deployment(time=220, passed=True, changelist=changelist)
+        self.add_deployment(time=300, passed=True, changelist=changelist)
+        self.add_deployment(time=330, passed=True, changelist=changelist)
+        self.check_all_combinations_of_consecutive_timestamps(
+            expected_values=[None, 10, 35, None, 30, 30],
+            first_timestamp=self.now + timedelta(seconds=150),
+            step_length=timedelta(seconds=50),
+            computer_cls=DeploymentFrequencyComputer,
+            checking_period=100,
+        )
@@ -65,3 +65,40 @@ class LeadTimeComputerTest(MetricComputerTestBase):
         computer = LeadTimeComputer(self.environment, checking_period=timedelta(seconds=2))
         lead_time = computer.compute_for_single_timestamp(time + timedelta(seconds=1))
         self.assertIsNone(lead_time)
+
+    def test_consecutive_computation_should_match_single_computations(self):
+        changelists = [
+            self.add_changelist(0, 100),
+            self.add_changelist(1, 120),
+            self.add_changelist(2, 200),
+            self.add_changelist(3, 260),
+            self.add_changelist(4, 300),
+        ]
+        self.add_deployment(time=140, passed=True, changelist=changelists[1])
+        self.add_deployment(time=180, passed=True, changelist=changelists[0])
+        self.add_deployment(time=230, passed=True, changelist=changelists[2])
+        self.add_deployment(time=240, passed=True, changelist=changelists[2])
+        self.add_deployment(time=270, passed=False, changelist=changelists[3])
+        self.add_deployment(time=330, passed=True, changelist=changelists[4])
+        self.check_all_combinations_of_consecutive_timestamps(
+            expected_values=[30, 30, 30, 30, 50, 30],
+            first_timestamp=self.now + timedelta(seconds=150),
+            step_length=timedelta(seconds=50),
+            computer_cls=LeadTimeComputer,
+            checking_period=100,
+        )
+
+    def test_deployment_before_its_changelist_should_count_only_when_inside_checking_period(self):
+        changelists = [
+            self.add_changelist(0, 100),
+            self.add_changelist(1, 200),
+        ]
+        self.add_deployment(time=150, passed=True, changelist=changelists[1])
+        self.add_deployment(time=260, passed=True, changelist=changelists[0])
+        self.check_all_combinations_of_consecutive_timestamps(
+            expected_values=[None, None, -50, None, None],
+            first_timestamp=self.now + timedelta(seconds=150),
+            step_length=timedelta(seconds=50),
+            computer_cls=LeadTimeComputer,
+            checking_period=100,
+        )
@@ -1,16 +1,20 @@
 from datetime import datetime, timedelta
-from typing import Optional, Type
+from typing import Dict, Optional, Type
 
 from django.contrib.auth.models import User
 from django.test.testcases import TestCase
 from django.utils import timezone
 
+from apps.dashboard.metrics.computation_test_base import ConsecutiveTimestampsMetricComputerTestingMixin
 from apps.dashboard.models import MaturityModel, Project, Environment
 from apps.devops_metrics.metric_computer import MetricComputer
 from apps.devops_metrics.models import ChangeList, Deployment, ServiceStatusReport
 
 
-class MetricComputerTestBase(TestCase):
+class MetricComputerTestBase(TestCase, ConsecutiveTimestampsMetricComputerTestingMixin):
+    # Runs the tests of a computer with another one (e.g. an alternative implementation of the same metric) instead.
+    computer_classes_replacements: Dict[Type[MetricComputer], Type[MetricComputer]] = {}
+
     def setUp(self) -> None:
         self.maturity_model = MaturityModel.objects.create(name="test")
         self.user = User.objects.create(username="test")
@@ -18,6 +22,11 @@ class MetricComputerTestBase(TestCase):
         self.environment = Environment.objects.create(name="test-env", project=self.project)
         self.now = timezone.make_aware(datetime(2000, 1, 1))
 
+    # Override
+    def get_computer(self, computer_cls: Type[MetricComputer], checking_period: int) -> MetricComputer:
+        computer_cls = self.computer_classes_replacements.get(computer_cls, computer_cls)
+        return computer_cls(self.environment, timedelta(seconds=checking_period))
+
     def add_changelist(self, id: int, time: int, project: Optional[Project] = None) -> ChangeList:
         if project is None:
             project = self.project
@@ -39,7 +48,7 @@ class MetricComputerTestBase(TestCase):
 
     def _test_compute_for_single_timestamp(self, computer_cls: Type[MetricComputer], time: int, checking_period: int,
                                            expected_value: Optional[float]) -> None:
-        computer = computer_cls(self.environment, timedelta(seconds=checking_period))
+        computer = self.get_computer(computer_cls, checking_period)
         value = computer.compute_for_single_timestamp(self.now + timedelta(seconds=time))
         self.assertEqual(value,
                          expected_value,
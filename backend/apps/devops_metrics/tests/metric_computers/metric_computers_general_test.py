@@ -1,10 +1,11 @@
-from datetime import timedelta
+from datetime import date, timedelta
 
 from parameterized import parameterized
 
 from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer
 from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer
 from apps.devops_metrics.lead_time.computation import LeadTimeComputer
+from apps.dashboard.metrics.computation_base import get_day_start
 from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
 from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer
 
@@ -33,3 +34,37 @@ class MetricComputersGeneralTest(MetricComputerTestBase):
             num_timestamps=5,
             step_length=timedelta(seconds=100))[1]
         self.assertEqual(value_from_single_computation, value_from_consecutive_computation)
+
+    def test_graph_data_points_should_be_the_values_at_the_end_of_their_steps(self):
+        cl = self.add_changelist(id=0, time=100)
+        self.add_deployment(time=150, passed=True, changelist=cl)
+        self.add_deployment(time=5000, passed=False, changelist=cl)
+        self.add_deployment(time=9000, passed=True, changelist=cl)
+        computer = ChangeFailureRateComputer(self.environment, timedelta(hours=2))
+        day = self.now.date()
+        data_points = computer.get_graph_data_serialized(day, day, step_length=timedelta(hours=1))
+        self.assertEqual(len(data_points), 24)
+        for i, data_point in enumerate(data_points):
+            step_start = get_day_start(day) + i * timedelta(hours=1)
+            self.assertEqual(data_point['date'], step_start)
+            self.assertEqual(data_point['value'], computer.compute_for_single_timestamp(step_start + timedelta(hours=1)))
+
+    def test_long_periods_should_be_downsampled(self):
+        computer = ChangeFailureRateComputer(self.environment, timedelta(days=1))
+        data_points = computer.get_graph_data_serialized(date(2000, 1, 1), date(2000, 1, 30),
+                                                         step_length=timedelta(hours=1), max_data_points=200)
+        # 720 hours in 4-hour steps
+        self.assertEqual(len(data_points), 180)
+        self.assertEqual(data_points[1]['date'] - data_points[0]['date'], timedelta(hours=4))
+
+    def test_last_step_should_end_at_the_end_of_period(self):
+        cl = self.add_changelist(id=0, time=100)
+        # After the period, but in the 2nd week of it
+        self.add_deployment(time=(7 + 4) * 24 * 60 * 60, passed=False, changelist=cl)
+        computer = ChangeFailureRateComputer(self.environment, timedelta(days=7))
+        day = self.now.date()
+        data_points = computer.get_graph_data_serialized(day, day + timedelta(days=9), step_length=timedelta(days=7))
+        self.assertEqual([data_point['date'] for data_point in data_points],
+                         [get_day_start(day), get_day_start(day + timedelta(days=7))])
+        self.assertEqual(data_points[1]['value'], computer.compute_for_single_timestamp(get_day_start(day + timedelta(days=10))))
+        self.assertIsNone(data_points[1]['value'])
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer
+from apps.devops_metrics.constants import (
+    KEY_CHANGE_FAILURE_RATE,
+    KEY_DEPLOYMENT_FREQUENCY,
+    KEY_LEAD_TIME,
+    KEY_TIME_TO_RESTORE)
+from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer
+from apps.devops_metrics.lead_time.computation import LeadTimeComputer
+from apps.devops_metrics.multi_metric_computer import MultiMetricComputer
+from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
+from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer
+
+
+class MultiMetricComputerTest(MetricComputerTestBase):
+    def test_metrics_should_match_the_ones_of_metric_computers(self):
+        cl0 = self.add_changelist(id=0, time=100)
+        cl1 = self.add_changelist(id=1, time=130)
+        cl2 = self.add_changelist(id=2, time=240)
+        self.add_deployment(time=150, passed=True, changelist=cl1)
+        self.add_deployment(time=160, passed=False, changelist=cl0)
+        self.add_deployment(time=220, passed=True, changelist=cl0)
+        self.add_deployment(time=250, passed=False, changelist=cl2)
+        self.add_deployment(time=300, passed=True, changelist=cl2)
+        self.add_service_status_report(time=110, up=False)
+        self.add_service_status_report(time=170, up=True)
+        self.add_service_status_report(time=230, up=False)
+        self.add_service_status_report(time=260, up=False)
+        self.add_service_status_report(time=290, up=True)
+
+        first_timestamp = self.now + timedelta(seconds=120)
+        num_timestamps = 10
+        step_length = timedelta(seconds=25)
+        for checking_period in [timedelta(seconds=60), timedelta(seconds=150), timedelta(days=1)]:
+            metrics = MultiMetricComputer(self.environment, checking_period).compute_for_consecutive_timestamps(
+                first_timestamp, num_timestamps, step_length)
+            for key, computer_cls in [
+                (KEY_DEPLOYMENT_FREQUENCY, DeploymentFrequencyComputer),
+                (KEY_LEAD_TIME, LeadTimeComputer),
+                (KEY_TIME_TO_RESTORE, TimeToRestoreComputer),
+                (KEY_CHANGE_FAILURE_RATE, ChangeFailureRateComputer),
+            ]:
+                with self.subTest(metric=key, checking_period=checking_period):
+                    expected = computer_cls(self.environment, checking_period).compute_for_consecutive_timestamps(
+                        first_timestamp, num_timestamps, step_length)
+                    self.assertEqual([(timestamp, values[key]) for timestamp, values in metrics], expected)
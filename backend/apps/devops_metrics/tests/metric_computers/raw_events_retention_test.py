@@ -0,0 +1,90 @@
+import random
+from datetime import date, timedelta
+
+from django.test import override_settings
+
+from apps.dashboard.metrics.computation_base import get_day_start
+from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer
+from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer
+from apps.devops_metrics.lead_time.computation import LeadTimeComputer
+from apps.devops_metrics.models import DailyEnvironmentMetricRollup, Deployment, ServiceStatusReport
+from apps.devops_metrics.retention import archive_old_raw_events, get_raw_events_retention_horizon
+from apps.devops_metrics.rollups import update_daily_environment_metric_rollups
+from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
+from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer
+
+_HOUR = 60 * 60
+_DAY = 24 * _HOUR
+
+
+class RawEventsRetentionTest(MetricComputerTestBase):
+    def setUp(self) -> None:
+        super().setUp()
+        rand = random.Random(0)
+        changelists = [self.add_changelist(id=i, time=i * 2 * _DAY) for i in range(50)]
+        for _ in range(300):
+            changelist = rand.choice(changelists)
+            self.add_deployment(time=changelist.time.timestamp() - self.now.timestamp() + rand.randrange(10 * _DAY),
+                                passed=rand.random() < 0.7, changelist=changelist)
+        for time in range(0, 100 * _DAY, 7 * _HOUR):
+            self.add_service_status_report(time=time, up=rand.random() < 0.6)
+        self.horizon = get_day_start(date(2000, 3, 1))
+        update_daily_environment_metric_rollups(self.environment, date(1999, 12, 31), date(2000, 5, 1))
+
+    def _get_rollups(self):
+        return list(DailyEnvironmentMetricRollup.objects
+                    .filter(environment=self.environment)
+                    .order_by('day')
+                    .values_list('day', 'deployments_count', 'failed_deployments_count', 'lead_times_sum',
+                                 'lead_times_count', 'down_times_sum', 'down_times_count'))
+
+    def _compute_graphs_after_horizon(self):
+        graphs = []
+        for computer_cls in [ChangeFailureRateComputer, DeploymentFrequencyComputer, LeadTimeComputer, TimeToRestoreComputer]:
+            for checking_period in [timedelta(hours=5), timedelta(days=3), timedelta(days=20)]:
+                computer = computer_cls(self.environment, checking_period)
+                graphs.append(computer.compute_for_consecutive_timestamps(
+                    self.horizon + checking_period, 30, timedelta(hours=17)))
+        return graphs
+
+    def test_archiving_should_keep_rollups_and_metrics_after_horizon(self):
+        expected_rollups = self._get_rollups()
+        expected_graphs = self._compute_graphs_after_horizon()
+
+        deleted_events_count = archive_old_raw_events(self.environment, self.horizon)
+
+        self.assertGreater(deleted_events_count, 0)
+        kept_deployments = Deployment.objects.filter(time__lt=self.horizon)
+        changelists_deployed_after_horizon = (Deployment.objects
+                                              .filter(time__gte=self.horizon)
+                                              .filter(status=Deployment.STATUS_PASS)
+                                              .values('change_list_id'))
+        self.assertLess(kept_deployments.count(), 10)
+        self.assertFalse(kept_deployments.exclude(status=Deployment.STATUS_PASS).exists())
+        self.assertFalse(kept_deployments.exclude(change_list_id__in=changelists_deployed_after_horizon).exists())
+        self.assertEqual(ServiceStatusReport.objects.filter(time__lt=self.horizon).count(), 1)
+        self.assertEqual(self._get_rollups(), expected_rollups)
+        self.assertEqual(self._compute_graphs_after_horizon(), expected_graphs)
+
+    def test_archiving_again_should_keep_rollups_of_archived_days(self):
+        expected_rollups = self._get_rollups()
+        archive_old_raw_events(self.environment, self.horizon - timedelta(days=20))
+        archive_old_raw_events(self.environment, self.horizon)
+        self.assertEqual(archive_old_raw_events(self.environment, self.horizon), 0)
+        self.assertEqual(self._get_rollups(), expected_rollups)
+
+    def test_rollups_before_archive_horizon_should_not_be_updated(self):
+        expected_rollups = self._get_rollups()
+        archive_old_raw_events(self.environment, self.horizon)
+        update_daily_environment_metric_rollups(self.environment, date(1999, 12, 31), date(2000, 5, 1))
+        self.assertEqual(self._get_rollups(), expected_rollups)
+
+    @override_settings(DEVOPS_METRICS_RAW_EVENTS_RETENTION_DAYS=30, DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED=True)
+    def test_too_short_retention_should_be_rejected(self):
+        with self.assertRaises(ValueError):
+            get_raw_events_retention_horizon()
+
+    @override_settings(DEVOPS_METRICS_RAW_EVENTS_RETENTION_DAYS=400, DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED=False)
+    def test_retention_without_daily_rollups_should_be_rejected(self):
+        with self.assertRaises(ValueError):
+            get_raw_events_retention_horizon()
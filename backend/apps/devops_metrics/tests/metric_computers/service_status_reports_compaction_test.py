@@ -0,0 +1,85 @@
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.devops_metrics.compaction import (
+    compact_service_status_reports,
+    delete_redundant_service_status_reports,
+    get_redundant_service_status_report_ids)
+from apps.devops_metrics.models import ServiceStatusReport
+from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
+from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer, TimeToRestoreSqlComputer
+
+
+class ServiceStatusReportsCompactionTest(MetricComputerTestBase):
+    def _compute_time_to_restore_graphs(self):
+        graphs = []
+        for computer_cls in [TimeToRestoreComputer, TimeToRestoreSqlComputer]:
+            for checking_period in [5, 30, 100, 400]:
+                for step_length in [1, 7, 50]:
+                    computer = computer_cls(self.environment, timedelta(seconds=checking_period))
+                    graphs.append(computer.compute_for_consecutive_timestamps(self.now, 60, timedelta(seconds=step_length)))
+        return graphs
+
+    def test_compaction_should_not_change_time_to_restore(self):
+        rand = random.Random(0)
+        for time in range(0, 1000, 5):
+            # Mostly UP, with runs of DOWN
+            self.add_service_status_report(time=time, up=rand.random() < 0.85 or time % 3 == 0)
+        expected_graphs = self._compute_time_to_restore_graphs()
+
+        deleted_reports_count = compact_service_status_reports(self.environment, timezone.now(), chunk_size=7)
+
+        self.assertGreater(deleted_reports_count, 0)
+        self.assertEqual(ServiceStatusReport.objects.count(), 200 - deleted_reports_count)
+        self.assertEqual(compact_service_status_reports(self.environment, timezone.now()), 0)
+        self.assertEqual(self._compute_time_to_restore_graphs(), expected_graphs)
+
+    def test_dry_run_should_not_delete_reports(self):
+        for time in range(5):
+            self.add_service_status_report(time=time, up=True)
+        self.assertEqual(compact_service_status_reports(self.environment, timezone.now(), dry_run=True), 3)
+        self.assertEqual(ServiceStatusReport.objects.count(), 5)
+
+    def test_compaction_should_keep_reports_within_lateness_horizon(self):
+        for time in range(5):
+            self.add_service_status_report(time=time, up=True)
+        self.assertEqual(compact_service_status_reports(self.environment, self.now + timedelta(seconds=2)), 1)
+
+    def _get_redundant_report_ids(self, start: int, horizon: int):
+        return get_redundant_service_status_report_ids(self.environment.id, self.now + timedelta(seconds=start),
+                                                       self.now + timedelta(seconds=horizon))
+
+    def test_get_redundant_service_status_report_ids(self):
+        self.add_service_status_report(time=5, up=True)
+        self.add_service_status_report(time=10, up=False)
+        self.add_service_status_report(time=20, up=True)
+        inner_up_report = self.add_service_status_report(time=30, up=True)
+        # The last UP report of the run
+        self.assertEqual(self._get_redundant_report_ids(start=30, horizon=100), [])
+
+        self.add_service_status_report(time=40, up=True)
+        self.assertEqual(self._get_redundant_report_ids(start=40, horizon=100), [inner_up_report.id])
+        # Within the lateness horizon
+        self.assertEqual(self._get_redundant_report_ids(start=40, horizon=30), [])
+        self.assertEqual(self._get_redundant_report_ids(start=0, horizon=100), [inner_up_report.id])
+
+    def test_late_reports_should_not_change_time_to_restore(self):
+        max_delay = 30
+        # (time, up, time posted); the DOWN reports are posted late between the UP reports of a run.
+        reports = [(10, True, 10), (20, True, 20), (30, True, 30), (15, False, 40), (50, True, 50), (60, True, 60),
+                   (45, False, 70), (80, True, 80), (90, True, 90), (100, True, 100), (110, True, 110), (95, False, 120),
+                   (130, True, 130), (140, True, 140), (150, True, 150), (170, True, 170), (200, True, 200)]
+        for time, up, posting_time in reports:
+            self.add_service_status_report(time=time, up=up)
+            delete_redundant_service_status_reports(self._get_redundant_report_ids(start=time, horizon=posting_time - max_delay))
+        self.assertLess(ServiceStatusReport.objects.count(), len(reports))
+        compacted_graphs = self._compute_time_to_restore_graphs()
+        compact_service_status_reports(self.environment, self.now + timedelta(seconds=200 - max_delay))
+        self.assertEqual(compacted_graphs, self._compute_time_to_restore_graphs())
+
+        ServiceStatusReport.objects.all().delete()
+        for time, up, _ in reports:
+            self.add_service_status_report(time=time, up=up)
+        self.assertEqual(compacted_graphs, self._compute_time_to_restore_graphs())
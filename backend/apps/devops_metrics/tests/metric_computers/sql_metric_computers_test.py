@@ -0,0 +1,62 @@
+import random
+from datetime import timedelta
+
+from parameterized import parameterized
+
+from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer, ChangeFailureRateSqlComputer
+from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer, DeploymentFrequencySqlComputer
+from apps.devops_metrics.lead_time.computation import LeadTimeComputer, LeadTimeSqlComputer
+from apps.devops_metrics.tests.metric_computers import (
+    change_failure_rate_computer_test,
+    deployment_frequency_computer_test,
+    lead_time_computer_test,
+    time_to_restore_computer_test,
+)
+from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
+from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer, TimeToRestoreSqlComputer
+
+_SQL_COMPUTER_CLASSES = {
+    ChangeFailureRateComputer: ChangeFailureRateSqlComputer,
+    DeploymentFrequencyComputer: DeploymentFrequencySqlComputer,
+    LeadTimeComputer: LeadTimeSqlComputer,
+    TimeToRestoreComputer: TimeToRestoreSqlComputer,
+}
+
+
+class ChangeFailureRateSqlComputerTest(change_failure_rate_computer_test.ChangeFailureRateComputerTest):
+    computer_classes_replacements = _SQL_COMPUTER_CLASSES
+
+
+class DeploymentFrequencySqlComputerTest(deployment_frequency_computer_test.DeploymentFrequencyComputerTest):
+    computer_classes_replacements = _SQL_COMPUTER_CLASSES
+
+
+class LeadTimeSqlComputerTest(lead_time_computer_test.LeadTimeComputerTest):
+    computer_classes_replacements = _SQL_COMPUTER_CLASSES
+
+
+class TimeToRestoreSqlComputerTest(time_to_restore_computer_test.TimeToRestoreComputerTest):
+    computer_classes_replacements = _SQL_COMPUTER_CLASSES
+
+
+class SqlMetricComputersParityTest(MetricComputerTestBase):
+    def setUp(self) -> None:
+        super().setUp()
+        rand = random.Random(0)
+        changelists = [self.add_changelist(id=i, time=rand.randrange(1000)) for i in range(30)]
+        for _ in range(60):
+            self.add_deployment(time=rand.randrange(1000), passed=rand.random() < 0.7, changelist=rand.choice(changelists))
+        for _ in range(40):
+            self.add_service_status_report(time=rand.randrange(1000), up=rand.random() < 0.5)
+
+    @parameterized.expand([(computer_cls,) for computer_cls in _SQL_COMPUTER_CLASSES])
+    def test_sql_computer_should_match_the_reference_computer(self, computer_cls):
+        for checking_period in [30, 100, 400]:
+            for step_length in [0, 7, 50]:
+                with self.subTest(checking_period=checking_period, step_length=step_length):
+                    args = (self.now + timedelta(seconds=50), 25, timedelta(seconds=step_length))
+                    expected = computer_cls(self.environment, timedelta(seconds=checking_period)) \
+                        .compute_for_consecutive_timestamps(*args)
+                    actual = _SQL_COMPUTER_CLASSES[computer_cls](self.environment, timedelta(seconds=checking_period)) \
+                        .compute_for_consecutive_timestamps(*args)
+                    self.assertEqual(actual, expected)
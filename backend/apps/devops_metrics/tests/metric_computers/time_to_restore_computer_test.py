@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from apps.devops_metrics.tests.metric_computers.metric_computer_test_base import MetricComputerTestBase
 from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer
 
@@ -30,3 +32,22 @@ class TimeToRestoreComputerTest(MetricComputerTestBase):
 
     def test_time_to_restore_should_be_0_when_no_report_exists(self):
         self._test_compute_for_single_timestamp(TimeToRestoreComputer, time=10, checking_period=10, expected_value=0)
+
+    def test_pairing_of_reports_should_restart_at_start_of_checking_period(self):
+        self.add_service_status_report(time=100, up=False)
+        self.add_service_status_report(time=120, up=False)
+        self.add_service_status_report(time=160, up=True)
+        self.add_service_status_report(time=170, up=True)
+        self.add_service_status_report(time=210, up=False)
+        self.add_service_status_report(time=230, up=True)
+        self.add_service_status_report(time=240, up=False)
+        self.add_service_status_report(time=270, up=False)
+        self.add_service_status_report(time=310, up=True)
+        self.add_service_status_report(time=380, up=False)
+        self.check_all_combinations_of_consecutive_timestamps(
+            expected_values=[0, 60, 20, 20, 40, 0],
+            first_timestamp=self.now + timedelta(seconds=150),
+            step_length=timedelta(seconds=50),
+            computer_cls=TimeToRestoreComputer,
+            checking_period=100,
+        )
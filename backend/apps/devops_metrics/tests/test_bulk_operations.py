@@ -0,0 +1,78 @@
+import datetime
+
+import pytz
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.dashboard.tests.utils import setup_basic_environment
+from apps.devops_metrics.bulk_operations import bulk_create_service_status_reports, bulk_upsert_changelists
+from apps.devops_metrics.models import ChangeList, ServiceStatusReport
+from apps.utils.validation_utils import InconsistentDataError
+
+
+class BulkUpsertChangelistsTest(TestCase):
+    def setUp(self):
+        self.project = setup_basic_environment().project
+        self.time = datetime.datetime(2020, 1, 1, tzinfo=pytz.UTC)
+        self.existing_changelist = ChangeList.objects.create(project=self.project, change_list_id='1',
+                                                             commit_hash='1' * 40, time=self.time, title='Old')
+
+    def _get_row(self, change_list_id, commit_hash, title=None):
+        return {'change_list_id': change_list_id, 'commit_hash': commit_hash, 'time': self.time, 'title': title}
+
+    def test_inserts_new_and_updates_existing_changelists(self):
+        results = bulk_upsert_changelists(self.project, [
+            self._get_row('2', '2' * 40, 'New'),
+            self._get_row('1', '1' * 40, 'Updated'),
+        ])
+        self.assertEqual([(r.change_list_id, r.created) for r in results], [('2', True), ('1', False)])
+        self.assertEqual(results[1].id, self.existing_changelist.id)
+        self.assertEqual(ChangeList.objects.get(change_list_id='1').title, 'Updated')
+        self.assertEqual(ChangeList.objects.get(change_list_id='2').title, 'New')
+
+    def test_rejects_inconsistent_changelists(self):
+        for row in [self._get_row('1', '2' * 40), self._get_row('2', '1' * 40)]:
+            with self.subTest(row=row), self.assertRaises(InconsistentDataError):
+                bulk_upsert_changelists(self.project, [self._get_row('3', '3' * 40), row])
+        self.assertEqual(ChangeList.objects.count(), 1)
+
+    def test_rejects_duplicate_rows(self):
+        with self.assertRaises(serializers.ValidationError):
+            bulk_upsert_changelists(self.project, [self._get_row('2', '2' * 40), self._get_row('2', '3' * 40)])
+
+
+@override_settings(DEVOPS_METRICS_SERVICE_STATUS_TRANSITIONS_ONLY=True)
+class BulkCreateServiceStatusReportsTest(TestCase):
+    def setUp(self):
+        self.environment = setup_basic_environment().project.default_environment
+        self.time = datetime.datetime(2020, 1, 1, tzinfo=pytz.UTC)
+
+    def _get_item(self, status, seconds):
+        return {'status': status, 'time': self.time + datetime.timedelta(seconds=seconds)}
+
+    def _get_stored_reports(self):
+        return [(report.status, int((report.time - self.time).total_seconds()))
+                for report in ServiceStatusReport.objects.filter(environment=self.environment).order_by('time')]
+
+    def test_repeated_up_reports_should_not_be_kept(self):
+        bulk_create_service_status_reports(self.environment, [
+            self._get_item('U', 0), self._get_item('U', 5), self._get_item('U', 8), self._get_item('D', 10),
+            self._get_item('U', 15), self._get_item('U', 20),
+        ])
+        self.assertEqual(self._get_stored_reports(), [('U', 0), ('U', 8), ('D', 10), ('U', 15), ('U', 20)])
+
+        bulk_create_service_status_reports(self.environment, [self._get_item('U', 25)])
+        self.assertEqual(self._get_stored_reports(), [('U', 0), ('U', 8), ('D', 10), ('U', 15), ('U', 25)])
+
+    def test_repeated_up_reports_within_lateness_horizon_should_be_kept(self):
+        self.time = timezone.now()
+        bulk_create_service_status_reports(self.environment, [self._get_item('U', -10), self._get_item('U', -5)])
+        bulk_create_service_status_reports(self.environment, [self._get_item('U', 0)])
+        self.assertEqual(self._get_stored_reports(), [('U', -10), ('U', -5), ('U', 0)])
+
+    def test_reports_between_existing_ones_should_be_created(self):
+        bulk_create_service_status_reports(self.environment, [self._get_item('U', 0), self._get_item('D', 10)])
+        results = bulk_create_service_status_reports(self.environment, [self._get_item('D', 3), self._get_item('U', 5)])
+        self.assertEqual([r['created'] for r in results], [True, True])
+        self.assertEqual(self._get_stored_reports(), [('U', 0), ('D', 3), ('U', 5), ('D', 10)])
@@ -0,0 +1,108 @@
+import datetime
+
+import pytz
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.dashboard.models import CoverageReport
+from apps.dashboard.tests.utils import setup_basic_environment
+from apps.devops_metrics.ingestion import write_pending_ingestion_receipts
+from apps.devops_metrics.models import ChangeList, IngestionReceipt
+from apps.devops_metrics.tasks import write_stale_pending_ingestion_receipts
+
+
+class AsyncIngestionTest(APITestCase):
+    def setUp(self):
+        self.env = setup_basic_environment()
+        self.project = self.env.project
+        self.environment = self.project.default_environment
+        self.change_list = ChangeList.objects.create(project=self.project, change_list_id='1', commit_hash='1' * 40,
+                                                     time=datetime.datetime(2019, 1, 1, tzinfo=pytz.UTC))
+
+    def _post(self, path, data):
+        return self.client.post(f'/v1/{path}?async=1', data, format='json',
+                                **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+
+    def _get_receipt(self, receipt_id):
+        response = self.client.get(f'/v1/devops-metrics/project/{self.project.id}/ingestion-receipt/{receipt_id}/',
+                                   **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_records_are_written_by_the_writer(self):
+        environment_path = f'devops-metrics/project/{self.project.id}/environment/{self.environment.id}'
+        responses = [
+            self._post(f'devops-metrics/project/{self.project.id}/changelist/',
+                       {'change_list_id': '2', 'commit_hash': '2' * 40, 'time': '2019-10-24T00:12'}),
+            self._post(f'{environment_path}/deployment/', {'commit_hash': '1' * 40, 'status': 'P', 'time': '2019-10-24T00:12'}),
+            self._post(f'{environment_path}/deployment/', {'commit_hash': '1' * 40, 'status': 'F', 'time': '2019-10-25T00:12'}),
+            self._post(f'{environment_path}/report/', {'status': 'D'}),
+            self._post(f'dashboard/project/{self.project.id}/coverage-report/', {'value': '45.76', 'coverage_type': 'INC'}),
+        ]
+        self.assertEqual({r.status_code for r in responses}, {status.HTTP_202_ACCEPTED})
+        self.assertEqual({self._get_receipt(r.data['id'])['status'] for r in responses}, {IngestionReceipt.STATUS_PENDING})
+        self.assertFalse(self.environment.deployment_set.exists())
+
+        self.assertEqual(write_pending_ingestion_receipts(self.project.id), len(responses))
+
+        receipts = [self._get_receipt(r.data['id']) for r in responses]
+        self.assertEqual({r['status'] for r in receipts}, {IngestionReceipt.STATUS_SUCCEEDED})
+        self.assertEqual(ChangeList.objects.get(change_list_id='2').id, receipts[0]['results'][0]['id'])
+        self.assertEqual([d.status for d in self.environment.deployment_set.order_by('time')], ['P', 'F'])
+        self.assertEqual(self.environment.servicestatusreport_set.get().status, 'D')
+        self.assertEqual(CoverageReport.objects.get(project=self.project).id, receipts[4]['results'][0]['id'])
+        self.assertEqual(write_pending_ingestion_receipts(self.project.id), 0)
+
+    def test_deployment_of_changelist_posted_after_other_deployments_should_be_written(self):
+        environment_path = f'devops-metrics/project/{self.project.id}/environment/{self.environment.id}'
+        responses = [
+            self._post(f'{environment_path}/deployment/', {'commit_hash': '1' * 40, 'status': 'P'}),
+            self._post(f'devops-metrics/project/{self.project.id}/changelist/', {'change_list_id': '2', 'commit_hash': '2' * 40}),
+            self._post(f'{environment_path}/deployment/', {'commit_hash': '2' * 40, 'status': 'P'}),
+        ]
+
+        write_pending_ingestion_receipts(self.project.id)
+
+        receipts = [self._get_receipt(r.data['id']) for r in responses]
+        self.assertEqual({r['status'] for r in receipts}, {IngestionReceipt.STATUS_SUCCEEDED})
+        self.assertEqual(set(self.environment.deployment_set.values_list('change_list__change_list_id', flat=True)), {'1', '2'})
+
+    def test_failed_records_should_not_fail_the_others(self):
+        changelist_path = f'devops-metrics/project/{self.project.id}/changelist/'
+        responses = [
+            self._post(changelist_path, {'change_list_id': '2', 'commit_hash': '2' * 40}),
+            # Inconsistent with the existing changelist
+            self._post(changelist_path, {'change_list_id': '3', 'commit_hash': '1' * 40}),
+            self._post(f'devops-metrics/project/{self.project.id}/environment/{self.environment.id}/deployment/',
+                       {'commit_hash': '4' * 40, 'status': 'P'}),
+        ]
+
+        write_pending_ingestion_receipts(self.project.id)
+
+        receipts = [self._get_receipt(r.data['id']) for r in responses]
+        self.assertEqual([r['status'] for r in receipts],
+                         [IngestionReceipt.STATUS_SUCCEEDED, IngestionReceipt.STATUS_FAILED, IngestionReceipt.STATUS_FAILED])
+        self.assertIn('errors', receipts[2]['results'][0])
+        self.assertTrue(ChangeList.objects.filter(change_list_id='2').exists())
+        self.assertFalse(ChangeList.objects.filter(change_list_id='3').exists())
+
+    def test_stale_pending_receipts_should_be_written_by_the_sweep(self):
+        changelist_path = f'devops-metrics/project/{self.project.id}/changelist/'
+        receipt_id = self._post(changelist_path, {'change_list_id': '2', 'commit_hash': '2' * 40}).data['id']
+
+        write_stale_pending_ingestion_receipts()
+        self.assertEqual(self._get_receipt(receipt_id)['status'], IngestionReceipt.STATUS_PENDING)
+
+        IngestionReceipt.objects.filter(pk=receipt_id).update(
+            creation_time=timezone.now() - datetime.timedelta(minutes=settings.ASYNC_INGESTION_STALE_RECEIPTS_MINUTES + 1))
+        write_stale_pending_ingestion_receipts()
+        self.assertEqual(self._get_receipt(receipt_id)['status'], IngestionReceipt.STATUS_SUCCEEDED)
+        self.assertTrue(ChangeList.objects.filter(change_list_id='2').exists())
+
+    def test_payload_shape_is_validated(self):
+        response = self._post(f'devops-metrics/project/{self.project.id}/environment/{self.environment.id}/report/',
+                              {'status': 'X'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IngestionReceipt.objects.exists())
@@ -0,0 +1,70 @@
+import datetime
+
+import mock
+import pytz
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from apps.dashboard.metrics.computation_base import get_day
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_environment_scope
+from apps.dashboard.tests.utils import setup_basic_environment
+from apps.devops_metrics.models import ServiceStatusReport
+from apps.devops_metrics.signals import handle_service_status_reports_change
+
+
+@mock.patch('apps.devops_metrics.signals.update_daily_environment_metric_rollups_of_days')
+class RollupUpdatesTest(TestCase):
+    def setUp(self):
+        self.environment = setup_basic_environment().environment
+        self.time = datetime.datetime(2020, 1, 1, 12, tzinfo=pytz.UTC)
+
+    def _create_reports_and_commit(self):
+        with mock.patch.object(transaction, 'on_commit') as on_commit:
+            for hours, report_status in [(0, 'D'), (1, 'U'), (2, 'U'), (24, 'U')]:
+                ServiceStatusReport.objects.create(environment=self.environment, status=report_status,
+                                                   time=self.time + datetime.timedelta(hours=hours))
+        for callback, in (call[0] for call in on_commit.call_args_list):
+            callback()
+
+    @override_settings(DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED=True)
+    def test_days_of_transaction_should_be_updated_once(self, update_task):
+        self._create_reports_and_commit()
+        update_task.delay.assert_called_once_with(environment_id=self.environment.id,
+                                                  days=['2020-01-01', '2020-01-02'])
+
+    @override_settings(DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED=True)
+    def test_next_up_reports_of_reports_should_be_found_with_one_query(self, update_task):
+        self._create_reports_and_commit()
+        late_reports = [ServiceStatusReport(environment=self.environment, status='D',
+                                            time=self.time + datetime.timedelta(hours=hours))
+                        for hours in [-1, 3]]
+        with mock.patch.object(transaction, 'on_commit') as on_commit, self.assertNumQueries(1):
+            handle_service_status_reports_change(late_reports)
+        update_task.reset_mock()
+        for callback, in (call[0] for call in on_commit.call_args_list):
+            callback()
+        # The late report of the 3rd hour changes the outage that the UP report of the next day ends.
+        update_task.delay.assert_called_once_with(environment_id=self.environment.id,
+                                                  days=['2020-01-01', '2020-01-02'])
+
+    @override_settings(DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED=False)
+    def test_rollups_should_not_be_updated_while_disabled(self, update_task):
+        self._create_reports_and_commit()
+        update_task.delay.assert_not_called()
+
+
+class GraphCacheInvalidationTest(TestCase):
+    def setUp(self):
+        self.environment = setup_basic_environment().environment
+        self.time = datetime.datetime(2020, 1, 1, 12, tzinfo=pytz.UTC)
+
+    def test_new_report_should_invalidate_cached_graphs_from_its_day(self):
+        with mock.patch.object(MetricGraphCache, 'invalidate') as invalidate:
+            ServiceStatusReport.objects.create(environment=self.environment, status='D', time=self.time)
+        invalidate.assert_called_with(get_environment_scope(self.environment.id), get_day(self.time))
+
+    def test_deleted_report_should_invalidate_all_cached_graphs(self):
+        report = ServiceStatusReport.objects.create(environment=self.environment, status='D', time=self.time)
+        with mock.patch.object(MetricGraphCache, 'invalidate') as invalidate:
+            report.delete()
+        invalidate.assert_called_with(get_environment_scope(self.environment.id), None)
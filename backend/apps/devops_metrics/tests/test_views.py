@@ -1,13 +1,18 @@
 import datetime
+import json
 import logging
+from urllib.parse import urlsplit
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import override_settings
 from django.utils import timezone
 import pytz
 from rest_framework import status
 from rest_framework.test import APITestCase
+from apps.dashboard.metrics.computation_base import get_day_start
 from apps.dashboard.tests.utils import setup_basic_environment
-from apps.devops_metrics.models import ChangeList, ServiceStatusReport
+from apps.devops_metrics.models import ChangeList, RawEventsArchive, ServiceStatusReport
 from apps.dashboard.models import Project, Environment, MaturityModel
 
 logger = logging.getLogger(__name__)
@@ -57,6 +62,25 @@ class ChangeListTest(APITestCase):
                                     format='json', **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_bulk_upsert(self):
+        ChangeList.objects.create(project=self.project, change_list_id='1', commit_hash='1' * 40)
+        data = [{'change_list_id': '1', 'commit_hash': '1' * 40, 'time': '2019-10-24T00:12', 'title': 'Updated'},
+                {'change_list_id': '2', 'commit_hash': '2' * 40, 'time': '2019-10-25T00:12'}]
+        response = self.client.post('/v1/devops-metrics/project/%d/changelist/bulk/' % self.project.id, data,
+                                    format='json', **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['created'] for r in response.data], [False, True])
+        self.assertEqual(self.project.changelist_set.get(change_list_id='1').title, 'Updated')
+        self.assertEqual(self.project.changelist_set.count(), 2)
+
+    def test_bulk_upsert_with_inconsistent_changelist(self):
+        ChangeList.objects.create(project=self.project, change_list_id='1', commit_hash='1' * 40)
+        data = [{'change_list_id': '2', 'commit_hash': '1' * 40, 'time': '2019-10-24T00:12'}]
+        response = self.client.post('/v1/devops-metrics/project/%d/changelist/bulk/' % self.project.id, data,
+                                    format='json', **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.project.changelist_set.count(), 1)
+
 
 class DeploymentTest(APITestCase):
     def setUp(self):
@@ -82,6 +106,49 @@ class DeploymentTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(self.project.changelist_set.get().deployment_set.get().status, 'P')
 
+    def test_bulk_create(self):
+        data = [{'commit_hash': self.change_list.commit_hash, 'status': 'P', 'time': '2019-10-24T00:12'},
+                {'commit_hash': self.change_list.commit_hash, 'status': 'F', 'time': '2019-10-25T00:12'}]
+        response = self.client.post('/v1/devops-metrics/project/%d/environment/%d/deployment/bulk/' % (self.project.id, self.environment.id),
+                                    data, format='json', **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        deployments = self.environment.deployment_set.order_by('time')
+        self.assertEqual([d.status for d in deployments], ['P', 'F'])
+        self.assertEqual([r['id'] for r in response.data], [d.id for d in deployments])
+
+    def test_bulk_create_with_invalid_items(self):
+        data = [{'commit_hash': self.change_list.commit_hash, 'status': 'P', 'time': '2019-10-24T00:12'},
+                {'commit_hash': 'unknown', 'status': 'P', 'time': '2019-10-24T00:12'},
+                {'commit_hash': self.change_list.commit_hash, 'status': 'P', 'time': '1999-10-24T00:12'},
+                {'commit_hash': self.change_list.commit_hash, 'status': 'X'}]
+        response = self.client.post('/v1/devops-metrics/project/%d/environment/%d/deployment/bulk/' % (self.project.id, self.environment.id),
+                                    data, format='json', **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r['created'] for r in response.data], [True, False, False, False])
+        self.assertIn('status', response.data[3]['errors'])
+        self.assertEqual(self.environment.deployment_set.get().id, response.data[0]['id'])
+
+    def test_export_as_csv(self):
+        for day, deployment_status in [(24, 'P'), (25, 'F'), (26, 'P')]:
+            self.environment.deployment_set.create(change_list=self.change_list, status=deployment_status,
+                                                   time=datetime.datetime(2019, 10, day, 0, 12, tzinfo=pytz.UTC))
+        response = self.client.get('/v1/devops-metrics/project/%d/environment/%d/deployment/export/' % (self.project.id, self.environment.id),
+                                   {'file_format': 'csv', 'start_time': '2019-10-25T00:00Z'},
+                                   **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,change_list_id,commit_hash,status,time')
+        self.assertEqual([line.split(',')[3:] for line in lines[1:]],
+                         [['F', '2019-10-25T00:12:00+00:00'], ['P', '2019-10-26T00:12:00+00:00']])
+
+    def test_bulk_create_without_valid_items(self):
+        data = [{'commit_hash': 'unknown', 'status': 'P'}]
+        response = self.client.post('/v1/devops-metrics/project/%d/environment/%d/deployment/bulk/' % (self.project.id, self.environment.id),
+                                    data, format='json', **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.environment.deployment_set.exists())
+
 
 class ReportTest(APITestCase):
     def setUp(self):
@@ -103,10 +170,80 @@ class ReportTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(self.project.environments.get().servicestatusreport_set.get().status, 'U')
 
+    @override_settings(DEVOPS_METRICS_SERVICE_STATUS_TRANSITIONS_ONLY=True)
+    def test_create_only_transitions(self):
+        url = '/v1/devops-metrics/project/%d/environment/%d/report/' % (self.project.id, self.environment.id)
+        responses = [
+            self.client.post(url, {'status': report_status, 'time': time}, format='json',
+                             **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+            for report_status, time in [('U', '2019-10-24T00:10Z'), ('U', '2019-10-24T00:30Z'), ('D', '2019-10-24T00:20Z'),
+                                        ('U', '2019-10-24T00:40Z'), ('U', '2019-10-24T00:50Z')]
+        ]
+        self.assertEqual({r.status_code for r in responses}, {status.HTTP_201_CREATED})
+        self.assertEqual([(r.status, r.time.minute) for r in self.environment.servicestatusreport_set.order_by('time')],
+                         [('U', 10), ('D', 20), ('U', 30), ('U', 50)])
+
+    def test_export_as_ndjson(self):
+        for day, report_status in [(24, 'U'), (25, 'D'), (26, 'U')]:
+            self.environment.servicestatusreport_set.create(status=report_status,
+                                                            time=datetime.datetime(2019, 10, day, 0, 12, tzinfo=pytz.UTC))
+        response = self.client.get('/v1/devops-metrics/project/%d/environment/%d/report/export/' % (self.project.id, self.environment.id),
+                                   {'end_time': '2019-10-26T00:12Z'},
+                                   **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row['status'], row['time']) for row in rows],
+                         [('U', '2019-10-24T00:12:00+00:00'), ('D', '2019-10-25T00:12:00+00:00')])
+
+    def test_export_with_invalid_time_range(self):
+        response = self.client.get('/v1/devops-metrics/project/%d/environment/%d/report/export/' % (self.project.id, self.environment.id),
+                                   {'start_time': '2019-10-26T00:12Z', 'end_time': '2019-10-24T00:12Z'},
+                                   **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _create_reports_with_tied_times(self):
+        time = timezone.now()
+        reports = [ServiceStatusReport(environment=self.environment, status='U', time=time - datetime.timedelta(hours=i // 2))
+                   for i in range(7)]
+        ServiceStatusReport.objects.bulk_create(reports)
+        return [r.id for r in ServiceStatusReport.objects.order_by('-time', '-id')]
+
+    def test_list_by_cursor(self):
+        expected_ids = self._create_reports_with_tied_times()
+        ids = []
+        url = '/v1/devops-metrics/project/%d/environment/%d/report/' % (self.project.id, self.environment.id)
+        query = 'cursor=&limit=3'
+        while query is not None:
+            response = self.client.get(f'{url}?{query}', **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [r['id'] for r in response.data['results']]
+            query = response.data['next'] and urlsplit(response.data['next']).query
+        self.assertEqual(ids, expected_ids)
+
+    def test_list_without_count(self):
+        self._create_reports_with_tied_times()
+        url = '/v1/devops-metrics/project/%d/environment/%d/report/' % (self.project.id, self.environment.id)
+        headers = {'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key}
+        self.assertEqual(self.client.get(url + '?cursor=&count=1', **headers).data['count'], 7)
+        response = self.client.get(url + '?limit=4&count=0', **headers)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 4)
+        response = self.client.get(url + '?' + urlsplit(response.data['next']).query, **headers)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['next'])
+
+    def test_list_by_invalid_cursor(self):
+        url = '/v1/devops-metrics/project/%d/environment/%d/report/?cursor=invalid' % (self.project.id, self.environment.id)
+        response = self.client.get(url, **{'HTTP_NEMO_PROJECT_TOKEN': self.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class DailyMetricTest(APITestCase):
     def setUp(self) -> None:
         self.env = setup_basic_environment()
+        caches[settings.CACHE_NAME_METRIC_GRAPHS].clear()
 
     def test_computation_for_day_should_include_data_of_whole_day_long(self):
         day = timezone.now().date()
@@ -133,3 +270,118 @@ class DailyMetricTest(APITestCase):
         data_points = response.json()
         self.assertEqual(len(data_points), 1)
         self.assertEqual(response.json()[0].get('value'), (late_datetime - early_datetime).seconds)
+
+    def test_all_metrics_should_be_computed_together(self):
+        day = timezone.now().date()
+        local_timezone = pytz.timezone(settings.TIME_ZONE)
+        early_datetime = datetime.datetime.combine(day, datetime.time.min.replace(tzinfo=local_timezone))
+        ServiceStatusReport.objects.create(
+            environment=self.env.environment,
+            status=ServiceStatusReport.STATUS_DOWN,
+            time=early_datetime
+        )
+        ServiceStatusReport.objects.create(
+            environment=self.env.environment,
+            status=ServiceStatusReport.STATUS_UP,
+            time=early_datetime + datetime.timedelta(hours=1)
+        )
+        url = f'/v1/devops-metrics/project/{self.env.project.pk}/environment/{self.env.environment.pk}/metric/all/'
+        params = f'period_start_date={day - datetime.timedelta(days=1)}&period_end_date={day}&checking_period_days=2'
+        response = self.client.get(f'{url}?{params}', **{'HTTP_NEMO_PROJECT_TOKEN': self.env.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data_points = response.json()
+        self.assertEqual(len(data_points), 2)
+        self.assertEqual(data_points[1].get('value'), {
+            'deployment_frequency': None,
+            'lead_time': None,
+            'time_to_restore': 60 * 60,
+            'change_failure_rate': None,
+        })
+
+    def test_cached_graph_should_be_invalidated_by_new_reports(self):
+        day = timezone.now().date()
+        local_timezone = pytz.timezone(settings.TIME_ZONE)
+        early_datetime = datetime.datetime.combine(day, datetime.time.min.replace(tzinfo=local_timezone))
+        url = f'/v1/devops-metrics/project/{self.env.project.pk}/environment/{self.env.environment.pk}/metric/time-to-restore/'
+        params = f'period_start_date={day}&period_end_date={day}&checking_period_days=2'
+
+        def get_value():
+            response = self.client.get(f'{url}?{params}', **{'HTTP_NEMO_PROJECT_TOKEN': self.env.project.auth_token.key})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.json()[0].get('value')
+        self.assertEqual(get_value(), 0)
+        ServiceStatusReport.objects.create(
+            environment=self.env.environment,
+            status=ServiceStatusReport.STATUS_DOWN,
+            time=early_datetime
+        )
+        ServiceStatusReport.objects.create(
+            environment=self.env.environment,
+            status=ServiceStatusReport.STATUS_UP,
+            time=early_datetime + datetime.timedelta(minutes=1)
+        )
+        self.assertEqual(get_value(), 60)
+
+    def test_weekly_granularity_should_give_a_data_point_per_week(self):
+        day = timezone.now().date()
+        url = f'/v1/devops-metrics/project/{self.env.project.pk}/environment/{self.env.environment.pk}/metric/deployment-frequency/'
+        params = f'period_start_date={day - datetime.timedelta(days=29)}&period_end_date={day}&granularity=weekly'
+        response = self.client.get(f'{url}?{params}', **{'HTTP_NEMO_PROJECT_TOKEN': self.env.project.auth_token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 5)
+
+    @override_settings(DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED=True)
+    def test_windows_before_archive_horizon_should_only_be_answered_from_rollups(self):
+        day = timezone.now().date()
+        RawEventsArchive.objects.create(environment=self.env.environment,
+                                        horizon=get_day_start(day - datetime.timedelta(days=10)))
+        url = f'/v1/devops-metrics/project/{self.env.project.pk}/environment/{self.env.environment.pk}'
+        period = f'period_start_date={day - datetime.timedelta(days=20)}&period_end_date={day}'
+
+        def get_status_code(path, params):
+            response = self.client.get(f'{url}/{path}/?{params}', **{'HTTP_NEMO_PROJECT_TOKEN': self.env.project.auth_token.key})
+            return response.status_code
+        self.assertEqual(get_status_code('metric/lead-time', period), status.HTTP_200_OK)
+        self.assertEqual(get_status_code('metric/time-to-restore', f'{period}&granularity=weekly'), status.HTTP_200_OK)
+        self.assertEqual(get_status_code('metric/lead-time', f'{period}&granularity=hourly'), status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_status_code('metric/all', period), status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_status_code('statistics', 'checking_period_days=7'), status.HTTP_200_OK)
+        self.assertEqual(get_status_code('statistics', 'checking_period_days=30'), status.HTTP_400_BAD_REQUEST)
+        with override_settings(DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED=False):
+            self.assertEqual(get_status_code('metric/lead-time', period), status.HTTP_400_BAD_REQUEST)
+
+
+class PortfolioTest(APITestCase):
+    def setUp(self) -> None:
+        self.env = setup_basic_environment()
+        self.other_environment = Environment.objects.create(project=self.env.project, name="Other Environment")
+        invisible_project = Project.objects.create(name='Project #2', maturity_model=self.env.maturity_model,
+                                                   creator_id=self.env.user.id)
+        Environment.objects.create(project=invisible_project, name="Invisible Environment")
+        now = timezone.now()
+        ServiceStatusReport.objects.create(environment=self.env.environment, status=ServiceStatusReport.STATUS_DOWN,
+                                           time=now - datetime.timedelta(hours=2))
+        ServiceStatusReport.objects.create(environment=self.env.environment, status=ServiceStatusReport.STATUS_UP,
+                                           time=now - datetime.timedelta(hours=1))
+        self.client.force_login(self.env.user)
+
+    def test_metrics_of_visible_environments_should_be_returned(self):
+        response = self.client.get('/v1/devops-metrics/portfolio/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([d['environment']['id'] for d in data], [self.env.environment.id, self.other_environment.id])
+        self.assertEqual(data[0]['time_to_restore'], 60 * 60)
+        self.assertEqual(data[1]['time_to_restore'], 0)
+        self.assertIsNone(data[0]['lead_time'])
+
+    def test_default_environments_only_should_exclude_other_environments(self):
+        response = self.client.get('/v1/devops-metrics/portfolio/?default_environments_only=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([d['environment']['id'] for d in response.json()], [self.env.environment.id])
+
+    def test_checking_period_before_archive_horizon_should_be_rejected(self):
+        RawEventsArchive.objects.create(environment=self.other_environment,
+                                        horizon=timezone.now() - datetime.timedelta(days=100))
+        self.assertEqual(self.client.get('/v1/devops-metrics/portfolio/').status_code, status.HTTP_200_OK)
+        response = self.client.get('/v1/devops-metrics/portfolio/?checking_period_days=120')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,8 +1,72 @@
+import bisect
 from datetime import datetime, timedelta
-from typing import Optional, List, Tuple, Any, Dict
+from typing import Optional, List, Sequence, Tuple
 
+from apps.dashboard.metrics.computation_base import SlidingTimeWindows, prefix_sums, unzip_columns
 from apps.devops_metrics.metric_computer import MetricComputer
-from apps.devops_metrics.models import ServiceStatusReport
+from apps.devops_metrics.models import DailyEnvironmentMetricRollup, ServiceStatusReport
+from apps.devops_metrics.rollups import DailyRollupMetricComputerMixin
+from apps.devops_metrics.sql_metric_computer import SqlMetricComputer
+
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+class OutageIntervals:
+    """
+    DOWN->UP transitions of a time-sorted stream of service status reports, paired once.
+
+    An outage starts at the first DOWN report after the previous outage ended (or after the stream started),
+     and ends at the first UP report after that.
+    The outages are kept by the indices of their reports; so the outages of any window of reports `[start, end)`,
+     paired as if the stream started at `start`, are answered by bisect and prefix sums of the durations.
+    """
+
+    def __init__(self, times: Sequence[datetime], statuses: Sequence[str]):
+        self.times = times
+        self.down_indices: List[int] = []
+        self.up_indices: List[int] = []
+        for i, status in enumerate(statuses):
+            outage_is_ongoing = len(self.down_indices) > len(self.up_indices)
+            if status == ServiceStatusReport.STATUS_DOWN:
+                if not outage_is_ongoing:
+                    self.down_indices.append(i)
+            elif outage_is_ongoing:
+                self.up_indices.append(i)
+        if len(self.down_indices) > len(self.up_indices):
+            # The last outage is never restored.
+            self.down_indices.pop()
+        self.duration_sums = prefix_sums(
+            (times[up] - times[down]) // _ONE_MICROSECOND
+            for down, up in zip(self.down_indices, self.up_indices)
+        )
+        self.next_down_indices = self._get_next_down_indices(statuses)
+
+    @staticmethod
+    def _get_next_down_indices(statuses: Sequence[str]) -> List[int]:
+        """Returns the index of the first DOWN report at or after each index (`len(statuses)` if none)."""
+        next_down_indices = [len(statuses)] * (len(statuses) + 1)
+        for i in reversed(range(len(statuses))):
+            is_down = statuses[i] == ServiceStatusReport.STATUS_DOWN
+            next_down_indices[i] = i if is_down else next_down_indices[i + 1]
+        return next_down_indices
+
+    def get_total_down_time_and_count(self, start: int, end: int) -> Tuple[timedelta, int]:
+        first_down = self.next_down_indices[start]
+        if first_down >= end:
+            return timedelta(0), 0
+        # The outage that the first DOWN of the window belongs to.
+        # Within the window, it starts at that DOWN; and the next outages are the same as the ones of the whole stream.
+        first_outage = bisect.bisect_right(self.down_indices, first_down) - 1
+        if first_outage < 0 or self.up_indices[first_outage] < first_down:
+            # The first DOWN of the window belongs to the last outage which is never restored.
+            return timedelta(0), 0
+        outages_end = bisect.bisect_left(self.up_indices, end, lo=first_outage)
+        count = outages_end - first_outage
+        if count == 0:
+            return timedelta(0), 0
+        cut_time = self.times[first_down] - self.times[self.down_indices[first_outage]]
+        total_down_time = (self.duration_sums[outages_end] - self.duration_sums[first_outage]) * _ONE_MICROSECOND - cut_time
+        return total_down_time, count
 
 
 class TimeToRestoreComputer(MetricComputer[Optional[int]]):
@@ -15,37 +79,84 @@ class TimeToRestoreComputer(MetricComputer[Optional[int]]):
             step_length: timedelta,
     ) -> List[Tuple[datetime, Optional[int]]]:
         last_timestamp = first_timestamp + (num_timestamps-1) * step_length
-        all_sit_change_times = list(ServiceStatusReport.objects
-                                    .filter(environment=self.environment)
-                                    .filter(time__gte=first_timestamp - self.checking_period)
-                                    .filter(time__lt=last_timestamp)
-                                    .order_by('time')
-                                    .only('time', 'status')
-                                    .seal())
+        all_sit_changes = list(ServiceStatusReport.objects
+                               .filter(environment=self.environment)
+                               .filter(time__gte=first_timestamp - self.checking_period)
+                               .filter(time__lt=last_timestamp)
+                               .order_by('time', 'id')
+                               .values_list('time', 'status'))
+        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps + len(all_sit_changes))
+        times, statuses = unzip_columns(all_sit_changes, 2)
+        return self.compute_for_service_status_reports(times, statuses, first_timestamp, num_timestamps, step_length)
+
+    def compute_for_service_status_reports(
+            self,
+            times: Sequence[datetime],
+            statuses: Sequence[str],
+            first_timestamp: datetime,
+            num_timestamps: int,
+            step_length: timedelta,
+    ) -> List[Tuple[datetime, Optional[int]]]:
+        """Gets the time-sorted service status reports of the environment, covering the checking periods of the timestamps."""
         ttrs: List[Tuple[datetime, Optional[int]]] = []
-        self._warn_about_performance_if_operations_count_is_too_large(num_timestamps * len(all_sit_change_times))
-        for i in range(num_timestamps):
-            current_dt = first_timestamp + i * step_length
-            avg_ttr = self._compute_single_timestamp_avg_ttr(all_sit_change_times, current_dt)
+        windows = SlidingTimeWindows(times, self.checking_period)
+        outages = OutageIntervals(times, statuses)
+        for current_dt, start, end in windows.iterate(first_timestamp, num_timestamps, step_length):
+            total_down_time, count = outages.get_total_down_time_and_count(start, end)
+            avg_ttr = total_down_time / count if count > 0 else None
             ttrs.append((current_dt, int(avg_ttr.total_seconds()) if avg_ttr is not None else 0))
         return ttrs
 
-    def _compute_single_timestamp_avg_ttr(self, all_sit_change_times: List[Dict[str, Any]], current_dt: datetime) -> Optional[timedelta]:
-        checking_first_dt = current_dt - self.checking_period
-        total_down_time = timedelta(0)
-        last_down_report: Optional[Dict[str, Any]] = None
-        count = 0
-        for sit_change in all_sit_change_times:
-            if not checking_first_dt <= sit_change.time < current_dt:
-                continue
-            if sit_change.status == ServiceStatusReport.STATUS_DOWN:
-                if last_down_report is None:
-                    last_down_report = sit_change
-            else:
-                if last_down_report is None:
-                    continue
-                else:
-                    total_down_time += sit_change.time - last_down_report.time
-                    count += 1
-                    last_down_report = None
-        return total_down_time / count if count > 0 else None
+
+class TimeToRestoreRollupComputer(DailyRollupMetricComputerMixin[Optional[int]], TimeToRestoreComputer):
+    """
+    The outages of the rollups are the ones restored in a window with their whole down times (see
+     `DailyEnvironmentMetricRollup`), rather than cut by its start; so only the archived windows are answered from them.
+    """
+    ARCHIVED_WINDOWS_ONLY = True
+
+    # Override
+    def compute_for_rollups(self, rollups: Sequence[DailyEnvironmentMetricRollup]) -> Optional[int]:
+        count = sum(r.down_times_count for r in rollups)
+        total_down_time = sum((r.down_times_sum for r in rollups), timedelta(0))
+        return int((total_down_time / count).total_seconds()) if count > 0 else 0
+
+
+class TimeToRestoreSqlComputer(SqlMetricComputer[Optional[int]]):
+
+    # Override
+    def get_windows_query(self) -> str:
+        # An outage ends at an UP report right after a DOWN one, and starts at the first DOWN of that run of DOWNs;
+        #  unless the run starts before the window, in which case it starts at the first report of the window.
+        return f"""
+            , reports AS (
+                SELECT id, time, status, LAG(status) OVER w AS previous_status, LAG(time) OVER w AS previous_time
+                FROM {ServiceStatusReport._meta.db_table}
+                WHERE environment_id = %(environment_id)s AND time >= %(range_start)s AND time < %(range_end)s
+                WINDOW w AS (ORDER BY time, id)
+            ), outage_reports AS (
+                SELECT *, MAX(
+                    CASE WHEN status = '{ServiceStatusReport.STATUS_DOWN}'
+                        AND previous_status IS DISTINCT FROM '{ServiceStatusReport.STATUS_DOWN}'
+                    THEN time END
+                ) OVER (ORDER BY time, id) AS outage_time
+                FROM reports
+            )
+            SELECT ts.i, SUM(r.time - GREATEST(r.outage_time, w.first_time)), COUNT(r.time)
+            FROM timestamps ts
+            LEFT JOIN LATERAL (
+                SELECT MIN(time) AS first_time
+                FROM reports
+                WHERE time >= ts.t - %(checking_period)s AND time < ts.t
+            ) w ON TRUE
+            LEFT JOIN outage_reports r
+                ON r.status = '{ServiceStatusReport.STATUS_UP}' AND r.previous_status = '{ServiceStatusReport.STATUS_DOWN}'
+                AND r.previous_time >= ts.t - %(checking_period)s AND r.time < ts.t
+            GROUP BY ts.i
+            ORDER BY ts.i
+        """
+
+    # Override
+    def convert_window_row(self, row: Sequence) -> Optional[int]:
+        total_down_time, count = row
+        return int((total_down_time / count).total_seconds()) if count > 0 else 0
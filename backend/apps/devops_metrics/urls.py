@@ -34,6 +34,14 @@ project_environment_router.register('report', views.ServiceStatusReportViewSet,
                                     basename='project-environment-report',
                                     parents_query_lookups=[PARENT_LOOKUP_PROJECT, PARENT_LOOKUP_ENVIRONMENT])
 
+# Pattern : project/{id}/ingestion-receipt/
+project_router.register('ingestion-receipt', views.IngestionReceiptViewSet,
+                        basename='project-ingestion-receipt',
+                        parents_query_lookups=[PARENT_LOOKUP_PROJECT])
+
+# Pattern : portfolio/
+router.register('portfolio', views.PortfolioViewSet, basename='portfolio')
+
 urlpatterns = [
     path('', include(router.urls)),
 ]
@@ -1,45 +1,91 @@
+import dataclasses
 import logging
-from datetime import timedelta
-from typing import Type
+from datetime import datetime, timedelta
+from typing import Sequence, Type
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from guardian.shortcuts import get_objects_for_user
 from rest_condition import Or
-from rest_framework import viewsets, mixins
+from rest_framework import viewsets, mixins, serializers, status
 from rest_framework.decorators import permission_classes, action
 from rest_framework.response import Response
 from rest_framework_extensions.mixins import NestedViewSetMixin
 
+from apps.dashboard.metrics.computation_base import get_day_start
+from apps.dashboard.metrics.graph_cache import MetricGraphCache, get_environment_scope, get_project_changelists_scope
 from apps.dashboard.models import Project, Environment
 from apps.dashboard.permissions import NestedModelsRelatedToProjectPermissions
 from apps.devops_metrics.constants import (
     PROJECT_ID_URL_PARAMETER,
+    ENVIRONMENT_ID_URL_PARAMETER,
     DEPLOYMENT_NOT_ENOUGH,
+    MAX_BULK_DEPLOYMENTS,
+    MAX_BULK_CHANGELISTS,
     KEY_CHANGE_FAILURE_RATE,
     KEY_TIME_TO_RESTORE,
     KEY_LEAD_TIME,
     KEY_DEPLOYMENT_FREQUENCY,
-    DEFAULT_CHECKING_PERIOD_DAYS)
-from apps.devops_metrics.change_failure_rate.computation import ChangeFailureRateComputer
-from apps.devops_metrics.deployment_frequency.computation import DeploymentFrequencyComputer
-from apps.devops_metrics.time_to_restore.computation import TimeToRestoreComputer
-from apps.devops_metrics.lead_time.computation import LeadTimeComputer
+    DEFAULT_CHECKING_PERIOD_DAYS,
+    GRANULARITY_STEP_LENGTHS,
+    MAX_GRAPH_DATA_POINTS)
+from apps.devops_metrics.change_failure_rate.computation import (
+    ChangeFailureRateComputer,
+    ChangeFailureRateRollupComputer,
+    ChangeFailureRateSqlComputer)
+from apps.devops_metrics.deployment_frequency.computation import (
+    DeploymentFrequencyComputer,
+    DeploymentFrequencyRollupComputer,
+    DeploymentFrequencySqlComputer)
+from apps.devops_metrics.time_to_restore.computation import (
+    TimeToRestoreComputer,
+    TimeToRestoreRollupComputer,
+    TimeToRestoreSqlComputer)
+from apps.devops_metrics.lead_time.computation import LeadTimeComputer, LeadTimeRollupComputer, LeadTimeSqlComputer
 from apps.devops_metrics.filters import EnvironmentThroughProjectFilterBackend
 from apps.devops_metrics.metric_computer import MetricComputer
+from apps.devops_metrics.multi_metric_computer import MultiMetricComputer, compute_metrics_of_environments
 from apps.devops_metrics.models import ChangeList, \
-    Deployment, ServiceStatusReport
+    Deployment, ServiceStatusReport, IngestionReceipt
+from apps.devops_metrics.bulk_operations import bulk_create_deployments, bulk_upsert_changelists
+from apps.devops_metrics.compaction import (
+    delete_redundant_service_status_reports,
+    get_redundant_service_status_report_ids,
+    get_service_status_reports_lateness_horizon)
+from apps.devops_metrics.export import RawEventsExportViewSetMixin
+from apps.devops_metrics.ingestion import ASYNC_QUERY_PARAMETER, AsyncIngestionViewSetMixin
+from apps.devops_metrics.rollups import DailyRollupMetricComputerMixin, get_raw_events_archive_horizons
 from apps.devops_metrics.permissions import ApiProjectTokenPermission, \
     NestedApiProjectTokenPermission
 from apps.devops_metrics.serializers import (
     ProjectSerializer,
     ChangeListSerializer,
+    ChangeListBulkItemSerializer,
+    DeploymentBulkItemSerializer,
+    IngestionReceiptSerializer,
     DeploymentSerializer,
     ServiceStatusReportSerializer,
-    DailyMetricReportRequestParametersSerializer)
+    DailyMetricReportRequestParametersSerializer,
+    PortfolioRequestParametersSerializer)
 from apps.dashboard.serializers import EnvironmentSerializer
 from apps.utils import general_utils
+from apps.utils.pagination import KeysetPagination
+from apps.utils.validation_utils import InconsistentDataError
 
 logger = logging.getLogger(__name__)
 
 
+def _check_raw_events_are_not_archived(environment_ids: Sequence[int], checking_start: datetime) -> None:
+    """Rejects the windows starting before the archive horizon of any of the environments; their raw events are deleted."""
+    for environment_id, horizon in get_raw_events_archive_horizons(environment_ids).items():
+        if checking_start < horizon:
+            raise serializers.ValidationError(
+                f"The raw events of environment {environment_id} before {horizon.isoformat()} are archived; "
+                f"only the daily graphs of the DevOps metrics are available for that period.")
+
+
 @permission_classes((Or(ApiProjectTokenPermission, NestedModelsRelatedToProjectPermissions),))
 class ProjectViewSet(NestedViewSetMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     queryset = Project.objects.all()
@@ -61,25 +107,62 @@ class EnvironmentViewSet(NestedViewSetMixin, viewsets.ModelViewSet):
 
         environment = self.get_object()
         now = timezone.now()
-
-        def compute_for_now(computer_cls: Type[MetricComputer]):
-            computer = computer_cls(environment, checking_period)
-            return computer.compute_for_single_timestamp(now)
+        _check_raw_events_are_not_archived([environment.id], now - checking_period)
+        metrics = MultiMetricComputer(environment, checking_period).compute_for_single_timestamp(now)
         data = {
-            KEY_DEPLOYMENT_FREQUENCY: str(general_utils.coalesce(compute_for_now(DeploymentFrequencyComputer), DEPLOYMENT_NOT_ENOUGH)),
-            KEY_LEAD_TIME: str(general_utils.coalesce(compute_for_now(LeadTimeComputer), DEPLOYMENT_NOT_ENOUGH)),
-            KEY_TIME_TO_RESTORE: str(general_utils.coalesce(compute_for_now(TimeToRestoreComputer), DEPLOYMENT_NOT_ENOUGH)),
-            KEY_CHANGE_FAILURE_RATE: str(general_utils.coalesce(compute_for_now(ChangeFailureRateComputer), DEPLOYMENT_NOT_ENOUGH)),
+            key: str(general_utils.coalesce(metrics[key], DEPLOYMENT_NOT_ENOUGH))
+            for key in [KEY_DEPLOYMENT_FREQUENCY, KEY_LEAD_TIME, KEY_TIME_TO_RESTORE, KEY_CHANGE_FAILURE_RATE]
         }
         return Response(data)
 
+    _DAILY_ROLLUP_METRIC_COMPUTER_CLASSES = {
+        ChangeFailureRateComputer: ChangeFailureRateRollupComputer,
+        DeploymentFrequencyComputer: DeploymentFrequencyRollupComputer,
+        LeadTimeComputer: LeadTimeRollupComputer,
+        TimeToRestoreComputer: TimeToRestoreRollupComputer,
+    }
+
+    _SQL_METRIC_COMPUTER_CLASSES = {
+        ChangeFailureRateComputer: ChangeFailureRateSqlComputer,
+        DeploymentFrequencyComputer: DeploymentFrequencySqlComputer,
+        LeadTimeComputer: LeadTimeSqlComputer,
+        TimeToRestoreComputer: TimeToRestoreSqlComputer,
+    }
+
     def handle_daily_metric(self, metric_computer_cls: Type[MetricComputer], parameters):
+        if settings.DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED and metric_computer_cls in self._DAILY_ROLLUP_METRIC_COMPUTER_CLASSES:
+            metric_computer_cls = self._DAILY_ROLLUP_METRIC_COMPUTER_CLASSES[metric_computer_cls]
+        elif settings.DEVOPS_METRICS_SQL_COMPUTERS_ENABLED:
+            metric_computer_cls = self._SQL_METRIC_COMPUTER_CLASSES.get(metric_computer_cls, metric_computer_cls)
         environment = self.get_object()
         daily_metric_parameters_parser = DailyMetricReportRequestParametersSerializer(data=parameters)
         daily_metric_parameters_parser.is_valid(raise_exception=True)
         parsed_parameters = daily_metric_parameters_parser.validated_data
-        metric_computer = metric_computer_cls(environment, timedelta(days=parsed_parameters['checking_period_days']))
-        data = metric_computer.get_daily_graph_data_serialized(parsed_parameters['period_start_date'], parsed_parameters['period_end_date'])
+        checking_period = timedelta(days=parsed_parameters['checking_period_days'])
+        step_length = GRANULARITY_STEP_LENGTHS[parsed_parameters['granularity']]
+        # Only the rollup computers answer the windows before the archive horizon, and only for the whole-day steps.
+        if not (issubclass(metric_computer_cls, DailyRollupMetricComputerMixin) and step_length % timedelta(days=1) == timedelta(0)):
+            period_start = get_day_start(parsed_parameters['period_start_date'])
+            period_end = get_day_start(parsed_parameters['period_end_date'] + timedelta(days=1))
+            _check_raw_events_are_not_archived([environment.id], min(period_start + step_length, period_end) - checking_period)
+        metric_computer = metric_computer_cls(environment, checking_period)
+        data = MetricGraphCache().get_or_compute(
+            scopes=[get_environment_scope(environment.id), get_project_changelists_scope(environment.project_id)],
+            key_parts=[
+                metric_computer_cls.__name__,
+                parsed_parameters['checking_period_days'],
+                parsed_parameters['period_start_date'],
+                parsed_parameters['period_end_date'],
+                parsed_parameters['granularity'],
+            ],
+            period_end_date=parsed_parameters['period_end_date'],
+            compute=lambda: metric_computer.get_graph_data_serialized(
+                parsed_parameters['period_start_date'],
+                parsed_parameters['period_end_date'],
+                step_length=step_length,
+                max_data_points=MAX_GRAPH_DATA_POINTS,
+            ),
+        )
         return Response(data)
 
     @action(detail=True, url_path="metric/change-failure-rate", name="daily-change-failure-rate")
@@ -110,27 +193,148 @@ class EnvironmentViewSet(NestedViewSetMixin, viewsets.ModelViewSet):
             parameters=request.query_params,
         )
 
+    @action(detail=True, url_path="metric/all", name="daily-all-metrics")
+    def daily_all_metrics(self, request, *args, **kwargs):
+        return self.handle_daily_metric(
+            metric_computer_cls=MultiMetricComputer,
+            parameters=request.query_params,
+        )
+
+
+class PortfolioViewSet(viewsets.GenericViewSet):
+    """DevOps metrics of all the environments (or the default environments) of the projects visible to the user."""
+    pagination_class = None
+
+    def get_queryset(self):
+        projects = get_objects_for_user(self.request.user, 'dashboard.view_project', accept_global_perms=False)
+        return Environment.objects \
+            .filter(project__in=projects) \
+            .select_related('project') \
+            .order_by('project_id', 'id')
+
+    def list(self, request, *args, **kwargs):
+        parameters_serializer = PortfolioRequestParametersSerializer(data=request.query_params)
+        parameters_serializer.is_valid(raise_exception=True)
+        parameters = parameters_serializer.validated_data
+        environments = self.get_queryset()
+        if parameters['default_environments_only']:
+            environments = environments.filter(project__default_environment=F('id'))
+        environments = list(environments)
+        checking_period = timedelta(days=parameters['checking_period_days'])
+        now = timezone.now()
+        _check_raw_events_are_not_archived([environment.id for environment in environments], now - checking_period)
+        metrics_of_environments = compute_metrics_of_environments(environments, checking_period=checking_period, timestamp=now)
+        data = [
+            {
+                'project': {'id': environment.project_id, 'name': environment.project.name},
+                'environment': {'id': environment.id, 'name': environment.name},
+                **metrics_of_environments[environment.id],
+            }
+            for environment in environments
+        ]
+        return Response(data)
+
 
 @permission_classes((Or(NestedApiProjectTokenPermission, NestedModelsRelatedToProjectPermissions),))
-class ChangeListViewSet(NestedViewSetMixin, viewsets.ModelViewSet):
+class ChangeListViewSet(NestedViewSetMixin, AsyncIngestionViewSetMixin, RawEventsExportViewSetMixin, viewsets.ModelViewSet):
     queryset = ChangeList.objects.all()
     serializer_class = ChangeListSerializer
+    pagination_class = KeysetPagination
+    ingestion_kind = IngestionReceipt.KIND_CHANGELIST
+    ingestion_serializer_class = ChangeListBulkItemSerializer
+    export_fields = {'id': 'id', 'change_list_id': 'change_list_id', 'commit_hash': 'commit_hash', 'time': 'time',
+                     'title': 'title'}
+    export_file_name = 'changelists'
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['project_id'] = self.kwargs.get(PROJECT_ID_URL_PARAMETER)
         return context
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_upsert(self, request, *args, **kwargs):
+        """
+        Creates (or updates the title and time of) the changelists of a list of `{change_list_id, commit_hash, time, title}` items;
+         e.g. to import the history of a repository.
+        """
+        project = get_object_or_404(Project, pk=self.kwargs[PROJECT_ID_URL_PARAMETER])
+        items_serializer = ChangeListBulkItemSerializer(data=request.data, many=True, allow_empty=False)
+        items_serializer.is_valid(raise_exception=True)
+        if len(items_serializer.validated_data) > MAX_BULK_CHANGELISTS:
+            raise serializers.ValidationError(f"At most {MAX_BULK_CHANGELISTS} changelists can be saved at once.")
+        try:
+            results = bulk_upsert_changelists(project, items_serializer.validated_data)
+        except InconsistentDataError as e:
+            raise serializers.ValidationError(str(e))
+        return Response([dataclasses.asdict(result) for result in results])
+
 
 @permission_classes((Or(NestedApiProjectTokenPermission, NestedModelsRelatedToProjectPermissions),))
-class DeploymentViewSet(viewsets.ModelViewSet):
+class DeploymentViewSet(AsyncIngestionViewSetMixin, RawEventsExportViewSetMixin, viewsets.ModelViewSet):
     queryset = Deployment.objects.all()
     serializer_class = DeploymentSerializer
+    pagination_class = KeysetPagination
     filter_backends = [EnvironmentThroughProjectFilterBackend]
+    ingestion_kind = IngestionReceipt.KIND_DEPLOYMENT
+    ingestion_serializer_class = DeploymentBulkItemSerializer
+    export_fields = {'id': 'id', 'change_list_id': 'change_list__change_list_id', 'commit_hash': 'change_list__commit_hash',
+                     'status': 'status', 'time': 'time'}
+    export_file_name = 'deployments'
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Creates the deployments of a list of `{commit_hash, status, time}` items, with the same rules as creating one.
+        The valid items are created even if others are not; the response has the result of each item, in order.
+        """
+        environment = get_object_or_404(Environment, pk=self.kwargs[ENVIRONMENT_ID_URL_PARAMETER],
+                                        project_id=self.kwargs[PROJECT_ID_URL_PARAMETER])
+        items = serializers.ListField(
+            child=serializers.DictField(),
+            allow_empty=False,
+            max_length=MAX_BULK_DEPLOYMENTS,
+        ).run_validation(request.data)
+        results = bulk_create_deployments(environment, items)
+
+        created_count = sum(result['created'] for result in results)
+        if created_count == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created_count > 0:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
 
 
 @permission_classes((Or(NestedApiProjectTokenPermission, NestedModelsRelatedToProjectPermissions),))
-class ServiceStatusReportViewSet(viewsets.ModelViewSet):
+class ServiceStatusReportViewSet(AsyncIngestionViewSetMixin, RawEventsExportViewSetMixin, viewsets.ModelViewSet):
     queryset = ServiceStatusReport.objects.all()
     serializer_class = ServiceStatusReportSerializer
+    pagination_class = KeysetPagination
     filter_backends = [EnvironmentThroughProjectFilterBackend]
+    ingestion_kind = IngestionReceipt.KIND_SERVICE_STATUS_REPORT
+    ingestion_serializer_class = ServiceStatusReportSerializer
+    export_fields = {'id': 'id', 'status': 'status', 'time': 'time'}
+    export_file_name = 'service_status_reports'
+
+    # Override
+    def create(self, request, *args, **kwargs):
+        if not settings.DEVOPS_METRICS_SERVICE_STATUS_TRANSITIONS_ONLY or request.query_params.get(ASYNC_QUERY_PARAMETER) == '1':
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_create(serializer)
+            delete_redundant_service_status_reports(get_redundant_service_status_report_ids(
+                environment_id=self.kwargs[ENVIRONMENT_ID_URL_PARAMETER],
+                start=serializer.instance.time,
+                horizon=get_service_status_reports_lateness_horizon(),
+            ))
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(serializer.data))
+
+
+@permission_classes((Or(NestedApiProjectTokenPermission, NestedModelsRelatedToProjectPermissions),))
+class IngestionReceiptViewSet(NestedViewSetMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Outcome of the records posted with `?async=1`."""
+    queryset = IngestionReceipt.objects.all()
+    serializer_class = IngestionReceiptSerializer
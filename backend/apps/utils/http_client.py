@@ -0,0 +1,92 @@
+import time
+from typing import Optional
+
+import requests
+from django.conf import settings
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import Counter, Histogram
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+# Retried for the idempotent methods only (and on connection errors, which happen before sending the request, for all).
+RETRIED_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+request_seconds = Histogram(
+    'nemo_integration_request_seconds',
+    "Time of the HTTP requests to an integration (e.g. GitLab), including the retries.",
+    ['integration', 'method'], namespace=NAMESPACE, buckets=_SECONDS_BUCKETS,
+)
+request_errors = Counter(
+    'nemo_integration_request_errors',
+    "Failed HTTP requests to an integration; by the error (the status code, or the kind of the exception).",
+    ['integration', 'method', 'error'], namespace=NAMESPACE,
+)
+
+
+class HttpClient:
+    """
+    The HTTP client of an integration (e.g. GitLab), to be shared by its calls: keeps the connections alive (in a pool
+     per host), sets the connect and read timeouts, retries the failed connections and the idempotent requests which
+     are failed temporarily (by `RETRIED_STATUS_CODES`) with exponential backoff, and exports the latency and the
+     errors of the requests labelled by the integration.
+
+    The responses are returned as `requests` returns them (e.g. the retried ones with their last status code); the
+     timeouts and the connection errors are raised as `requests` exceptions.
+    """
+
+    def __init__(self, integration: str,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 backoff_factor: Optional[float] = None,
+                 pool_max_size: Optional[int] = None) -> None:
+        self.integration = integration
+        self.timeout = (
+            settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS if connect_timeout is None else connect_timeout,
+            settings.HTTP_CLIENT_READ_TIMEOUT_SECONDS if read_timeout is None else read_timeout,
+        )
+        retry = Retry(
+            total=settings.HTTP_CLIENT_MAX_RETRIES if max_retries is None else max_retries,
+            status_forcelist=RETRIED_STATUS_CODES,
+            backoff_factor=settings.HTTP_CLIENT_RETRY_BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+            raise_on_status=False,
+        )
+        pool_max_size = settings.HTTP_CLIENT_POOL_MAX_SIZE if pool_max_size is None else pool_max_size
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_max_size)
+        # Shared by the threads too; it keeps no state of the requests but the connection pools (cookies aren't used).
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self._send(method, url, **kwargs)
+        except requests.RequestException as e:
+            request_errors.labels(integration=self.integration, method=method, error=type(e).__name__).inc()
+            raise
+        finally:
+            request_seconds.labels(integration=self.integration, method=method).observe(time.perf_counter() - start)
+        if response.status_code >= 400:
+            request_errors.labels(integration=self.integration, method=method, error=str(response.status_code)).inc()
+        return response
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.ConnectionError as e:
+            # `requests` raises the read timeouts of the exhausted retries as connection errors.
+            max_retry_error = e.args[0] if e.args else None
+            if isinstance(max_retry_error, MaxRetryError) and isinstance(max_retry_error.reason, ReadTimeoutError):
+                raise requests.ReadTimeout(max_retry_error, request=e.request) from e
+            raise
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
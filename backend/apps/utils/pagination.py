@@ -0,0 +1,159 @@
+import base64
+import binascii
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    The limit/offset pagination, which pages by the `(<ordering_field>, id)` keyset instead (newest first) if the `cursor`
+     query parameter is given; e.g. `?cursor=&limit=100` for the first page, and then the `next` links.
+    So the deep pages are read from the index, instead of scanning and discarding all the earlier rows.
+
+    The total `count` is computed by default in the limit/offset mode only; `?count=0` or `?count=1` overrides it.
+    The keyset pages have no `previous` link, and ignore any other ordering of the view.
+    """
+    ordering_field = 'time'
+    cursor_query_param = 'cursor'
+    cursor_query_description = 'The cursor of the page (empty for the first one); pages by the keyset instead of the offset.'
+    count_query_param = 'count'
+    count_query_description = 'Whether to compute the total count of the results (0 or 1).'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        self.include_count = self._is_count_requested(request, default=not self.use_cursor)
+        if self.use_cursor:
+            return self._paginate_queryset_by_keyset(queryset, request)
+        if self.include_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.count = None
+        self.offset = self.get_offset(request)
+        self.request = request
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        return results[:self.limit]
+
+    def _is_count_requested(self, request, default: bool) -> bool:
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return default
+        return value.lower() not in ('0', 'false')
+
+    def _paginate_queryset_by_keyset(self, queryset, request):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.request = request
+        self.count = self.get_count(queryset) if self.include_count else None
+
+        queryset = queryset.order_by(f'-{self.ordering_field}', '-id')
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            value, id_ = self.decode_cursor(cursor)
+            # The redundant `<=` condition keeps the range scan on the index of the ordering field.
+            queryset = queryset \
+                .filter(**{f'{self.ordering_field}__lte': value}) \
+                .filter(Q(**{f'{self.ordering_field}__lt': value}) | Q(id__lt=id_))
+        results = list(queryset[:self.limit + 1])
+        self.has_next = len(results) > self.limit
+        results = results[:self.limit]
+        self.next_cursor = self.encode_cursor(results[-1]) if self.has_next else None
+        return results
+
+    def encode_cursor(self, instance) -> str:
+        value = getattr(instance, self.ordering_field)
+        return base64.urlsafe_b64encode(f'{value.isoformat()}|{instance.id}'.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            value, id_ = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+            value = parse_datetime(value)
+            id_ = int(id_)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, id_
+
+    def get_next_link(self):
+        if self.use_cursor:
+            if self.next_cursor is None:
+                return None
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            url = remove_query_param(url, self.offset_query_param)
+            return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+        if self.count is None:
+            if not self.has_next:
+                return None
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.use_cursor:
+            return None
+        return super().get_previous_link()
+
+    def get_paginated_response(self, data):
+        response_data = OrderedDict()
+        if self.include_count:
+            response_data['count'] = self.count
+        response_data['next'] = self.get_next_link()
+        response_data['previous'] = self.get_previous_link()
+        response_data['results'] = data
+        return Response(response_data)
+
+    def get_html_context(self):
+        if self.use_cursor or self.count is None:
+            return {'previous_url': self.get_previous_link(), 'next_url': self.get_next_link(), 'page_links': []}
+        return super().get_html_context()
+
+    def get_schema_fields(self, view):
+        assert coreapi is not None, 'coreapi must be installed to use `get_schema_fields()`'
+        assert coreschema is not None, 'coreschema must be installed to use `get_schema_fields()`'
+        return super().get_schema_fields(view) + [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.String(title='Cursor', description=self.cursor_query_description),
+            ),
+            coreapi.Field(
+                name=self.count_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.Integer(title='Count', description=self.count_query_description),
+            ),
+        ]
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.cursor_query_description,
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.count_query_description,
+                'schema': {'type': 'integer'},
+            },
+        ]
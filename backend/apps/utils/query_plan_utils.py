@@ -0,0 +1,54 @@
+import json
+from typing import Iterable, List, Set
+
+from django.db import connections
+
+SEQUENTIAL_SCAN_NODE_TYPE = 'Seq Scan'
+INDEX_SCAN_NODE_TYPES = ('Index Scan', 'Index Only Scan')
+
+
+def _iterate_plan_nodes(plan: dict) -> Iterable[dict]:
+    yield plan
+    for sub_plan in plan.get('Plans', []):
+        yield from _iterate_plan_nodes(sub_plan)
+
+
+def _is_full_scan(node: dict) -> bool:
+    if node['Node Type'] == SEQUENTIAL_SCAN_NODE_TYPE:
+        return True
+    # e.g. a scan of the whole primary key index, only to avoid the (discouraged) sequential scan
+    return node['Node Type'] in INDEX_SCAN_NODE_TYPES and 'Index Cond' not in node
+
+
+def get_fully_scanned_tables(sql: str, discourage_sequential_scans: bool = True, using: str = 'default') -> Set[str]:
+    """
+    Returns the tables that PostgreSQL plans to scan fully for the (already interpolated) query; i.e. sequentially or
+     through a whole index. E.g. for the `sql` of the queries captured by `CaptureQueriesContext`.
+
+    On small (e.g. seeded) tables, the planner prefers sequential scans even if there is a usable index; so they are
+     discouraged by default (with `enable_seqscan`), and a full scan in the plan means no index could narrow it.
+    """
+    with connections[using].cursor() as cursor:
+        if discourage_sequential_scans:
+            cursor.execute("SET enable_seqscan = off")
+        try:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            [(plans,)] = cursor.fetchall()
+        finally:
+            if discourage_sequential_scans:
+                cursor.execute("RESET enable_seqscan")
+    if isinstance(plans, str):
+        plans = json.loads(plans)
+    return {
+        node['Relation Name']
+        for plan in plans
+        for node in _iterate_plan_nodes(plan['Plan'])
+        if _is_full_scan(node)
+    }
+
+
+def analyze_tables(table_names: List[str], using: str = 'default') -> None:
+    """Updates the planner statistics of the tables; e.g. after seeding them in tests."""
+    with connections[using].cursor() as cursor:
+        for table_name in table_names:
+            cursor.execute(f"ANALYZE {connections[using].ops.quote_name(table_name)}")
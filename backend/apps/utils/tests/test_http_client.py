@@ -0,0 +1,73 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.test import SimpleTestCase
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import REGISTRY
+
+from apps.utils.http_client import HttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.client_ports.append(self.client_address[1])
+        status = server.statuses.pop(0) if server.statuses else 200
+        if self.path == '/slow':
+            time.sleep(0.5)
+        body = b'{}'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpClientTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.client_ports = []
+        self.server.statuses = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.client = HttpClient('test', read_timeout=0.2, max_retries=2, backoff_factor=0)
+
+    @staticmethod
+    def _get_errors_count(error: str) -> float:
+        name = f'{NAMESPACE}_nemo_integration_request_errors_total' if NAMESPACE else 'nemo_integration_request_errors_total'
+        return REGISTRY.get_sample_value(name, {'integration': 'test', 'method': 'GET', 'error': error}) or 0
+
+    def test_connection_should_be_kept_alive(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(f'{self.base_url}/').status_code, 200)
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+    def test_temporary_failure_should_be_retried(self):
+        self.server.statuses = [503, 502]
+        errors_count = self._get_errors_count('503')
+        self.assertEqual(self.client.get(f'{self.base_url}/').status_code, 200)
+        self.assertEqual(len(self.server.client_ports), 3)
+        self.assertEqual(self._get_errors_count('503'), errors_count)
+
+    def test_persistent_failure_should_be_returned_after_retries(self):
+        self.server.statuses = [503] * 3
+        errors_count = self._get_errors_count('503')
+        self.assertEqual(self.client.get(f'{self.base_url}/').status_code, 503)
+        self.assertEqual(len(self.server.client_ports), 3)
+        self.assertEqual(self._get_errors_count('503'), errors_count + 1)
+
+    def test_hung_request_should_time_out(self):
+        client = HttpClient('test', read_timeout=0.1, max_retries=0)
+        errors_count = self._get_errors_count('ReadTimeout')
+        with self.assertRaises(requests.Timeout):
+            client.get(f'{self.base_url}/slow')
+        self.assertEqual(self._get_errors_count('ReadTimeout'), errors_count + 1)
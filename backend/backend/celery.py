@@ -3,6 +3,7 @@ import os
 from celery import Celery
 from django.conf import settings
 from apps.dashboard import constants
+from apps.devops_metrics import constants as devops_metrics_constants
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
@@ -35,4 +36,12 @@ app.conf.beat_schedule = {
         'task': constants.TASK_MATURITY_ITEM_DORY_RESULTS_FILES_GC,
         'schedule': settings.DORY_EVALUATION_MATURITY_ITEM_RESULTS_FILES_GARABAGE_COLLECTION_PERIOD,
     },
+    'periodic_archive_of_old_raw_devops_events': {
+        'task': devops_metrics_constants.TASK_ARCHIVE_OLD_RAW_EVENTS,
+        'schedule': settings.DEVOPS_METRICS_RAW_EVENTS_ARCHIVE_INTERVAL,
+    },
+    'periodic_write_of_stale_ingestion_receipts': {
+        'task': devops_metrics_constants.TASK_WRITE_STALE_INGESTION_RECEIPTS,
+        'schedule': settings.ASYNC_INGESTION_STALE_RECEIPTS_SWEEP_INTERVAL,
+    },
 }
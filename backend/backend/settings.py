@@ -81,6 +81,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'apps.dashboard.metrics.instrumentation.MetricComputationEndpointMiddleware',
     'django_prometheus.middleware.PrometheusAfterMiddleware',  # This should be last
 ]
 
@@ -146,6 +147,7 @@ USE_TZ = True
 
 CACHE_NAME_DEFAULT = 'default'
 CACHE_NAME_FILE_BASED = 'file-based'
+CACHE_NAME_METRIC_GRAPHS = 'metric-graphs'
 
 CACHES = {
     CACHE_NAME_DEFAULT: {
@@ -156,8 +158,19 @@ CACHES = {
         'LOCATION': '/opt/nemo/file-based-cache/',
         'TIMEOUT': 24 * 60 * 60,
     },
+    # Shared by all the processes, since the graphs are invalidated by the process which receives the reports.
+    CACHE_NAME_METRIC_GRAPHS: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/opt/nemo/file-based-cache/metric-graphs/',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10_000,
+        },
+    },
 }
 
+METRIC_GRAPHS_CACHE_TIMEOUT = 60 * 60
+METRIC_GRAPHS_OF_PAST_DAYS_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
 AUTHENTICATION_DEFAULT_RETURN_URL = "/"
 
 AUTHENTICATION_BACKENDS = [
@@ -281,6 +294,9 @@ NOSE_ARGS = [
 ]
 
 PROJECT_TOKEN_HEADER = "NEMO-PROJECT-TOKEN"
+# The project IDs of the API tokens are cached in each process (see `ProjectTokenCache`).
+PROJECT_TOKEN_CACHE_MAX_SIZE = 10000
+PROJECT_TOKEN_CACHE_TTL_SECONDS = int(os.environ.get('NEMO_PROJECT_TOKEN_CACHE_TTL_SECONDS', 60))
 
 IPWARE_META_PRECEDENCE_ORDER = (
     'HTTP_X_FORWARDED_FOR',
@@ -311,6 +327,19 @@ PROMETHEUS_EXPORT_MIGRATIONS = False
 
 DORY_API_URL = "dory.ir"
 
+# Of the HTTP requests to the integrations (GitLab, Sonar and Dory); see `HttpClient`.
+HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('NEMO_HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS', 5))
+HTTP_CLIENT_READ_TIMEOUT_SECONDS = float(os.environ.get('NEMO_HTTP_CLIENT_READ_TIMEOUT_SECONDS', 60))
+HTTP_CLIENT_MAX_RETRIES = int(os.environ.get('NEMO_HTTP_CLIENT_MAX_RETRIES', 3))
+HTTP_CLIENT_RETRY_BACKOFF_FACTOR = 0.5
+# Connections kept alive per host
+HTTP_CLIENT_POOL_MAX_SIZE = 10
+
+# The pages of the GitLab merge requests fetched concurrently; at most `HTTP_CLIENT_POOL_MAX_SIZE` to reuse the connections.
+GITLAB_PAGINATION_MAX_WORKERS = int(os.environ.get('NEMO_GITLAB_PAGINATION_MAX_WORKERS', 4))
+# The merge requests updated this long before the sync cursor are fetched (and reported) again by the next sync.
+GITLAB_MERGE_REQUESTS_SYNC_OVERLAP_MINUTES = int(os.environ.get('NEMO_GITLAB_MERGE_REQUESTS_SYNC_OVERLAP_MINUTES', 60))
+
 MEDIA_ROOT = "media"
 
 DORY_EVALUATION_RESULTS_SUBDIR = 'dory-evaluation-results'
@@ -321,6 +350,31 @@ FILES_RETENTION_DAYS = 31
 DORY_EVALUATION_MATURITY_ITEM_RESULTS_FILES_GARABAGE_COLLECTION_PERIOD = FILES_GARABAGE_COLLECTION_PERIOD
 DORY_EVALUATION_MATURITY_ITEM_RESULTS_FILES_RETENTION_DAYS = FILES_RETENTION_DAYS
 
+# Answer the daily DevOps metric graphs from the daily rollups (instead of the raw events); the lead time and time to
+#  restore ones only for the windows before the archive horizon (see `RawEventsArchive`).
+# Backfill the rollups (the `backfill_daily_environment_metric_rollups` command) before enabling it.
+DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED = os.environ.get('NEMO_DEVOPS_METRICS_DAILY_ROLLUPS_ENABLED', 'False') == 'True'
+# Compute the windows of the daily DevOps metric graphs in the database (the rollups take precedence where enabled).
+DEVOPS_METRICS_SQL_COMPUTERS_ENABLED = os.environ.get('NEMO_DEVOPS_METRICS_SQL_COMPUTERS_ENABLED', 'False') == 'True'
+# Don't keep the service status reports that carry no information for the metrics (i.e. the repeated UP reports of probes,
+#  but the first and the last of each run).
+# Run the `compact_service_status_reports` command to remove such reports of the history too.
+DEVOPS_METRICS_SERVICE_STATUS_TRANSITIONS_ONLY = \
+    os.environ.get('NEMO_DEVOPS_METRICS_SERVICE_STATUS_TRANSITIONS_ONLY', 'False') == 'True'
+# The service status reports are posted at most this long after their time; the repeated UP reports are kept that long,
+#  so the reports posted late between them keep the same metrics.
+DEVOPS_METRICS_SERVICE_STATUS_REPORTS_MAX_DELAY_MINUTES = \
+    int(os.environ.get('NEMO_DEVOPS_METRICS_SERVICE_STATUS_REPORTS_MAX_DELAY_MINUTES', 60))
+# Roll up and delete the deployments and service status reports older than this many days (0 keeps them forever);
+#  the daily graphs of the earlier periods are answered from the rollups, so they must be enabled. See `MIN_RAW_EVENTS_RETENTION_DAYS`.
+DEVOPS_METRICS_RAW_EVENTS_RETENTION_DAYS = int(os.environ.get('NEMO_DEVOPS_METRICS_RAW_EVENTS_RETENTION_DAYS', 0))
+DEVOPS_METRICS_RAW_EVENTS_ARCHIVE_INTERVAL = crontab(minute='30', hour='1')
+# Records posted with `?async=1` are written by a task started this long after each of them; so the ones of a burst are written together.
+ASYNC_INGESTION_WRITE_DELAY_SECONDS = int(os.environ.get('NEMO_ASYNC_INGESTION_WRITE_DELAY_SECONDS', 2))
+# The pending receipts older than this are written by a periodic sweep; e.g. if the task started for them was lost or failed.
+ASYNC_INGESTION_STALE_RECEIPTS_MINUTES = int(os.environ.get('NEMO_ASYNC_INGESTION_STALE_RECEIPTS_MINUTES', 10))
+ASYNC_INGESTION_STALE_RECEIPTS_SWEEP_INTERVAL = crontab(minute='*/5')
+
 OIDC_ROOT_URL = os.environ.get('NEMO_OIDC_ROOT_URL')
 OIDC_REALM = os.environ.get('NEMO_OIDC_REALM')
 OIDC_RP_SIGN_ALGO = 'RS256'